@@ -0,0 +1,93 @@
+"""
+Піковий RSS pixel_fingerprint: старий convert("RGB").tobytes() проти смуг (strip_bytes).
+
+    PYTHONPATH=src python benchmarks/bench_fingerprint_memory.py [--megapixels 25 100] [--format PNG]
+                                                                 [--strip-mb 1 8 64]
+
+Кожен варіант виконується в окремому процесі (ru_maxrss — пік за весь процес).
+Колонка "over decode" — пік мінус пік самого декодування (img.load()), тобто те,
+що fingerprint додає поверх декодованого зображення.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from imgtx.image_utils import pixel_fingerprint
+
+Image.MAX_IMAGE_PIXELS = None  # великі синтетичні зображення — не decompression bomb
+
+
+def make_image(path: Path, megapixels: float, fmt: str) -> None:
+    side = int((megapixels * 1_000_000) ** 0.5)
+    img = Image.linear_gradient("L").resize((side, side))
+    Image.merge("RGB", (img, img.transpose(Image.Transpose.ROTATE_90), img)).save(path, fmt)
+
+
+def legacy(path: Path) -> str:
+    with Image.open(path) as img:
+        return hashlib.sha256(img.convert("RGB").tobytes()).hexdigest()
+
+
+def decode_only(path: Path) -> str:
+    with Image.open(path) as img:
+        img.load()
+    return ""
+
+
+def child(variant: str, path: str, strip_mb: float) -> None:
+    p = Path(path)
+    t0 = time.perf_counter()
+    if variant == "decode":
+        fp = decode_only(p)
+    elif variant == "legacy":
+        fp = legacy(p)
+    else:
+        fp = pixel_fingerprint(p, strip_bytes=int(strip_mb * 1024 * 1024))
+    elapsed = time.perf_counter() - t0
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Linux: KB
+    print(json.dumps({"fp": fp, "sec": elapsed, "peak_mb": peak_kb / 1024}))
+
+
+def run(variant: str, path: Path, strip_mb: float = 0) -> dict:
+    out = subprocess.run([sys.executable, __file__, "--child", variant, str(path), str(strip_mb)],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], float(sys.argv[4]))
+        return 0
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--megapixels", type=float, nargs="+", default=[25, 100])
+    ap.add_argument("--format", default="PNG")
+    ap.add_argument("--strip-mb", type=float, nargs="+", default=[1, 8, 64])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        for mp in args.megapixels:
+            p = Path(d) / f"bench_{mp:g}mp.{args.format.lower()}"
+            make_image(p, mp, args.format)
+            base = run("decode", p)
+            ref = run("legacy", p)
+            print(f"\n{args.format} {mp:g} MP (RGB = {mp * 3:.0f} MB), decode alone: {base['peak_mb']:.0f} MB peak")
+            print(f"{'variant':<18}{'peak MB':>10}{'over decode':>13}{'sec':>8}  same digest")
+            rows = [("legacy", ref)] + [(f"strips {s:g} MB", run("strips", p, s)) for s in args.strip_mb]
+            for name, r in rows:
+                print(f"{name:<18}{r['peak_mb']:>10.0f}{r['peak_mb'] - base['peak_mb']:>13.0f}{r['sec']:>8.2f}"
+                      f"  {r['fp'] == ref['fp']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""
+Sender preflight: старий шлях (validate_image + sha256_file + pixel_fingerprint + stat + send_file read)
+проти preflight engine (один mmap/read -> хеш, метадані, fingerprint, і той самий буфер іде в сокет).
+
+    PYTHONPATH=src python benchmarks/bench_preflight.py [--megapixels 4 16] [--repeat 5]
+
+I/O міряється через rchar з /proc/self/io (Linux). Сторінки, прочитані через mmap, у rchar
+не потрапляють — для чесного порівняння байтів дивись рядок "preflight (read)".
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from imgtx.crypto import sha256_file
+from imgtx.image_utils import validate_image, pixel_fingerprint
+from imgtx.preflight import preflight_image
+
+
+def rchar() -> int:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+
+def make_image(path: Path, megapixels: float, fmt: str) -> None:
+    side = int((megapixels * 1_000_000) ** 0.5)
+    rnd = random.Random(42)
+    # шум + градієнт: не надто добре стискається, як реальне фото
+    img = Image.effect_noise((side, side), 64).convert("RGB")
+    img = Image.blend(img, Image.linear_gradient("L").resize((side, side)).convert("RGB"), rnd.random())
+    img.save(path, fmt)
+
+
+def legacy(p: Path) -> None:
+    validate_image(p)
+    sha256_file(p)
+    pixel_fingerprint(p)
+    p.stat()
+    # send_file читав файл ще раз
+    with p.open("rb") as f:
+        while f.read(64 * 1024):
+            pass
+
+
+def measure(fn, p: Path, repeat: int) -> tuple[float, int]:
+    times, io = [], []
+    for _ in range(repeat):
+        r0, t0 = rchar(), time.perf_counter()
+        fn(p)
+        times.append(time.perf_counter() - t0)
+        io.append(rchar() - r0)
+    return statistics.median(times), int(statistics.median(io))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--megapixels", type=float, nargs="+", default=[4, 16])
+    ap.add_argument("--format", default="PNG")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    variants = {
+        "legacy": legacy,
+        "preflight (mmap)": lambda p: preflight_image(p),
+        "preflight (read)": lambda p: preflight_image(p, use_mmap=False),
+    }
+
+    with tempfile.TemporaryDirectory() as d:
+        for mp in args.megapixels:
+            p = Path(d) / f"bench_{mp}mp.{args.format.lower()}"
+            make_image(p, mp, args.format)
+            size = os.path.getsize(p)
+            print(f"\n{args.format} {mp} MP, {size / 1e6:.1f} MB")
+            print(f"{'variant':<20}{'median s':>10}{'read MB':>10}{'x file':>8}")
+            for name, fn in variants.items():
+                t, io = measure(fn, p, args.repeat)
+                print(f"{name:<20}{t:>10.3f}{io / 1e6:>10.1f}{io / size:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+"""
+SecureSender: послідовна відправка (pipeline_depth=0) проти конвеєра read -> encrypt -> send.
+
+    PYTHONPATH=src python benchmarks/bench_secure_pipeline.py [--megapixels 16 64] [--repeat 3]
+
+Окремо міряються стадії (читання файлу, AES-GCM, loopback send) — конвеєр має наближатися
+до max(стадій), послідовний шлях — до їх суми. Preflight і scrypt однакові для обох і
+показані окремим рядком "prepare". Зображення — BMP (без стиснення), щоб файл був великим.
+Виграш можливий лише на кількох ядрах: на одному ядрі конвеєр трохи повільніший (черги, GIL).
+"""
+from __future__ import annotations
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from imgtx.secure_crypto import AeadStream, stream_chunks, STREAM_CHUNK_SIZE
+from imgtx.secure_sender import SecureSender, PIPELINE_DEPTH
+
+
+def make_image(path: Path, megapixels: float) -> None:
+    side = int((megapixels * 1_000_000) ** 0.5)
+    Image.frombytes("RGB", (side, side), os.urandom(side * side * 3)).save(path, "BMP")
+
+
+def drain_server(srv: socket.socket, done: threading.Event) -> None:
+    conn, _ = srv.accept()
+    buf = bytearray(1024 * 1024)
+    with conn:
+        while conn.recv_into(buf):
+            pass
+    done.set()
+
+
+def timed_send(fn) -> float:
+    """fn(sock) відправляє дані; час — до моменту, коли receiver дочитав усе."""
+    with socket.socket() as srv:
+        srv.bind(("127.0.0.1", 0))
+        srv.listen(1)
+        done = threading.Event()
+        t = threading.Thread(target=drain_server, args=(srv, done), daemon=True)
+        t.start()
+        t0 = time.perf_counter()
+        fn(srv.getsockname())
+        done.wait()
+        elapsed = time.perf_counter() - t0
+        t.join()
+    return elapsed
+
+
+def stage_read(p: Path, chunk: int) -> None:
+    with p.open("rb", buffering=0) as f:
+        buf = bytearray(chunk)
+        while f.readinto(buf):
+            pass
+
+
+def stage_encrypt(data: bytes, chunk: int) -> None:
+    stream = AeadStream(os.urandom(32), os.urandom(7), b"aad")
+    with memoryview(data) as view:
+        for off, n, last in stream_chunks(len(data), chunk):
+            stream.encrypt_chunk(view[off:off + n], last)
+
+
+def stage_send(data: bytes, chunk: int):
+    def run(addr):
+        with socket.create_connection(addr) as s, memoryview(data) as view:
+            for off in range(0, len(data), chunk):
+                s.sendall(view[off:off + chunk])
+    return run
+
+
+def end_to_end(p: Path, depth: int, chunk: int):
+    def run(addr):
+        SecureSender(addr[0], addr[1], password="pw", chunk_size=chunk, pipeline_depth=depth).send_image(str(p))
+    return run
+
+
+def median(fn, repeat: int) -> float:
+    fn()  # прогрів page cache
+    return statistics.median(fn() for _ in range(repeat))
+
+
+def clock(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--megapixels", type=float, nargs="+", default=[16, 64])
+    ap.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    ap.add_argument("--depth", type=int, default=PIPELINE_DEPTH or 4)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    chunk = args.chunk_size
+
+    with tempfile.TemporaryDirectory() as d:
+        for mp in args.megapixels:
+            p = Path(d) / f"bench_{mp}mp.bmp"
+            make_image(p, mp)
+            data = p.read_bytes()
+            size = len(data)
+
+            sender = SecureSender("127.0.0.1", 0, password="pw", chunk_size=chunk)
+            rows = {
+                "read": median(lambda: clock(lambda: stage_read(p, chunk)), args.repeat),
+                "encrypt": median(lambda: clock(lambda: stage_encrypt(data, chunk)), args.repeat),
+                "send": median(lambda: timed_send(stage_send(data, chunk)), args.repeat),
+                "prepare": median(lambda: clock(lambda: sender._prepare(p)), args.repeat),
+            }
+            serial = median(lambda: timed_send(end_to_end(p, 0, chunk)), args.repeat)
+            piped = median(lambda: timed_send(end_to_end(p, args.depth, chunk)), args.repeat)
+            body_sum = rows["read"] + rows["encrypt"] + rows["send"]
+            body_max = max(rows["read"], rows["encrypt"], rows["send"])
+            del data
+
+            print(f"\nBMP {mp} MP, {size / 1e6:.1f} MB, chunk {chunk // 1024} KB")
+            for name, t in rows.items():
+                print(f"  {name:<22}{t:>8.3f} s")
+            print(f"  {'prepare + sum(stages)':<22}{rows['prepare'] + body_sum:>8.3f} s")
+            print(f"  {'prepare + max(stages)':<22}{rows['prepare'] + body_max:>8.3f} s")
+            print(f"  {'serial (depth=0)':<22}{serial:>8.3f} s  {size / serial / 1e6:>7.0f} MB/s")
+            print(f"  {f'pipelined (depth={args.depth})':<22}{piped:>8.3f} s  {size / piped / 1e6:>7.0f} MB/s"
+                  f"  {serial / piped:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
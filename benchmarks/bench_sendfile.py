@@ -0,0 +1,94 @@
+"""
+Пропускна здатність protocol.send_file через loopback: sendfile (zero-copy) проти циклу read+sendall.
+
+    PYTHONPATH=src python benchmarks/bench_sendfile.py [--sizes 1M 16M 256M 2G] [--repeat 3]
+
+Файли створюються в --dir (за замовчуванням тимчасова тека); 2 GB потребує стільки ж місця на диску.
+"""
+from __future__ import annotations
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from imgtx.protocol import send_file
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().upper()
+    if s[-1] in UNITS:
+        return int(float(s[:-1]) * UNITS[s[-1]])
+    return int(s)
+
+
+def make_file(path: Path, size: int) -> None:
+    block = os.urandom(4 * 1024 * 1024)
+    with path.open("wb") as f:
+        left = size
+        while left > 0:
+            n = min(left, len(block))
+            f.write(block[:n])
+            left -= n
+
+
+def drain_server(srv: socket.socket, expected: int, done: threading.Event) -> None:
+    conn, _ = srv.accept()
+    buf = bytearray(1024 * 1024)
+    got = 0
+    with conn:
+        while got < expected:
+            n = conn.recv_into(buf)
+            if not n:
+                break
+            got += n
+    done.set()
+
+
+def one_run(path: Path, size: int, zero_copy: bool) -> float:
+    with socket.socket() as srv:
+        srv.bind(("127.0.0.1", 0))
+        srv.listen(1)
+        done = threading.Event()
+        t = threading.Thread(target=drain_server, args=(srv, size, done), daemon=True)
+        t.start()
+        with socket.create_connection(srv.getsockname()) as s:
+            t0 = time.perf_counter()
+            send_file(s, str(path), zero_copy=zero_copy)
+            s.shutdown(socket.SHUT_WR)
+            done.wait()
+            elapsed = time.perf_counter() - t0
+        t.join()
+    return elapsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["1M", "16M", "256M", "2G"])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--dir", default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as d:
+        print(f"{'size':>8}{'chunked MB/s':>15}{'sendfile MB/s':>15}{'speedup':>9}")
+        for label in args.sizes:
+            size = parse_size(label)
+            path = Path(d) / f"payload_{label}"
+            make_file(path, size)
+            rates = {}
+            for zero_copy in (False, True):
+                one_run(path, size, zero_copy)  # прогрів page cache
+                t = statistics.median(one_run(path, size, zero_copy) for _ in range(args.repeat))
+                rates[zero_copy] = size / t / 1e6
+            print(f"{label:>8}{rates[False]:>15.0f}{rates[True]:>15.0f}{rates[True] / rates[False]:>8.2f}x")
+            path.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
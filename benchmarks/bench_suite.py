@@ -0,0 +1,231 @@
+"""
+Loopback-набір бенчмарків для plain і secure шляхів: синтетичні зображення різних розмірів
+і форматів, кожен режим — у власному процесі (чесний peak RSS), результат — JSON.
+
+    PYTHONPATH=src python benchmarks/bench_suite.py [--sizes 10KB 1MB 16MB 500MB] [--formats JPEG PNG BMP]
+        [--modes plain session secure secure-session compress striped] [--out results.json]
+        [--baseline previous.json --tolerance 0.2]
+
+На кожен випадок надсилається кілька файлів (скільки влазить у --budget-mb, від 1 до --max-files)
+по одному: latency — від виклику send_image до результату на receiver-і. Стадії: "prepare" —
+preflight (+ scrypt у secure), "transfer" — решта (мережа, запис, перевірка на receiver-і);
+"receiver_stages_ms" — розклад з ReceiveResult.timings (header, receive, validate, fingerprint, ...).
+Sender і receiver працюють в одному процесі, тож peak RSS — сумарний для обох сторін.
+З --baseline регресія MB/s більша за --tolerance дає код виходу 1 (для CI).
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import queue
+import re
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from PIL import Image
+
+from imgtx.receiver import ReceiverServer
+from imgtx.secure_receiver import SecureReceiverServer
+from imgtx.secure_sender import SecureSender
+from imgtx.sender import Sender
+
+MODES = ("plain", "session", "secure", "secure-session", "compress", "striped")
+PASSWORD = "bench-password"
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMG]?B)", text.strip().upper())
+    if not m:
+        raise argparse.ArgumentTypeError(f"bad size {text!r}, expected e.g. 10KB, 16MB")
+    return int(float(m.group(1)) * _UNITS[m.group(2)])
+
+
+def _pattern(w: int, h: int) -> Image.Image:
+    # шум + градієнт: стискається приблизно як реальне фото
+    img = Image.effect_noise((w, h), 48).convert("RGB")
+    return Image.blend(img, Image.linear_gradient("L").resize((w, h)).convert("RGB"), 0.5)
+
+
+def make_image(path: Path, fmt: str, target_bytes: int) -> None:
+    """Зображення ~target_bytes: байти на піксель оцінюються на зразку 256x256 того самого вмісту."""
+    probe = Path(str(path) + ".probe")
+    _pattern(256, 256).save(probe, fmt)
+    bpp = probe.stat().st_size / (256 * 256)
+    probe.unlink()
+    side = max(16, int((target_bytes / bpp) ** 0.5))
+    _pattern(side, side).save(path, fmt)
+
+
+def percentile(values: list[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, int(round(q / 100 * len(s) + 0.5)) - 1))]
+
+
+def _timed(fn, sink: list[float]):
+    def wrapper(*a, **kw):
+        t0 = time.perf_counter()
+        try:
+            return fn(*a, **kw)
+        finally:
+            sink.append(time.perf_counter() - t0)
+    return wrapper
+
+
+def _start_receiver(mode: str, out: Path, done: "queue.SimpleQueue", stages: list[dict]):
+    def on_result(r) -> None:
+        done.put(time.perf_counter())
+        if not isinstance(r, str):
+            stages.append(r.timings)
+        Path(r if isinstance(r, str) else r.saved_path).unlink(missing_ok=True)   # диск не росте з --files
+
+    if mode.startswith("secure"):
+        srv = SecureReceiverServer("127.0.0.1", 0, str(out), password=PASSWORD)
+    else:
+        srv = ReceiverServer("127.0.0.1", 0, str(out))
+    t = threading.Thread(target=srv.serve_forever, args=(on_result, done.put), daemon=True)
+    t.start()
+    deadline = time.time() + 5
+    while srv.server_address is None and time.time() < deadline:
+        time.sleep(0.01)
+    return srv
+
+
+def _sender(mode: str, port: int):
+    if mode.startswith("secure"):
+        return SecureSender("127.0.0.1", port, password=PASSWORD)
+    if mode == "compress":
+        return Sender("127.0.0.1", port, compression="auto")
+    if mode == "striped":
+        return Sender("127.0.0.1", port, stripes=4, stripe_range_size=4 * 1024 * 1024)
+    return Sender("127.0.0.1", port)
+
+
+def run_case(mode: str, path: str, files: int) -> dict:
+    """Виконується в окремому процесі: ru_maxrss — пік саме цього випадку."""
+    prepare: list[float] = []
+    Sender.build_header = staticmethod(_timed(Sender.build_header, prepare))
+    SecureSender._prepare = _timed(SecureSender._prepare, prepare)
+
+    out = Path(tempfile.mkdtemp(prefix="imgtx-bench-"))
+    done: "queue.SimpleQueue" = queue.SimpleQueue()
+    receiver_stages: list[dict] = []
+    srv = _start_receiver(mode, out, done, receiver_stages)
+    sender = _sender(mode, srv.server_address[1])
+    latencies: list[float] = []
+    try:
+        session = sender.open_session() if mode.endswith("session") else None
+        t_start = time.perf_counter()
+        for _ in range(files):
+            t0 = time.perf_counter()
+            (session or sender).send_image(path)
+            landed = done.get(timeout=600)
+            if isinstance(landed, BaseException):
+                raise landed
+            latencies.append(landed - t0)
+        elapsed = time.perf_counter() - t_start
+        if session is not None:
+            session.close()
+    finally:
+        srv.shutdown(timeout=10)
+        shutil.rmtree(out, ignore_errors=True)
+
+    size = os.path.getsize(path)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_bytes = rss if sys.platform == "darwin" else rss * 1024
+    transfer = [lat - prep for lat, prep in zip(latencies, prepare)]
+    return {
+        "files": files,
+        "size_bytes": size,
+        "elapsed_s": elapsed,
+        "mb_per_s": size * files / elapsed / 1e6,
+        "files_per_s": files / elapsed,
+        "latency_ms": {f"p{q}": percentile(latencies, q) * 1e3 for q in (50, 90, 99)}
+                      | {"max": max(latencies) * 1e3},
+        "peak_rss_mb": rss_bytes / 1e6,
+        "stages_ms": {"prepare": statistics.median(prepare) * 1e3, "transfer": statistics.median(transfer) * 1e3},
+        # ReceiveResult.timings (plain-режими; secure receiver стадій не повертає)
+        "receiver_stages_ms": {
+            name: statistics.median(t.get(name, 0.0) for t in receiver_stages) * 1e3
+            for name in sorted({k for t in receiver_stages for k in t})
+        },
+    }
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Рядки з регресіями MB/s відносно попереднього запуску (ті самі mode/format/target)."""
+    old = {(r["mode"], r["format"], r["target_bytes"]): r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = []
+    for r in results:
+        prev = old.get((r["mode"], r["format"], r["target_bytes"]))
+        if prev and r["mb_per_s"] < prev["mb_per_s"] * (1 - tolerance):
+            regressions.append(f"{r['mode']} {r['format']} {r['target_bytes']}: "
+                               f"{prev['mb_per_s']:.1f} -> {r['mb_per_s']:.1f} MB/s")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=parse_size, nargs="+", default=[parse_size(s) for s in ("10KB", "1MB", "16MB")])
+    ap.add_argument("--formats", nargs="+", default=["JPEG", "PNG", "BMP"])
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=["plain", "session", "secure", "secure-session"])
+    ap.add_argument("--budget-mb", type=float, default=64, help="Bytes sent per case (sets the number of files).")
+    ap.add_argument("--max-files", type=int, default=50)
+    ap.add_argument("--out", help="Write JSON here instead of stdout.")
+    ap.add_argument("--baseline", help="Previous JSON output to compare MB/s against.")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    args = ap.parse_args()
+
+    results = []
+    ctx = get_context("spawn")
+    with tempfile.TemporaryDirectory() as d:
+        for fmt in args.formats:
+            for target in args.sizes:
+                p = Path(d) / f"bench_{target}.{fmt.lower()}"
+                make_image(p, fmt, target)
+                size = p.stat().st_size
+                files = max(1, min(args.max_files, int(args.budget_mb * 1e6 // max(size, 1))))
+                for mode in args.modes:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+                        row = ex.submit(run_case, mode, str(p), files).result()
+                    row = {"mode": mode, "format": fmt, "target_bytes": target, **row}
+                    results.append(row)
+                    print(f"{mode:<15}{fmt:<6}{size / 1e6:>9.2f} MB x{files:<4}{row['mb_per_s']:>9.1f} MB/s"
+                          f"{row['files_per_s']:>9.1f} files/s  p50 {row['latency_ms']['p50']:>8.1f} ms"
+                          f"  rss {row['peak_rss_mb']:>7.1f} MB", file=sys.stderr, flush=True)
+                p.unlink()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
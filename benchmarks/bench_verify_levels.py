@@ -0,0 +1,63 @@
+"""
+Вартість рівнів перевірки на receiver-і (sha-only / structure / reduced / full).
+
+    PYTHONPATH=src python benchmarks/bench_verify_levels.py [--assets tests/assets] [--megapixels 12 50] [--repeat 5]
+
+Міряється verification.check_image — sha256 однаковий для всіх рівнів і рахується під час
+прийому, тому сюди не входить. Окрім файлів з --assets генеруються JPEG і PNG заданого розміру.
+"""
+from __future__ import annotations
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from imgtx.verification import VERIFY_LEVELS, check_image
+
+
+def make_image(path: Path, megapixels: float, fmt: str) -> None:
+    w = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    h = w * 3 // 4
+    # шум + градієнт: не надто добре стискається, як реальне фото
+    img = Image.effect_noise((w, h), 48).convert("RGB")
+    img = Image.blend(img, Image.linear_gradient("L").resize((w, h)).convert("RGB"), 0.5)
+    img.save(path, fmt)
+
+
+def measure(p: Path, level: str, repeat: int) -> float:
+    check_image(p, level)  # прогрів page cache
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        check_image(p, level)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--assets", default="tests/assets")
+    ap.add_argument("--megapixels", type=float, nargs="*", default=[12, 50])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        files = sorted(p for p in Path(args.assets).iterdir() if p.is_file())
+        for mp in args.megapixels:
+            for fmt in ("JPEG", "PNG"):
+                p = Path(d) / f"synthetic_{mp:g}mp.{fmt.lower()}"
+                make_image(p, mp, fmt)
+                files.append(p)
+
+        print(f"{'file':<26}{'MB':>7}" + "".join(f"{lvl:>11}" for lvl in VERIFY_LEVELS) + "   (median s)")
+        for p in files:
+            row = [measure(p, lvl, args.repeat) for lvl in VERIFY_LEVELS]
+            print(f"{p.name:<26}{p.stat().st_size / 1e6:>7.1f}" + "".join(f"{t:>11.4f}" for t in row))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
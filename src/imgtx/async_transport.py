@@ -0,0 +1,304 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from .config import (
+    DEFAULT_HOST, DEFAULT_PORT, WIRE_VERSION, SUPPORTED_VERSIONS, CHUNK_SIZE, DELIMITER, HEADER_MAX_BYTES, MAX_WORKERS,
+    CLIENT_TIMEOUT_SEC,
+)
+from .exceptions import ProtocolError, IntegrityError, InvalidImageError, ConnectionClosed
+from .protocol import (
+    MAGIC, PREAMBLE, encode_message, decode_header, decode_message_header, parse_preamble, reply_for_error,
+    STATUS_OK, Digest,
+)
+from .receiver import ReceiveResult, inline_payload_len, tmp_path_for, verify_and_store
+from .sender import Sender, check_wire_version
+from .verification import DEFAULT_VERIFY_LEVEL, check_level
+
+if TYPE_CHECKING:
+    from .verify_pool import VerifyPool
+
+logger = logging.getLogger(__name__)
+
+# поля заголовка, яких async receiver не вміє (resume, dedup, стиснення, cdc, stripe) — лише plain і session
+UNSUPPORTED_FEATURES = ("transfer_id", "dedup", "compress", "cdc", "stripe")
+
+# ---- framing на asyncio streams (той самий wire format, що й protocol.py / secure_protocol.py)
+
+async def recv_until_delimiter(reader: asyncio.StreamReader, initial: bytes = b"") -> Tuple[bytes, bytes]:
+    """
+    Async-аналог protocol.recv_until_delimiter.
+    StreamReader сам буферизує залишок, тому remainder завжди порожній.
+    """
+    idx = initial.find(DELIMITER)
+    if idx != -1:
+        # лише "{}": будь-який справжній заголовок довший за 4 байти
+        if idx + len(DELIMITER) != len(initial):
+            raise ProtocolError("Unexpected data after header")
+        return initial[:idx], b""
+    try:
+        data = initial + await reader.readuntil(DELIMITER)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial and not initial:
+            raise ConnectionClosed("Connection closed") from e
+        raise ProtocolError("Connection closed before header delimiter") from e
+    except asyncio.LimitOverrunError as e:
+        raise ProtocolError("Header exceeds max size") from e
+    header = data[:-len(DELIMITER)]
+    if len(header) > HEADER_MAX_BYTES:
+        raise ProtocolError("Header exceeds max size")
+    return header, b""
+
+async def recv_message(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], int, Optional[int]]:
+    """Async-аналог protocol.recv_message: (header, версія кадру, payload_len або None для v1)."""
+    try:
+        first = await reader.readexactly(len(MAGIC))
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            raise ConnectionClosed("Connection closed") from e
+        raise ProtocolError("Connection closed before end of header") from e
+    if first != MAGIC:
+        header_bytes, _rest = await recv_until_delimiter(reader, first)
+        header = decode_header(header_bytes)
+        if not isinstance(header, dict):
+            raise ProtocolError("Header is not an object")
+        return header, 1, None
+    try:
+        version, flags, header_len, payload_len = parse_preamble(
+            first + await reader.readexactly(PREAMBLE.size - len(MAGIC)))
+        data = await reader.readexactly(header_len)
+    except asyncio.IncompleteReadError as e:
+        raise ProtocolError("Connection closed before end of header") from e
+    return decode_message_header(data, version, flags), version, payload_len
+
+async def recv_exact_to_file(reader: asyncio.StreamReader, total_bytes: int, out_path: str,
+                             digest: Optional[Digest] = None, timeout: Optional[float] = None) -> int:
+    """
+    Receives exactly total_bytes and writes to out_path.
+    Returns number of bytes written. Disk writes and digest.update() run in the default executor.
+    timeout — на кожне читання (як settimeout у blocking сокета), не на весь файл.
+    """
+    loop = asyncio.get_running_loop()
+    written = 0
+    f = await loop.run_in_executor(None, open, out_path, "wb")
+    try:
+        while written < total_bytes:
+            chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, total_bytes - written)), timeout)
+            if not chunk:
+                break
+            await loop.run_in_executor(None, _write_and_hash, f, chunk, digest)
+            written += len(chunk)
+    finally:
+        await loop.run_in_executor(None, f.close)
+    return written
+
+def _write_and_hash(f, chunk: bytes, digest: Optional[Digest]) -> None:
+    f.write(chunk)
+    if digest is not None:
+        digest.update(chunk)
+
+async def send_file(writer: asyncio.StreamWriter, file_path: str) -> None:
+    loop = asyncio.get_running_loop()
+    f = await loop.run_in_executor(None, open, file_path, "rb")
+    try:
+        # loop.sendfile використовує os.sendfile, якщо транспорт це дозволяє, інакше читає частинами
+        await loop.sendfile(writer.transport, f, fallback=True)
+    finally:
+        f.close()
+
+
+class AsyncReceiverServer:
+    """
+    Receiver на asyncio: тисячі повільних/неактивних клієнтів без потоку на кожного.
+    Хешування і перевірка Pillow йдуть в executor, щоб не блокувати event loop.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, output_dir: str = "outputs/received",
+                 max_verify_workers: int = MAX_WORKERS, client_timeout: Optional[float] = CLIENT_TIMEOUT_SEC,
+                 verify_pool: "Optional[VerifyPool]" = None, verify_level: str = DEFAULT_VERIFY_LEVEL):
+        self.host = host
+        self.port = port
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # як у PooledServer: межа простою на кожне читання/запис, а не на всю передачу
+        self.client_timeout = client_timeout
+        # обмежуємо скільки CPU-важких перевірок іде паралельно
+        self._verify_slots = asyncio.Semaphore(max_verify_workers)
+        self.verify_pool = verify_pool
+        self.verify_level = check_level(verify_level)
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self, on_result: Optional[Callable[[ReceiveResult], None]] = None,
+                    on_error: Optional[Callable[[BaseException], None]] = None) -> None:
+        async def client_cb(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await self._run_client(reader, writer, on_result, on_error)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                else:
+                    logger.exception("client handling failed")
+
+        self._server = await asyncio.start_server(
+            client_cb, self.host, self.port, limit=HEADER_MAX_BYTES + len(DELIMITER), reuse_address=True
+        )
+
+    @property
+    def server_address(self) -> Optional[Tuple[str, int]]:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self, on_result=None, on_error=None) -> None:
+        if self._server is None:
+            await self.start(on_result=on_result, on_error=on_error)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def serve_once(self) -> ReceiveResult:
+        """Прийняти ОДНЕ зображення і завершитися."""
+        loop = asyncio.get_running_loop()
+        done: asyncio.Future = loop.create_future()
+
+        def on_result(res):
+            if not done.done():
+                done.set_result(res)
+
+        def on_error(e):
+            if not done.done():
+                done.set_exception(e)
+
+        await self.start(on_result=on_result, on_error=on_error)
+        try:
+            return await done
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _run_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                          on_result, on_error) -> None:
+        """Як PooledServer._serve_connection: обробляти кадри, доки peer не закриє з'єднання."""
+        served = 0
+        try:
+            while True:
+                try:
+                    res = await self._handle_client(reader, writer)
+                except ConnectionClosed:
+                    if served == 0:
+                        raise
+                    return
+                except (IntegrityError, InvalidImageError) as e:
+                    if on_error is None:
+                        raise
+                    on_error(e)
+                else:
+                    if on_result is not None:
+                        on_result(res)
+                served += 1
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> ReceiveResult:
+        header, version, payload_len = await asyncio.wait_for(recv_message(reader), self.client_timeout)
+        if version == 1:
+            if int(header.get("version", -1)) not in SUPPORTED_VERSIONS:
+                raise ProtocolError("Unsupported protocol version")
+            header["version"] = 1
+        elif payload_len != inline_payload_len(header):
+            raise ProtocolError("Payload length in the preamble does not match the header")
+        unsupported = [key for key in UNSUPPORTED_FEATURES if header.get(key)]
+        if unsupported:
+            await self._reject(reader, writer, header, version,
+                               ProtocolError(f"Async receiver does not support: {', '.join(unsupported)}"),
+                               self.client_timeout)
+
+        filename = str(header.get("filename", "image"))
+        size_bytes = int(header["size_bytes"])
+        session = bool(header.get("session", False))
+
+        tmp_path = tmp_path_for(self.output_dir, filename)
+        loop = asyncio.get_running_loop()
+        try:
+            h = hashlib.sha256()
+            written = await recv_exact_to_file(reader, size_bytes, str(tmp_path), digest=h,
+                                               timeout=self.client_timeout)
+
+            if written != size_bytes:
+                raise IntegrityError(f"Incomplete transfer: expected {size_bytes}, got {written}")
+
+            try:
+                async with self._verify_slots:
+                    verify = verify_and_store if self.verify_pool is None else self.verify_pool.verify
+                    result = await loop.run_in_executor(None, verify, self.output_dir, header, tmp_path,
+                                                        h.hexdigest(), self.verify_level)
+            except (IntegrityError, InvalidImageError) as e:
+                if session:
+                    writer.write(encode_message(reply_for_error(e), version, packed=False))
+                    await asyncio.wait_for(writer.drain(), self.client_timeout)
+                raise
+            if session:
+                writer.write(encode_message({"status": STATUS_OK, "sha256": result.sha256, "verify": result.verify},
+                                            version, packed=False))
+                await asyncio.wait_for(writer.drain(), self.client_timeout)
+            return result
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    async def _reject(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, header: dict, version: int,
+                      error: ProtocolError, timeout: Optional[float] = None) -> None:
+        """
+        Відповісти помилкою на запит, який не обробляємо, і розірвати з'єднання.
+        Спершу вичитуємо дані, що йдуть одразу за заголовком: close() з непрочитаним буфером шле RST,
+        і sender може не встигнути прочитати відповідь.
+        """
+        remaining = inline_payload_len(header)
+        while remaining > 0:
+            chunk = await asyncio.wait_for(reader.read(min(CHUNK_SIZE, remaining)), timeout)
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        writer.write(encode_message(reply_for_error(error), version, packed=False))
+        await asyncio.wait_for(writer.drain(), timeout)
+        raise error
+
+
+class AsyncSender:
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verify: str = DEFAULT_VERIFY_LEVEL,
+                 wire_version: int = WIRE_VERSION):
+        self.host = host
+        self.port = port
+        self.verify = check_level(verify)
+        self.wire_version = check_wire_version(wire_version)
+
+    async def send_image(self, path: str) -> dict:
+        p = Path(path)
+        loop = asyncio.get_running_loop()
+        # validate + sha256 + fingerprint — CPU/диск, тому в executor
+        header = await loop.run_in_executor(None, Sender.build_header, p, None, self.verify)
+
+        _reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(encode_message(header, self.wire_version, header["size_bytes"]))
+            await writer.drain()
+            await send_file(writer, str(p))
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+        return header
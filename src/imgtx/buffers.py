@@ -0,0 +1,76 @@
+from __future__ import annotations
+import socket
+from typing import BinaryIO, Callable, Optional
+
+from .config import CHUNK_SIZE
+
+# Прийом без зайвих алокацій: буфер виділяється один раз, ядро пише прямо в нього
+# через recv_into, далі працюємо зі зрізами memoryview (без копій у нові bytes).
+# Для передачі N байтів — O(N) копіювання і фіксована кількість алокацій.
+
+
+def recv_exact_into(sock: socket.socket, view: memoryview) -> int:
+    """
+    Заповнити view даними з сокета. Повертає кількість отриманих байтів
+    (менше за len(view), тільки якщо peer закрив з'єднання).
+    """
+    total = len(view)
+    got = 0
+    while got < total:
+        n = sock.recv_into(view[got:])
+        if not n:
+            break
+        got += n
+    return got
+
+
+def recv_exact(sock: socket.socket, n: int, initial: bytes | memoryview = b"") -> bytearray:
+    """
+    Рівно n байтів в один попередньо виділений bytearray (ConnectionError, якщо сокет закрито раніше).
+    initial — вже прочитаний початок (залишок після заголовка), не довший за n.
+    Буфер виділяється до першого recv: n з мережі треба обмежити до виклику.
+    """
+    if len(initial) > n:
+        raise ValueError("initial data longer than n")
+    buf = bytearray(n)
+    k = len(initial)
+    buf[:k] = initial
+    with memoryview(buf) as view:
+        if recv_exact_into(sock, view[k:]) != n - k:
+            raise ConnectionError("Socket closed")
+    return buf
+
+
+def recv_into_file(sock: socket.socket, f: BinaryIO, total_bytes: int, digest=None,
+                   chunk_size: int = CHUNK_SIZE, progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Перелити total_bytes із сокета у файл через один scratch-буфер.
+    digest (якщо є) отримує кожен шматок, progress — скільки вже записано. Повертає кількість записаних байтів.
+    """
+    scratch = bytearray(min(chunk_size, max(total_bytes, 1)))
+    view = memoryview(scratch)
+    written = 0
+    try:
+        while written < total_bytes:
+            to_read = min(len(scratch), total_bytes - written)
+            n = sock.recv_into(view, to_read)
+            if not n:
+                break
+            chunk = view[:n] if n < len(scratch) else view
+            f.write(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            written += n
+            if progress is not None:
+                progress(written)
+    finally:
+        view.release()
+    return written
+
+
+def find_from(buf: bytearray, needle: bytes, scanned: int, end: int) -> int:
+    """
+    Шукати needle лише в нових байтах: [scanned - len(needle) + 1, end).
+    Разом по всіх recv — лінійно за розміром буфера, а не квадратично.
+    """
+    return buf.find(needle, max(0, scanned - len(needle) + 1), end)
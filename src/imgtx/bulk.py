@@ -0,0 +1,180 @@
+from __future__ import annotations
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+from .config import BULK_JOBS, BULK_RETRIES, RESUME_BACKOFF_SEC
+from .exceptions import ConnectionClosed, IntegrityError, InvalidImageError, ProtocolError
+
+logger = logging.getLogger(__name__)
+
+# мережа, обрив сесії, зіпсовані в дорозі байти — варто спробувати знову новим з'єднанням
+RETRYABLE_ERRORS = (OSError, ProtocolError, IntegrityError)
+
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"})
+
+
+@dataclass(frozen=True)
+class FileOutcome:
+    path: str
+    ok: bool
+    size_bytes: int
+    attempts: int
+    error: str = ""
+
+
+@dataclass(frozen=True)
+class BulkSummary:
+    files: int
+    bytes_sent: int
+    elapsed: float
+    failed: List[FileOutcome] = field(default_factory=list)
+
+    @property
+    def sent(self) -> int:
+        return self.files - len(self.failed)
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes_sent / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+
+def find_images(root: str | Path, pattern: str = "*", recursive: bool = False) -> List[Path]:
+    """Файли зображень у root за glob-шаблоном (recursive — і в підкаталогах), у сталому порядку."""
+    root = Path(root)
+    if not root.is_dir():
+        raise NotADirectoryError(str(root))
+    matches = root.rglob(pattern) if recursive else root.glob(pattern)
+    return sorted(p for p in matches if p.suffix.lower() in IMAGE_EXTENSIONS and p.is_file())
+
+
+class _Worker:
+    """Стан одного потоку: власна сесія (одне з'єднання на багато файлів)."""
+
+    def __init__(self, use_sessions: bool) -> None:
+        self.use_sessions = use_sessions
+        self.session: Any = None
+        self.session_used = False
+
+    def drop_session(self) -> None:
+        if self.session is not None:
+            try:
+                self.session.close()
+            except OSError:
+                pass
+        self.session = None
+        self.session_used = False
+
+
+class BulkSender:
+    """
+    Надіслати багато файлів через Sender або SecureSender: jobs потоків, у кожного своя сесія.
+    Якщо receiver не тримає сесію (перший же файл сесії обірвався без відповіді),
+    решта файлів цього потоку йде по одному з'єднанню на файл. Повторюються (до retries разів, з новим з'єднанням)
+    лише RETRYABLE_ERRORS; невалідне зображення чи помилка локального файлу — одразу в failed.
+    """
+
+    def __init__(self, sender: Any, jobs: int = BULK_JOBS, retries: int = BULK_RETRIES,
+                 backoff_sec: float = RESUME_BACKOFF_SEC, on_file: Optional[Callable[[FileOutcome], None]] = None):
+        if jobs < 1 or retries < 0:
+            raise ValueError("jobs must be >= 1 and retries >= 0")
+        self.sender = sender
+        self.jobs = jobs
+        self.retries = retries
+        self.backoff_sec = backoff_sec
+        self.on_file = on_file
+        # resume / cdc / striped передачі мають власні з'єднання — сесія для них не підходить.
+        # Лише початкове значення: далі кожен потік вирішує сам (_Worker.use_sessions)
+        self._use_sessions = hasattr(sender, "open_session") and not (
+            getattr(sender, "resume", False) or getattr(sender, "cdc", False) or getattr(sender, "stripes", 1) > 1)
+        self._lock = threading.Lock()
+
+    def send_all(self, paths: Iterable[str | Path]) -> BulkSummary:
+        todo: "queue.SimpleQueue[Path]" = queue.SimpleQueue()
+        count = 0
+        for p in paths:
+            todo.put(Path(p))
+            count += 1
+        outcomes: List[FileOutcome] = []
+
+        def run() -> None:
+            worker = _Worker(self._use_sessions)
+            try:
+                while True:
+                    try:
+                        p = todo.get_nowait()
+                    except queue.Empty:
+                        return
+                    outcome = self._send_one(worker, p)
+                    with self._lock:
+                        outcomes.append(outcome)
+                    if self.on_file is not None:
+                        self.on_file(outcome)
+            finally:
+                worker.drop_session()
+
+        t0 = time.perf_counter()
+        jobs = max(1, min(self.jobs, count))
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="imgtx-bulk") as pool:
+            for f in [pool.submit(run) for _ in range(jobs)]:
+                f.result()
+        elapsed = time.perf_counter() - t0
+
+        return BulkSummary(
+            files=count,
+            bytes_sent=sum(o.size_bytes for o in outcomes if o.ok),
+            elapsed=elapsed,
+            failed=sorted((o for o in outcomes if not o.ok), key=lambda o: o.path),
+        )
+
+    def _send_one(self, worker: _Worker, p: Path) -> FileOutcome:
+        try:
+            size = p.stat().st_size
+        except OSError as e:
+            return FileOutcome(str(p), False, 0, 0, repr(e))
+        error: BaseException | None = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                self._send(worker, p)
+                return FileOutcome(str(p), True, size, attempt)
+            except InvalidImageError as e:
+                # receiver відхилив вміст — повтор нічого не змінить; сесія лишається робочою
+                return FileOutcome(str(p), False, size, attempt, repr(e))
+            except Exception as e:
+                error = e
+                self._session_failed(worker, e)
+                if not isinstance(e, RETRYABLE_ERRORS):
+                    return FileOutcome(str(p), False, size, attempt, repr(e))
+                if attempt <= self.retries:
+                    logger.warning("sending %s failed (%r), retry %d/%d", p, e, attempt, self.retries)
+                    time.sleep(self.backoff_sec * (2 ** (attempt - 1)))
+        return FileOutcome(str(p), False, size, self.retries + 1, repr(error))
+
+    def _send(self, worker: _Worker, p: Path) -> None:
+        if not worker.use_sessions:
+            self.sender.send_image(str(p))
+            return
+        if worker.session is None:
+            worker.session = self.sender.open_session()
+        worker.session.send_image(str(p))
+        worker.session_used = True
+
+    def _session_failed(self, worker: _Worker, e: BaseException) -> None:
+        if worker.session is None:
+            return
+        if not worker.session_used and isinstance(e, ConnectionClosed):
+            # перший файл сесії, а receiver закрив з'єднання без відповіді — так поводиться receiver без сесій.
+            # Інші помилки (reset, timeout, protocol_error у відповіді) про підтримку сесій нічого не кажуть
+            logger.warning("receiver does not keep sessions (%r), falling back to one connection per file", e)
+            worker.use_sessions = False
+        # після помилки стан потоку невідомий — наступна спроба з новим з'єднанням
+        worker.drop_session()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import base64
+import hashlib
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+from .config import CDC_MIN_SIZE, CDC_AVG_SIZE, CDC_MAX_SIZE
+
+# Блокова дедуплікація для майже однакових файлів (інший EXIF, перезбережені PNG-чанки):
+# файл ріжеться на шматки за вмістом (gear rolling hash), тож вставка/зміна на початку
+# зсуває лише сусідні межі. Sender надсилає список (sha256, довжина) шматків, receiver
+# відповідає бітовою мапою тих, яких нема в його ChunkStore, і збирає файл зі сховища
+# та нових шматків. Фінальний sha256 усього файлу лишається наскрізною гарантією.
+
+CHUNK_ENTRY = struct.Struct(">32sI")   # sha256 шматка + довжина
+
+_M64 = (1 << 64) - 1
+# детермінована таблица gear: sender і receiver мають різати однаково
+_GEAR = [int.from_bytes(hashlib.sha256(b"imgtx-gear-%d" % i).digest()[:8], "big") for i in range(256)]
+
+
+def _cut_mask(avg_size: int) -> int:
+    # старші біти: залежать від останніх ~64 байтів, а не лише від кількох останніх
+    bits = avg_size.bit_length() - 1
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def cdc_chunks(buf, min_size: int = CDC_MIN_SIZE, avg_size: int = CDC_AVG_SIZE,
+               max_size: int = CDC_MAX_SIZE) -> List[Tuple[int, int]]:
+    """(offset, length) шматків буфера. Чистий Python: ~десятки MB/s, тому режим опційний."""
+    if not 0 < min_size <= avg_size <= max_size:
+        raise ValueError("expected 0 < min_size <= avg_size <= max_size")
+    mask = _cut_mask(avg_size)
+    gear = _GEAR
+    n = len(buf)
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while start < n:
+        end = min(start + max_size, n)
+        cut = end
+        scan_from = start + min_size
+        if scan_from < end:
+            h = 0
+            for i, b in enumerate(buf[scan_from:end], scan_from):
+                h = ((h << 1) + gear[b]) & _M64
+                if not h & mask:
+                    cut = i + 1
+                    break
+        spans.append((start, cut - start))
+        start = cut
+    return spans
+
+
+def chunk_list(buf, spans: Iterable[Tuple[int, int]]) -> Tuple[List[bytes], bytes]:
+    """Digest кожного шматка і бінарний кадр списку (CHUNK_ENTRY на шматок)."""
+    digests = []
+    frame = bytearray()
+    with memoryview(buf) as view:
+        for off, length in spans:
+            d = hashlib.sha256(view[off:off + length]).digest()
+            digests.append(d)
+            frame += CHUNK_ENTRY.pack(d, length)
+    return digests, bytes(frame)
+
+
+def parse_chunk_list(frame: bytes) -> List[Tuple[bytes, int]]:
+    if len(frame) % CHUNK_ENTRY.size:
+        raise ValueError("truncated chunk list")
+    return list(CHUNK_ENTRY.iter_unpack(frame))
+
+
+def encode_bitmap(flags: Sequence[bool]) -> str:
+    bits = bytearray((len(flags) + 7) // 8)
+    for i, f in enumerate(flags):
+        if f:
+            bits[i >> 3] |= 0x80 >> (i & 7)
+    return base64.b64encode(bytes(bits)).decode("ascii")
+
+
+def decode_bitmap(data: str, count: int) -> List[bool]:
+    bits = base64.b64decode(data)
+    if len(bits) != (count + 7) // 8:
+        raise ValueError("bitmap length does not match chunk count")
+    return [bool(bits[i >> 3] & (0x80 >> (i & 7))) for i in range(count)]
+
+
+class ChunkStore:
+    """Сховище шматків sha256 -> байти (SQLite; дрібні blob-и без тисяч файлів на диску)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        import sqlite3   # receiver імпортує cdc заради формату кадру; sqlite — лише для сховища
+        self._db = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS chunks (sha256 BLOB PRIMARY KEY, data BLOB NOT NULL)")
+
+    @classmethod
+    def in_dir(cls, output_dir: str | Path) -> "ChunkStore":
+        return cls(Path(output_dir) / ".imgtx-chunks.sqlite")
+
+    def missing(self, digests: Sequence[bytes]) -> List[bool]:
+        with self._lock:
+            have = set()
+            for i in range(0, len(digests), 500):   # обмеження кількості параметрів SQLite
+                part = digests[i:i + 500]
+                q = "SELECT sha256 FROM chunks WHERE sha256 IN (%s)" % ",".join("?" * len(part))
+                have.update(row[0] for row in self._db.execute(q, part))
+        return [d not in have for d in digests]
+
+    def get(self, digest: bytes) -> bytes | None:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM chunks WHERE sha256 = ?", (digest,)).fetchone()
+        return None if row is None else row[0]
+
+    def put_many(self, items: Iterable[Tuple[bytes, bytes]]) -> None:
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR IGNORE INTO chunks VALUES (?, ?)", items)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
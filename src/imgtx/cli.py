@@ -1,36 +1,104 @@
 from __future__ import annotations
 import argparse
 import sys
+from pathlib import Path
 
-from .receiver import ReceiverServer
-from .sender import Sender
-from .config import DEFAULT_HOST, DEFAULT_PORT
+# receiver/sender (а з ними Pillow, sqlite тощо) імпортуються в гілці підкоманди:
+# запуск CLI на кожен файл не платить за те, що цій підкоманді не потрібно
+from .config import (
+    DEFAULT_HOST, DEFAULT_PORT, MAX_WORKERS, VERIFY_PROCESSES, VERIFY_TIMEOUT_SEC, STRIPES, STRIPE_RANGE_SIZE,
+    BULK_JOBS, BULK_RETRIES, WIRE_VERSION, SUPPORTED_VERSIONS,
+)
+from .verification import VERIFY_LEVELS, DEFAULT_VERIFY_LEVEL
+from .compress import CODECS, COMPRESS_AUTO, COMPRESS_NONE
 
 def main(argv=None) -> int:
     parser = argparse.ArgumentParser(prog="imgtx", description="Image transfer system (TCP) with integrity checks.")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
-    p_recv = sub.add_parser("recv", help="Run receiver server (serve once).")
+    p_recv = sub.add_parser("recv", help="Run receiver server (serve once, or keep serving with --serve).")
     p_recv.add_argument("--host", default=DEFAULT_HOST)
     p_recv.add_argument("--port", type=int, default=DEFAULT_PORT)
     p_recv.add_argument("--out", default="outputs/received")
+    p_recv.add_argument("--serve", action="store_true", help="Keep listening and handle clients concurrently.")
+    p_recv.add_argument("--workers", type=int, default=MAX_WORKERS, help="Max concurrent transfers with --serve.")
+    p_recv.add_argument("--verify-procs", type=int, default=VERIFY_PROCESSES,
+                        help="Verify images in N worker processes (0 = in the transfer thread).")
+    p_recv.add_argument("--verify-timeout", type=float, default=VERIFY_TIMEOUT_SEC,
+                        help="Per-image verification timeout with --verify-procs, seconds.")
+    p_recv.add_argument("--verify", choices=VERIFY_LEVELS, default=DEFAULT_VERIFY_LEVEL,
+                        help="Minimum verification level; a sender may request a stricter one.")
+    p_recv.add_argument("--dedup", action="store_true",
+                        help="Keep a digest index in --out and skip uploads of bytes already stored.")
+    p_recv.add_argument("--cdc", action="store_true",
+                        help="Keep a chunk store in --out for block-level dedup of near-duplicate images.")
+    p_recv.add_argument("--metrics", metavar="PATH",
+                        help="Write cumulative metrics: Prometheus text file, or JSON lines if PATH ends in .jsonl.")
 
-    p_send = sub.add_parser("send", help="Send image to receiver.")
+    p_send = sub.add_parser("send", help="Send an image (--file) or a directory of images (--dir) to receiver.")
     p_send.add_argument("--host", default=DEFAULT_HOST)
     p_send.add_argument("--port", type=int, default=DEFAULT_PORT)
-    p_send.add_argument("--file", required=True)
+    source = p_send.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file")
+    source.add_argument("--dir", help="Send every image in the directory (see --glob, --recursive).")
+    p_send.add_argument("--glob", default="*", help="File name pattern for --dir.")
+    p_send.add_argument("--recursive", action="store_true", help="Include subdirectories with --dir.")
+    p_send.add_argument("--jobs", type=int, default=BULK_JOBS,
+                        help="Parallel connections with --dir (each reuses one session for many files).")
+    p_send.add_argument("--retries", type=int, default=BULK_RETRIES, help="Retries per file with --dir.")
+    p_send.add_argument("--verify", choices=VERIFY_LEVELS, default=DEFAULT_VERIFY_LEVEL,
+                        help="Verification level to request from the receiver.")
+    p_send.add_argument("--resume", action="store_true",
+                        help="Resumable upload: reconnect after a drop and send only the missing chunks.")
+    p_send.add_argument("--dedup", action="store_true",
+                        help="Ask the receiver whether it already has the file before sending it.")
+    p_send.add_argument("--cdc", action="store_true",
+                        help="Send only content-defined chunks the receiver does not have yet.")
+    p_send.add_argument("--stripes", type=int, default=STRIPES,
+                        help="Send large files over N parallel connections (disjoint byte ranges).")
+    p_send.add_argument("--stripe-size", type=int, default=STRIPE_RANGE_SIZE,
+                        help="Byte range per stripe request with --stripes.")
+    p_send.add_argument("--compress", choices=[COMPRESS_NONE, COMPRESS_AUTO, *CODECS], default=COMPRESS_NONE,
+                        help="Compress the body on the fly; 'auto' picks by format and a quick probe (BMP/TIFF/raw PNG).")
+    p_send.add_argument("--wire-version", type=int, choices=SUPPORTED_VERSIONS, default=WIRE_VERSION,
+                        help="Header framing: 1 = JSON + blank line (any receiver), 2 = binary length-prefixed preamble "
+                             "(receivers that understand it).")
 
     args = parser.parse_args(argv)
 
     if args.cmd == "recv":
-        srv = ReceiverServer(host=args.host, port=args.port, output_dir=args.out)
-        result = srv.serve_once()
-        print("RECEIVED OK:")
-        print(result)
-        return 0
+        pool = None
+        if args.verify_procs > 0:
+            from .verify_pool import VerifyPool
+            pool = VerifyPool(args.verify_procs, timeout=args.verify_timeout)
+        index = chunks = metrics = None
+        Path(args.out).mkdir(parents=True, exist_ok=True)
+        if args.dedup:
+            from .dedup import DigestIndex
+            index = DigestIndex.in_dir(args.out)
+        if args.cdc:
+            from .cdc import ChunkStore
+            chunks = ChunkStore.in_dir(args.out)
+        if args.metrics:
+            from .metrics import sink_for_path
+            metrics = sink_for_path(args.metrics)
+        try:
+            return _recv(args, pool, index, chunks, metrics)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            for store in (index, chunks, metrics):
+                if store is not None:
+                    store.close()
 
     if args.cmd == "send":
-        s = Sender(host=args.host, port=args.port)
+        from .sender import Sender
+
+        s = Sender(host=args.host, port=args.port, verify=args.verify, resume=args.resume, dedup=args.dedup, cdc=args.cdc,
+                   compression=args.compress, stripes=args.stripes, stripe_range_size=args.stripe_size,
+                   wire_version=args.wire_version)
+        if args.dir is not None:
+            return _send_dir(args, s)
         header = s.send_image(args.file)
         print("SENT OK:")
         print(header)
@@ -38,5 +106,39 @@ def main(argv=None) -> int:
 
     return 1
 
+def _recv(args, pool, index, chunks, metrics) -> int:
+    from .receiver import ReceiverServer
+
+    srv = ReceiverServer(host=args.host, port=args.port, output_dir=args.out, max_workers=args.workers,
+                         verify_pool=pool, verify_level=args.verify, dedup_index=index, chunk_store=chunks,
+                         metrics=metrics)
+    if args.serve:
+        print(f"SERVING on {args.host}:{args.port} (workers={args.workers}), Ctrl+C to stop")
+        try:
+            srv.serve_forever(
+                on_result=lambda r: print(f"RECEIVED OK: {r}", flush=True),
+                on_error=lambda e: print(f"RECEIVE FAILED: {e!r}", file=sys.stderr, flush=True),
+            )
+        except KeyboardInterrupt:
+            pass
+        return 0
+    result = srv.serve_once()
+    print("RECEIVED OK:")
+    print(result)
+    return 0
+
+def _send_dir(args, sender) -> int:
+    from .bulk import BulkSender, find_images
+
+    paths = find_images(args.dir, args.glob, recursive=args.recursive)
+    bulk = BulkSender(sender, jobs=args.jobs, retries=args.retries,
+                      on_file=lambda o: None if o.ok else print(f"SEND FAILED: {o.path}: {o.error}",
+                                                                file=sys.stderr, flush=True))
+    summary = bulk.send_all(paths)
+    print(f"SENT {summary.sent}/{summary.files} files, {summary.bytes_sent / 1e6:.1f} MB "
+          f"in {summary.elapsed:.2f} s: {summary.files_per_sec:.1f} files/s, {summary.mb_per_sec:.1f} MB/s, "
+          f"{len(summary.failed)} failed")
+    return 1 if summary.failed else 0
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import lzma
+import socket
+import struct
+import zlib
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .buffers import recv_exact
+from .config import COMPRESS_BLOCK_SIZE, COMPRESS_MAX_BLOCK
+from .exceptions import ProtocolError
+from .protocol import Digest
+
+try:  # Python 3.14+
+    from compression import zstd as _zstd
+except ImportError:
+    _zstd = None
+try:
+    import zstandard as _zstandard
+except ImportError:
+    _zstandard = None
+
+# Стиснення тіла домовляється в заголовку: sender пропонує кодеки ("compress": [...]),
+# receiver обирає перший, який підтримує, у відповіді до тіла ("encoding").
+# Тіло — кадри: 4 байти довжини + незалежно стиснутий блок; receiver розпаковує,
+# поки не набере size_bytes. sha256 у заголовку — завжди від оригінальних байтів.
+
+FRAME = struct.Struct(">I")
+_MAX_FRAME = COMPRESS_MAX_BLOCK + COMPRESS_MAX_BLOCK // 8 + 4096   # нестисливий блок трохи росте
+
+# формати, що вже стиснуті ентропійно: стиснення лише витратить CPU
+ALREADY_COMPRESSED = frozenset({"JPEG", "MPO", "WEBP", "GIF", "JPEG2000", "HEIF", "AVIF"})
+PROBE_SAMPLE = 64 * 1024
+PROBE_RATIO = 0.85   # стискати, лише якщо проба дала хоча б -15%
+
+COMPRESS_NONE = "none"
+COMPRESS_AUTO = "auto"
+
+
+def _decompress_limited(make: Callable[[], object], data: bytes, limit: int) -> bytes:
+    d = make()
+    out = d.decompress(data, limit + 1)
+    if len(out) > limit or not d.eof:
+        raise ProtocolError("Compressed frame is truncated or expands beyond the block limit")
+    return out
+
+
+def _zstd_codec():
+    if _zstd is not None:
+        return (lambda b: _zstd.compress(b, 3),
+                lambda data, limit: _decompress_limited(_zstd.ZstdDecompressor, data, limit))
+    if _zstandard is not None:
+        cctx = _zstandard.ZstdCompressor(level=3)
+        def decompress(data: bytes, limit: int) -> bytes:
+            return _zstandard.ZstdDecompressor().decompress(data, max_output_size=limit)
+        return cctx.compress, decompress
+    return None
+
+
+_CODEC_ERRORS = (zlib.error, lzma.LZMAError, ValueError)
+if _zstd is not None:
+    _CODEC_ERRORS += (_zstd.ZstdError,)
+if _zstandard is not None:
+    _CODEC_ERRORS += (_zstandard.ZstdError,)
+
+# назва -> (compress(block), decompress(frame, limit)); порядок — пріоритет для "auto"
+CODECS: Dict[str, tuple] = {}
+if (_z := _zstd_codec()) is not None:
+    CODECS["zstd"] = _z
+CODECS["zlib"] = (lambda b: zlib.compress(b, 6),
+                  lambda data, limit: _decompress_limited(zlib.decompressobj, data, limit))
+CODECS["lzma"] = (lambda b: lzma.compress(b, preset=1),
+                  lambda data, limit: _decompress_limited(lzma.LZMADecompressor, data, limit))
+# lzma стискає краще, але повільно — лише на явний запит
+AUTO_CODECS = [name for name in CODECS if name != "lzma"]
+
+
+def check_compression(mode: str) -> str:
+    if mode not in (COMPRESS_NONE, COMPRESS_AUTO) and mode not in CODECS:
+        raise ValueError(f"Unsupported compression {mode!r}, available: none, auto, {', '.join(CODECS)}")
+    return mode
+
+
+def probe_ratio(buf) -> float:
+    """Швидка оцінка стисливості: zlib рівня 1 на шматках з початку, середини і кінця."""
+    n = len(buf)
+    if n <= 3 * PROBE_SAMPLE:
+        samples = [bytes(buf)]
+    else:
+        samples = [buf[off:off + PROBE_SAMPLE] for off in (0, n // 2, n - PROBE_SAMPLE)]
+    raw = sum(len(s) for s in samples)
+    packed = sum(len(zlib.compress(s, 1)) for s in samples)
+    return packed / max(1, raw)
+
+
+def compression_offers(mode: str, fmt: str, buf) -> List[str]:
+    """Кодеки для "compress" у заголовку (порожньо — тіло йде як є)."""
+    if mode == COMPRESS_NONE or not len(buf):
+        return []
+    if mode != COMPRESS_AUTO:
+        return [mode]
+    if fmt.upper() in ALREADY_COMPRESSED or probe_ratio(buf) > PROBE_RATIO:
+        return []
+    return list(AUTO_CODECS)
+
+
+def pick_encoding(offers: Sequence[str], accepted: Sequence[str]) -> Optional[str]:
+    for name in offers:
+        if name in accepted and name in CODECS:
+            return name
+    return None
+
+
+def send_compressed(sock: socket.socket, f: BinaryIO, encoding: str, block_size: int = COMPRESS_BLOCK_SIZE) -> int:
+    """Стиснути й відправити файл блоками на льоту. Повертає кількість байтів у мережі."""
+    compress = CODECS[encoding][0]
+    wire = 0
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return wire
+        packed = compress(block)
+        sock.sendall(FRAME.pack(len(packed)))
+        sock.sendall(packed)
+        wire += FRAME.size + len(packed)
+
+
+def recv_compressed_to_file(sock: socket.socket, total_bytes: int, f: BinaryIO, encoding: str,
+                            digest: Optional[Digest] = None) -> Tuple[int, int]:
+    """
+    Приймати кадри і розпаковувати у файл, доки не набереться total_bytes.
+    Повертає (записані розпаковані байти, прочитані з мережі байти); записаних менше
+    за total_bytes — лише якщо peer закрив з'єднання.
+    """
+    if encoding not in CODECS:
+        raise ProtocolError(f"Unsupported encoding: {encoding!r}")
+    decompress = CODECS[encoding][1]
+    written = wire = 0
+    while written < total_bytes:
+        try:
+            (n,) = FRAME.unpack(recv_exact(sock, FRAME.size))
+            if n > _MAX_FRAME:
+                raise ProtocolError("Compressed frame too large")
+            packed = recv_exact(sock, n)
+        except ConnectionError:
+            break
+        wire += FRAME.size + n
+        try:
+            block = decompress(bytes(packed), min(COMPRESS_MAX_BLOCK, total_bytes - written))
+        except _CODEC_ERRORS as e:
+            # битий кадр — потік розсинхронізовано, сесію далі не продовжити
+            raise ProtocolError(f"Cannot decode {encoding} frame: {e}") from e
+        f.write(block)
+        if digest is not None:
+            digest.update(block)
+        written += len(block)
+    return written, wire
@@ -3,4 +3,61 @@ DEFAULT_PORT = 5000
 CHUNK_SIZE = 64 * 1024  # 64 KB
 HEADER_MAX_BYTES = 64 * 1024  # 64 KB
 DELIMITER = b"\n\n"
-VERSION = 1
+# 1 — JSON-заголовок + DELIMITER; 2 — бінарна преамбула з довжинами (protocol.encode_message).
+# Receiver розуміє обидва. Sender за замовчуванням шле WIRE_VERSION = 1: receiver, що не знає v2,
+# мовчки відкидає такий кадр, а узгодження версії ще немає — v2 лише явно (wire_version=2)
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+WIRE_VERSION = 1
+
+# serve_forever: один слухаючий сокет + обмежений пул потоків
+MAX_WORKERS = 8
+LISTEN_BACKLOG = 128
+ACCEPT_POLL_SEC = 0.5
+CLIENT_TIMEOUT_SEC = 30.0
+
+# перевірка зображень у пулі процесів (0 процесів = у потоці з'єднання)
+VERIFY_PROCESSES = 0
+VERIFY_TIMEOUT_SEC = 60.0
+
+# resumable transfers: розмір шматка маніфесту і скільки разів sender перепідключається
+RESUME_CHUNK_SIZE = 4 * 1024 * 1024
+RESUME_MAX_CHUNKS = 512      # маніфест має влазити в HEADER_MAX_BYTES
+RESUME_RETRIES = 5
+RESUME_BACKOFF_SEC = 0.5
+# connect і кожна операція з сокетом resumable передачі; завислий receiver -> нова спроба.
+# Більше за VERIFY_TIMEOUT_SEC: підсумкову відповідь receiver дає лише після перевірки
+RESUME_TIMEOUT_SEC = 120.0
+# недокачаний .part (і запис прогресу), який не змінювався довше за це, receiver прибирає;
+# перевірка — на старті і не частіше за RESUME_SWEEP_SEC при запитах на resume
+RESUME_STALE_SEC = 24 * 3600.0
+RESUME_SWEEP_SEC = 600.0
+
+# content-defined chunking (gear hash): межі шматків залежать від вмісту, не від зсуву
+CDC_MIN_SIZE = 2 * 1024
+CDC_AVG_SIZE = 8 * 1024      # степінь двійки
+CDC_MAX_SIZE = 64 * 1024
+# межа receiver-а на список шматків (36 байтів на запис, ~36 MB): не залежить від size_bytes із заголовка
+CDC_MAX_CHUNKS = 1024 * 1024
+
+# стиснення тіла: незалежні блоки по COMPRESS_BLOCK_SIZE відкритих байтів, кожен у кадрі з довжиною
+COMPRESS_BLOCK_SIZE = 1024 * 1024
+COMPRESS_MAX_BLOCK = 4 * 1024 * 1024   # межа для receiver-а: більший блок — помилка (захист від "бомб")
+
+# striped transfer: кілька з'єднань шлють різні діапазони одного файлу (1 = вимкнено)
+STRIPES = 1
+STRIPE_RANGE_SIZE = 8 * 1024 * 1024
+STRIPE_IDLE_SEC = 300.0      # недокачаний striped-файл без активності прибирається receiver-ом
+# межі для receiver-а (заголовок не автентифікований): перевіряються до виділення пам'яті й диска
+STRIPE_MIN_RANGE_SIZE = CHUNK_SIZE
+STRIPE_MAX_RANGES = 65536
+STRIPE_MAX_FILE_SIZE = 64 * 1024 ** 3
+STRIPE_MAX_ACTIVE = 16                      # одночасних striped передач на receiver
+STRIPE_MAX_RESERVED = 64 * 1024 ** 3        # сумарно виділеного під них місця на диску
+
+# progress-колбеки: sendfile іде шматками такого розміру, щоб між ними повідомити про прогрес
+PROGRESS_STEP = 1024 * 1024
+
+# bulk: imgtx send --dir — кількість паралельних з'єднань і повторів на файл
+BULK_JOBS = 4
+BULK_RETRIES = 2
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import sqlite3
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from .receiver import ReceiveResult
+
+INDEX_FILENAME = ".imgtx-index.sqlite"
+
+
+class DigestIndex:
+    """
+    Постійний індекс sha256 -> збережений файл (+ метадані перевірки) для дедуплікації.
+    Запис вважається живим, лише поки файл існує і має той самий розмір.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS blobs ("
+                         "sha256 TEXT PRIMARY KEY, saved_path TEXT NOT NULL, size INTEGER NOT NULL, "
+                         "pixel_fp TEXT, width INTEGER, height INTEGER, format TEXT, verify TEXT)")
+
+    @classmethod
+    def in_dir(cls, output_dir: str | Path) -> "DigestIndex":
+        return cls(Path(output_dir) / INDEX_FILENAME)
+
+    def lookup(self, sha256: str) -> Optional[ReceiveResult]:
+        sha256 = sha256.lower()
+        with self._lock:
+            row = self._db.execute("SELECT saved_path, size, pixel_fp, width, height, format, verify "
+                                   "FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is None:
+            return None
+        saved_path, size, pixel_fp, width, height, fmt, verify = row
+        try:
+            alive = Path(saved_path).stat().st_size == size
+        except OSError:
+            alive = False
+        if not alive:
+            self.remove(sha256)
+            return None
+        return ReceiveResult(saved_path=saved_path, sha256=sha256, pixel_fp=pixel_fp or "",
+                             width=width, height=height, format=fmt, verify=verify)
+
+    def add(self, result: ReceiveResult) -> None:
+        row = asdict(result)
+        row["size"] = Path(result.saved_path).stat().st_size
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO blobs VALUES "
+                             "(:sha256, :saved_path, :size, :pixel_fp, :width, :height, :format, :verify)", row)
+
+    def remove(self, sha256: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256.lower(),))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
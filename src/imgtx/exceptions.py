@@ -6,3 +6,11 @@ class IntegrityError(Exception):
 
 class InvalidImageError(Exception):
     pass
+
+class ConnectionClosed(ProtocolError, ConnectionError):
+    """Peer closed the connection cleanly before the next header (end of a session)."""
+    pass
+
+class VerificationTimeout(InvalidImageError):
+    """Image verification did not finish in time (pathological or hostile image)."""
+    pass
@@ -1,24 +1,108 @@
 # src/imgtx/gui.py
 from __future__ import annotations
 
+import queue
 import threading
+import time
 import tkinter as tk
+from dataclasses import dataclass
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
 
 from .live_tests import sender_preflight, receiver_postflight, TestResult
-
-from .sender import Sender
-from .receiver import ReceiverServer
 from .config import DEFAULT_HOST, DEFAULT_PORT
 
-from .secure_sender import SecureSender
-from .secure_receiver import (
-    SecureReceiverServer,
-    ReplayDetected,
-    TimestampOutOfWindow,
-    DecryptFailed,
-)
+# sender/receiver імпортуються при першій передачі, secure-модулі (cryptography) — лише в secure-режимі:
+# вікно з'являється без очікування на Pillow і cryptography
+if TYPE_CHECKING:
+    from .receiver import ReceiverServer
+    from .secure_receiver import SecureReceiverServer
+
+# Tk не потокобезпечний: потоки передач лише кладуть події в чергу, а UI-потік
+# забирає їх раз на UI_REFRESH_MS і застосовує пачкою (не більше UI_MAX_BATCH за тік)
+UI_REFRESH_MS = 100
+UI_MAX_BATCH = 500
+TABLE_MAX_ROWS = 1000     # старші рядки таблиці видаляються
+LOG_MAX_LINES = 2000
+PROGRESS_LINGER_MS = 3000  # скільки ще видно завершену передачу
+RATE_SMOOTHING = 0.5       # вага нового виміру в MB/s (експоненційне згладжування)
+
+
+@dataclass(frozen=True)
+class TransferStatus:
+    key: str
+    done: int
+    total: int
+    mb_per_s: float
+
+    @property
+    def finished(self) -> bool:
+        return self.done >= self.total
+
+
+class ProgressTracker:
+    """
+    Прогрес передач від колбеків потоків передачі. update() лише запам'ятовує останнє значення,
+    тож скільки б колбеків не прийшло між тіками UI, drain() повертає по одному стану на передачу.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Tuple[int, int]] = {}
+        self._started: Dict[str, float] = {}
+        # key -> (час, байти, MB/s) на попередньому drain()
+        self._last: Dict[str, Tuple[float, int, float]] = {}
+
+    def update(self, key: str, done: int, total: int) -> None:
+        with self._lock:
+            self._latest[key] = (done, total)
+            self._started.setdefault(key, self._clock())
+
+    def drain(self) -> List[TransferStatus]:
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            started = {key: self._started[key] for key in latest}
+            for key, (done, total) in latest.items():
+                if done >= total:
+                    del self._started[key]   # та сама назва далі — нова передача
+        now = self._clock()
+        out = []
+        for key, (done, total) in latest.items():
+            t0, done0, rate = self._last.get(key, (started[key], 0, -1.0))
+            if done < done0:
+                t0, done0, rate = started[key], 0, -1.0
+            dt = now - t0
+            if dt > 0:
+                sample = (done - done0) / dt / 1e6
+                rate = sample if rate < 0 else RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * rate
+            out.append(TransferStatus(key, done, total, max(rate, 0.0)))
+            if done >= total:
+                self._last.pop(key, None)
+            else:
+                self._last[key] = (now, done, rate)
+        return out
+
+
+class _TransferBar:
+    """Рядок прогресу однієї передачі: назва, смуга, MB/s."""
+
+    def __init__(self, parent: tk.Widget, key: str):
+        self.finished = False
+        self.frame = tk.Frame(parent)
+        self.frame.pack(fill="x")
+        tk.Label(self.frame, text=key, width=40, anchor="w").pack(side="left")
+        self.bar = ttk.Progressbar(self.frame, length=360, mode="determinate")
+        self.bar.pack(side="left", padx=6)
+        self.rate = tk.Label(self.frame, width=32, anchor="w")
+        self.rate.pack(side="left")
+
+    def show(self, st: TransferStatus) -> None:
+        self.finished = st.finished
+        self.bar.configure(maximum=max(st.total, 1), value=st.done)
+        state = "done" if st.finished else f"{st.mb_per_s:.1f} MB/s"
+        self.rate.configure(text=f"{st.done / 1e6:.1f} / {st.total / 1e6:.1f} MB  {state}")
 
 
 class App(tk.Tk):
@@ -30,6 +114,11 @@ class App(tk.Tk):
         self.expected_meta: dict[str, object] | None = None
         self.stop_flag = threading.Event()
         self.recv_thread: threading.Thread | None = None
+        self.server: ReceiverServer | SecureReceiverServer | None = None
+        # події з потоків передач: ("row", values) / ("log", str) / ("clear", None) / ("call", fn)
+        self._events: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self.progress = ProgressTracker()
+        self._bars: Dict[str, _TransferBar] = {}
 
         # ---- Controls
         top = tk.Frame(self)
@@ -74,6 +163,11 @@ class App(tk.Tk):
         self.chk_secure = tk.Checkbutton(top, text="Secure mode", variable=self.secure_enabled)
         self.chk_secure.grid(row=1, column=2, columnspan=2, sticky="w", pady=(6, 0))
 
+        # ---- Active transfers (progress + MB/s)
+        tk.Label(self, text="Transfers:").pack(anchor="w", padx=10)
+        self.transfers = tk.Frame(self)
+        self.transfers.pack(fill="x", padx=10)
+
         # ---- Table of test results
         tk.Label(self, text="Live test results (during transfer):").pack(anchor="w", padx=10)
 
@@ -92,14 +186,83 @@ class App(tk.Tk):
         self.log.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
         self._log("Ready.")
+        self.after(UI_REFRESH_MS, self._drain_events)
+
+    # ---- _log/_call/_clear_table/_add_results і progress-колбеки можна викликати з будь-якого потоку
 
     def _log(self, msg: str):
-        self.log.insert(tk.END, msg + "\n")
-        self.log.see(tk.END)
+        self._events.put(("log", msg))
+
+    def _call(self, fn: Callable[[], object]):
+        """Виконати fn в UI-потоці (у порядку з рештою подій)."""
+        self._events.put(("call", fn))
 
     def _clear_table(self):
-        for item in self.table.get_children():
-            self.table.delete(item)
+        self._events.put(("clear", None))
+
+    def _send_progress(self, name: str, done: int, total: int):
+        self.progress.update(f"SEND: {name}", done, total)
+
+    def _recv_progress(self, name: str, done: int, total: int):
+        self.progress.update(f"RECV: {name}", done, total)
+
+    # ---- UI-потік
+
+    def _drain_events(self):
+        rows: list[tuple] = []
+        lines: list[str] = []
+        for _ in range(UI_MAX_BATCH):
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "row":
+                rows.append(payload)
+            elif kind == "log":
+                lines.append(payload)
+            else:
+                # clear/call мають бачити все, що прийшло раніше
+                self._flush(rows, lines)
+                rows, lines = [], []
+                if kind == "clear":
+                    children = self.table.get_children()
+                    if children:
+                        self.table.delete(*children)
+                else:
+                    payload()
+        self._flush(rows, lines)
+        self._show_progress(self.progress.drain())
+        self.after(UI_REFRESH_MS, self._drain_events)
+
+    def _flush(self, rows: list[tuple], lines: list[str]):
+        if rows:
+            for values in rows[-TABLE_MAX_ROWS:]:
+                last = self.table.insert("", "end", values=values)
+            children = self.table.get_children()
+            if len(children) > TABLE_MAX_ROWS:
+                self.table.delete(*children[:len(children) - TABLE_MAX_ROWS])
+            self.table.see(last)
+        if lines:
+            self.log.insert(tk.END, "\n".join(lines) + "\n")
+            count = int(self.log.index("end-1c").split(".")[0]) - 1
+            if count > LOG_MAX_LINES:
+                self.log.delete("1.0", f"{count - LOG_MAX_LINES + 1}.0")
+            self.log.see(tk.END)
+
+    def _show_progress(self, statuses: List[TransferStatus]):
+        for st in statuses:
+            bar = self._bars.get(st.key)
+            if bar is None:
+                bar = self._bars[st.key] = _TransferBar(self.transfers, st.key)
+            bar.show(st)
+            if st.finished:
+                self.after(PROGRESS_LINGER_MS, self._drop_bar, st.key, bar)
+
+    def _drop_bar(self, key: str, bar: _TransferBar):
+        # за цей час під тим самим ключем могла початися нова передача
+        if bar.finished and self._bars.get(key) is bar:
+            del self._bars[key]
+            bar.frame.destroy()
 
     def clean_table(self):
         self._clear_table()
@@ -108,7 +271,7 @@ class App(tk.Tk):
     def _add_results(self, results: list[TestResult], prefix: str = ""):
         for r in results:
             name = f"{prefix}{r.name}" if prefix else r.name
-            self.table.insert("", "end", values=(name, "✅" if r.ok else "❌", r.details))
+            self._events.put(("row", (name, "✅" if r.ok else "❌", r.details)))
 
     def _add_one(self, name: str, ok: bool, details: str, prefix: str = ""):
         self._add_results([TestResult(name=name, ok=ok, details=details)], prefix=prefix)
@@ -128,67 +291,77 @@ class App(tk.Tk):
         self.btn_stop.config(state="normal")
         self._log(f"[RECV] starting on {host}:{port}, out={outdir} secure={self.secure_enabled.get()}")
 
+        if self.secure_enabled.get():
+            pwd = self.password.get()
+            if not pwd:
+                self._log("[RECV] ERROR: Secure mode enabled but password is empty")
+                self._add_one("CRYPTO: decrypt", False, "password empty", prefix="POST: ")
+                self.btn_start.config(state="normal")
+                self.btn_stop.config(state="disabled")
+                return
+            from .secure_receiver import SecureReceiverServer
+            srv = SecureReceiverServer(host=host, port=port, output_dir=str(outdir), password=pwd,
+                                       progress=self._recv_progress)
+            secure = True
+        else:
+            from .receiver import ReceiverServer
+            srv = ReceiverServer(host=host, port=port, output_dir=str(outdir), progress=self._recv_progress)
+            secure = False
+        self.server = srv
+
+        def on_result(res):
+            saved_path = getattr(res, "saved_path", None) or str(res)
+            if secure:
+                # ✅ crypto tests for secure mode
+                self._add_one("CRYPTO: decrypt", True, "AES-GCM tag OK", prefix="POST: ")
+                self._add_one("CRYPTO: replay protection", True, "session accepted", prefix="POST: ")
+
+            self._log(f"[RECV] got file: {saved_path}")
+
+            # ---- POSTFLIGHT tests for saved file
+            post = receiver_postflight(saved_path, expected=self.expected_meta or {})
+            self._add_results(post, prefix="POST: ")
+
+        def on_error(e: BaseException):
+            if not (secure and self._report_secure_error(e)):
+                self._log(f"[RECV] ERROR: {e}")
+
         def loop():
-            while not self.stop_flag.is_set():
-                try:
-                    if self.secure_enabled.get():
-                        pwd = self.password.get()
-                        if not pwd:
-                            self._log("[RECV] ERROR: Secure mode enabled but password is empty")
-                            self._add_one("CRYPTO: decrypt", False, "password empty", prefix="POST: ")
-                            break
-
-                        srv = SecureReceiverServer(host=host, port=port, output_dir=str(outdir), password=pwd)
-
-                        try:
-                            saved_path = srv.serve_once()
-
-                            # ✅ crypto tests for secure mode
-                            self._add_one("CRYPTO: decrypt", True, "AES-GCM tag OK", prefix="POST: ")
-                            self._add_one("CRYPTO: replay protection", True, "session accepted", prefix="POST: ")
-
-                        except ReplayDetected:
-                            self._log("[RECV] REPLAY_DETECTED")
-                            self._add_one("CRYPTO: replay protection", False, "REPLAY_DETECTED", prefix="POST: ")
-                            continue
-
-                        except TimestampOutOfWindow:
-                            self._log("[RECV] TIMESTAMP_OUT_OF_WINDOW")
-                            self._add_one("CRYPTO: replay protection", False, "TIMESTAMP_OUT_OF_WINDOW", prefix="POST: ")
-                            continue
-
-                        except DecryptFailed:
-                            self._log("[RECV] DECRYPT_FAILED (wrong password or corrupted data)")
-                            self._add_one("CRYPTO: decrypt", False, "DECRYPT_FAILED (wrong password or corrupted data)", prefix="POST: ")
-                            self._add_one("CRYPTO: replay protection", True, "session accepted (before decrypt)", prefix="POST: ")
-                            continue
-
-                    else:
-                        srv = ReceiverServer(host=host, port=port, output_dir=str(outdir))
-                        res = srv.serve_once()
-                        saved_path = getattr(res, "saved_path", None) or str(res)
-
-                    self._log(f"[RECV] got file: {saved_path}")
-
-                    # ---- POSTFLIGHT tests for saved file
-                    post = receiver_postflight(saved_path, expected=self.expected_meta or {})
-                    self._add_results(post, prefix="POST: ")
-
-                except Exception as e:
-                    if self.stop_flag.is_set():
-                        break
-                    self._log(f"[RECV] ERROR: {e}")
+            # один слухаючий сокет на весь час роботи, без rebind між зображеннями
+            try:
+                srv.serve_forever(on_result=on_result, on_error=on_error)
+            except Exception as e:
+                self._log(f"[RECV] ERROR: {e}")
 
             self._log("[RECV] stopped")
-            self.btn_start.config(state="normal")
-            self.btn_stop.config(state="disabled")
+            self._call(lambda: (self.btn_start.config(state="normal"), self.btn_stop.config(state="disabled")))
 
         self.recv_thread = threading.Thread(target=loop, daemon=True)
         self.recv_thread.start()
 
+    def _report_secure_error(self, e: BaseException) -> bool:
+        """Помилки secure receiver-а — рядками CRYPTO у таблиці. False, якщо це інша помилка."""
+        from .secure_receiver import ReplayDetected, TimestampOutOfWindow, DecryptFailed
+
+        if isinstance(e, ReplayDetected):
+            self._log("[RECV] REPLAY_DETECTED")
+            self._add_one("CRYPTO: replay protection", False, "REPLAY_DETECTED", prefix="POST: ")
+        elif isinstance(e, TimestampOutOfWindow):
+            self._log("[RECV] TIMESTAMP_OUT_OF_WINDOW")
+            self._add_one("CRYPTO: replay protection", False, "TIMESTAMP_OUT_OF_WINDOW", prefix="POST: ")
+        elif isinstance(e, DecryptFailed):
+            self._log("[RECV] DECRYPT_FAILED (wrong password or corrupted data)")
+            self._add_one("CRYPTO: decrypt", False, "DECRYPT_FAILED (wrong password or corrupted data)", prefix="POST: ")
+            self._add_one("CRYPTO: replay protection", True, "session accepted (before decrypt)", prefix="POST: ")
+        else:
+            return False
+        return True
+
     def stop_receiver(self):
         self.stop_flag.set()
-        self._log("[RECV] stop requested (may stop after current accept)")
+        if self.server is not None:
+            self.server.shutdown(timeout=0)
+        self._log("[RECV] stop requested (active transfers will finish)")
 
     def choose_and_send(self):
         path = filedialog.askopenfilename(
@@ -221,10 +394,12 @@ class App(tk.Tk):
                     if not pwd:
                         self._log("[SEND] ERROR: Secure mode enabled but password is empty")
                         return
-                    s = SecureSender(host=host, port=port, password=pwd)
+                    from .secure_sender import SecureSender
+                    s = SecureSender(host=host, port=port, password=pwd, progress=self._send_progress)
                     s.send_image(path)
                 else:
-                    s = Sender(host=host, port=port)
+                    from .sender import Sender
+                    s = Sender(host=host, port=port, progress=self._send_progress)
                     s.send_image(path)
                 self._log("[SEND] done")
             except Exception as e:
@@ -283,10 +458,12 @@ class App(tk.Tk):
                     if not pwd:
                         self._log("[BAD SEND] ERROR: Secure mode enabled but password is empty")
                         return
-                    s = SecureSender(host=host, port=port, password=pwd)
+                    from .secure_sender import SecureSender
+                    s = SecureSender(host=host, port=port, password=pwd, progress=self._send_progress)
                     s.send_image(tmp_path)
                 else:
-                    s = Sender(host=host, port=port)
+                    from .sender import Sender
+                    s = Sender(host=host, port=port, progress=self._send_progress)
                     s.send_image(tmp_path)
                 self._log("[BAD SEND] done")
             except Exception as e:
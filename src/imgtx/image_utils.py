@@ -1,11 +1,17 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from PIL import Image, UnidentifiedImageError
+from typing import BinaryIO, Union
 import hashlib
 
 from .exceptions import InvalidImageError
 
+# Pillow імпортується всередині функцій: CLI і receiver стартують без нього,
+# а вантажиться він при першому зображенні, яке справді треба відкрити.
+
+# шлях до файлу або вже відкритий seekable потік (напр. mmap з preflight)
+ImageSource = Union[str, Path, BinaryIO]
+
 @dataclass(frozen=True)
 class ImageInfo:
     format: str
@@ -13,36 +19,108 @@ class ImageInfo:
     height: int
     mode: str
 
-def validate_image(path: str | Path) -> ImageInfo:
-    p = Path(path)
+def _open_source(src: ImageSource):
+    if isinstance(src, (str, Path)):
+        return Path(src)
+    src.seek(0)
+    return src
+
+def _source_name(src: ImageSource, name: str | None) -> str:
+    if name:
+        return name
+    if isinstance(src, (str, Path)):
+        return Path(src).name
+    return str(getattr(src, "name", "<buffer>"))
+
+def validate_image(path: ImageSource, name: str | None = None) -> ImageInfo:
+    from PIL import Image, UnidentifiedImageError
+    name = _source_name(path, name)
     try:
         # verify() перевіряє структуру, але після нього треба відкривати повторно
-        with Image.open(p) as img:
+        with Image.open(_open_source(path)) as img:
             img.verify()
 
-        with Image.open(p) as img2:
+        with Image.open(_open_source(path)) as img2:
             fmt = (img2.format or "").upper()
             w, h = img2.size
             mode = img2.mode
     except (UnidentifiedImageError, OSError) as e:
-        raise InvalidImageError(f"File is not a valid image: {p.name}. Reason: {e}") from e
+        raise InvalidImageError(f"File is not a valid image: {name}. Reason: {e}") from e
 
     if not fmt:
-        raise InvalidImageError(f"Cannot determine image format for: {p.name}")
+        raise InvalidImageError(f"Cannot determine image format for: {name}")
 
     return ImageInfo(format=fmt, width=w, height=h, mode=mode)
 
-def pixel_fingerprint(path: str | Path) -> str:
+def probe_image(path: ImageSource, name: str | None = None) -> ImageInfo:
+    """Лише заголовок файлу (формат, розміри, mode) — без verify() і без декодування пікселів."""
+    from PIL import Image, UnidentifiedImageError
+    name = _source_name(path, name)
+    try:
+        with Image.open(_open_source(path)) as img:
+            fmt = (img.format or "").upper()
+            w, h = img.size
+            mode = img.mode
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImageError(f"File is not a valid image: {name}. Reason: {e}") from e
+    return ImageInfo(format=fmt, width=w, height=h, mode=mode)
+
+# скільки байтів RGB конвертується і хешується за раз у pixel_fingerprint
+FINGERPRINT_STRIP_BYTES = 8 * 1024 * 1024
+
+def pixel_fingerprint(path: ImageSource, name: str | None = None, strip_bytes: int = FINGERPRINT_STRIP_BYTES) -> str:
     """
     'Перевірка відображення' на практиці: декодуємо в пікселі і рахуємо sha256 від RGB байтів.
     Якщо файл декодується і піксельні дані ті самі — fingerprint збігається.
+
+    RGB рахується смугами по strip_bytes: digest той самий, що й від convert("RGB").tobytes(),
+    але без повної RGB копії і bytes поверх неї. Саме зображення load() декодує повністю
+    (пам'ять ~ w * h * bands): інкрементне декодування (draft, тайли) змінило б пікселі і digest,
+    тож пік пам'яті тут не обмежений — для великих файлів є reduced_fingerprint.
     """
-    p = Path(path)
+    from PIL import Image, UnidentifiedImageError
+    name = _source_name(path, name)
+    digest = hashlib.sha256()
     try:
-        with Image.open(p) as img:
-            rgb = img.convert("RGB")
-            raw = rgb.tobytes()
+        with Image.open(_open_source(path)) as img:
+            img.load()
+            w, h = img.size
+            rows = max(1, strip_bytes // max(1, w * 3))
+            for top in range(0, h, rows):
+                strip = img.crop((0, top, w, min(h, top + rows)))
+                if strip.mode != "RGB":
+                    strip = strip.convert("RGB")
+                digest.update(strip.tobytes())
+                del strip
     except (UnidentifiedImageError, OSError) as e:
-        raise InvalidImageError(f"Cannot decode image pixels: {p.name}. Reason: {e}") from e
+        raise InvalidImageError(f"Cannot decode image pixels: {name}. Reason: {e}") from e
+
+    return digest.hexdigest()
+
+# більша сторона зменшеного зображення для reduced_fingerprint
+REDUCED_MAX_SIDE = 512
+
+def reduced_fingerprint(path: ImageSource, name: str | None = None, max_side: int = REDUCED_MAX_SIDE) -> str:
+    """
+    Дешевший fingerprint: sha256 від RGB байтів зображення, зменшеного до max_side.
+    JPEG декодується одразу зменшеним (draft: DCT-масштаб 1/2..1/8), інші формати
+    декодуються повністю, але конвертуються/хешуються вже після reduce().
+    Збігається лише з reduced_fingerprint, не з pixel_fingerprint.
+    """
+    from PIL import Image, UnidentifiedImageError
+    name = _source_name(path, name)
+    try:
+        with Image.open(_open_source(path)) as img:
+            w, h = img.size
+            factor = max(1, -(-max(w, h) // max_side))
+            if img.format == "JPEG" and factor > 1:
+                img.draft("RGB", (-(-w // factor), -(-h // factor)))
+            small = img if img.mode in ("RGB", "RGBA", "L", "LA") else img.convert("RGB")
+            factor = max(1, -(-max(small.size) // max_side))
+            if factor > 1:
+                small = small.reduce(factor)
+            raw = small.convert("RGB").tobytes()
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        raise InvalidImageError(f"Cannot decode image pixels: {name}. Reason: {e}") from e
 
     return hashlib.sha256(raw).hexdigest()
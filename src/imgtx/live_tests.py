@@ -20,26 +20,16 @@ def sha256_file(path: Path) -> str:
             h.update(chunk)
     return h.hexdigest()
 
-def sender_preflight(image_path: str) -> tuple[list[TestResult], dict[str, Any]]:
-    """Повертає (результати тестів, метадані для передачі/порівняння)."""
-    p = Path(image_path)
-    results: list[TestResult] = []
-    meta: dict[str, Any] = {"path": str(p)}
+def _check_buffer(p: Path, buf, results: list[TestResult], meta: dict[str, Any]) -> None:
+    from .preflight import as_stream
+    from .image_utils import validate_image
 
-    results.append(TestResult("File exists", p.exists(), str(p)))
-    if not p.exists():
-        return results, meta
+    size = len(buf)
+    results.append(TestResult("Readable + size", True, f"{size} bytes"))
+    meta["size_bytes"] = size
 
     try:
-        size = p.stat().st_size
-        results.append(TestResult("Readable + size", True, f"{size} bytes"))
-        meta["size_bytes"] = size
-    except Exception as e:
-        results.append(TestResult("Readable + size", False, str(e)))
-        return results, meta
-
-    try:
-        digest = sha256_file(p)
+        digest = hashlib.sha256(buf).hexdigest()
         results.append(TestResult("SHA-256 computed", True, digest))
         meta["sha256"] = digest
     except Exception as e:
@@ -47,19 +37,32 @@ def sender_preflight(image_path: str) -> tuple[list[TestResult], dict[str, Any]]
 
     # Pillow validate
     try:
-        from PIL import Image
-        with Image.open(p) as img:
-            img.verify()
-        with Image.open(p) as img:
-            fmt = img.format
-            w, h = img.size
-            mode = img.mode
+        info = validate_image(as_stream(buf), name=p.name)
+        fmt, w, h, mode = info.format, info.width, info.height, info.mode
         results.append(TestResult("PIL open/verify", True, f"{fmt} {w}x{h} mode={mode}",
                                   data={"format": fmt, "w": w, "h": h, "mode": mode}))
         meta.update({"format": fmt, "w": w, "h": h, "mode": mode})
     except Exception as e:
         results.append(TestResult("PIL open/verify", False, str(e)))
 
+def sender_preflight(image_path: str) -> tuple[list[TestResult], dict[str, Any]]:
+    """Повертає (результати тестів, метадані для передачі/порівняння)."""
+    p = Path(image_path)
+    results: list[TestResult] = []
+    meta: dict[str, Any] = {"path": str(p)}
+
+    results.append(TestResult("File exists", p.exists(), str(p)))
+    if not p.exists():
+        return results, meta
+
+    # файл читається один раз (preflight engine), усі перевірки — з того самого буфера
+    from .preflight import MappedFile
+    try:
+        with MappedFile(p) as buf:
+            _check_buffer(p, buf, results, meta)
+    except OSError as e:
+        results.append(TestResult("Readable + size", False, str(e)))
+
     return results, meta
 
 def receiver_postflight(saved_path: str, expected: dict[str, Any] | None = None) -> list[TestResult]:
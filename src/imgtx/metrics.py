@@ -0,0 +1,229 @@
+from __future__ import annotations
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Protocol, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .receiver import ReceiveResult
+
+# межі гістограм тривалостей, секунди (+Inf додається автоматично)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_FLUSH_SEC = 5.0
+
+
+class StageTimer:
+    """Монотонні тривалості стадій однієї передачі: with timer.stage("receive"): ..."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)   # останній — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.bounds) and value > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out, total = [], 0
+        for bound, n in zip([*map(repr, self.bounds), "+Inf"], self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class ReceiverMetrics:
+    """Сукупні лічильники і гістограми довготривалого receiver-а (потокобезпечно)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.transfers = 0
+        self.bytes_received = 0
+        self.bytes_saved = 0
+        self.errors: Dict[str, int] = {}
+        self.transfer_seconds = Histogram(self._buckets)
+        self.stage_seconds: Dict[str, Histogram] = {}
+
+    def record(self, result: "ReceiveResult") -> None:
+        with self._lock:
+            self.transfers += 1
+            self.bytes_received += result.bytes_received
+            self.bytes_saved += result.bytes_saved
+            self.transfer_seconds.observe(sum(result.timings.values()))
+            for stage, seconds in result.timings.items():
+                hist = self.stage_seconds.get(stage)
+                if hist is None:
+                    hist = self.stage_seconds[stage] = Histogram(self._buckets)
+                hist.observe(seconds)
+
+    def record_error(self, exc: BaseException) -> None:
+        with self._lock:
+            name = type(exc).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "transfers": self.transfers,
+                "bytes_received": self.bytes_received,
+                "bytes_saved": self.bytes_saved,
+                "errors": dict(self.errors),
+                "transfer_seconds": _hist_dict(self.transfer_seconds),
+                "stage_seconds": {k: _hist_dict(h) for k, h in sorted(self.stage_seconds.items())},
+            }
+
+    def prometheus_text(self) -> str:
+        """Text exposition format (напр. для textfile collector node_exporter)."""
+        with self._lock:
+            lines = [
+                "# HELP imgtx_transfers_total Images received and stored.",
+                "# TYPE imgtx_transfers_total counter",
+                f"imgtx_transfers_total {self.transfers}",
+                "# HELP imgtx_transfer_errors_total Failed transfers by error type.",
+                "# TYPE imgtx_transfer_errors_total counter",
+                *(f'imgtx_transfer_errors_total{{error="{k}"}} {v}' for k, v in sorted(self.errors.items())),
+                "# HELP imgtx_bytes_received_total Body bytes read from the network.",
+                "# TYPE imgtx_bytes_received_total counter",
+                f"imgtx_bytes_received_total {self.bytes_received}",
+                "# HELP imgtx_bytes_saved_total Bytes not transferred thanks to dedup/cdc.",
+                "# TYPE imgtx_bytes_saved_total counter",
+                f"imgtx_bytes_saved_total {self.bytes_saved}",
+                "# HELP imgtx_transfer_seconds Receiver-side time per image (sum of stages).",
+                "# TYPE imgtx_transfer_seconds histogram",
+                *_hist_lines("imgtx_transfer_seconds", "", self.transfer_seconds),
+                "# HELP imgtx_stage_seconds Receiver-side time per stage.",
+                "# TYPE imgtx_stage_seconds histogram",
+            ]
+            for stage, hist in sorted(self.stage_seconds.items()):
+                lines.extend(_hist_lines("imgtx_stage_seconds", f'stage="{stage}"', hist))
+        return "\n".join(lines) + "\n"
+
+
+def _hist_dict(h: Histogram) -> Dict:
+    return {"count": h.count, "sum": h.sum, "buckets": dict(h.cumulative())}
+
+
+def _hist_lines(name: str, labels: str, h: Histogram) -> List[str]:
+    sep = "," if labels else ""
+    lines = [f'{name}_bucket{{{labels}{sep}le="{le}"}} {n}' for le, n in h.cumulative()]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines += [f"{name}_sum{suffix} {h.sum}", f"{name}_count{suffix} {h.count}"]
+    return lines
+
+
+class MetricsSink(Protocol):
+    """Куди receiver повідомляє про кожну передачу: будь-що з record/record_error/close."""
+
+    def record(self, result: "ReceiveResult") -> None: ...
+
+    def record_error(self, exc: BaseException) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class _FileSink:
+    """Агрегація + запис у файл не частіше ніж раз на flush_sec (і при close)."""
+
+    def __init__(self, path: str | Path, flush_sec: float = METRICS_FLUSH_SEC):
+        self.path = Path(path)
+        self.flush_sec = flush_sec
+        self.metrics = ReceiverMetrics()
+        self._flush_lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def record(self, result: "ReceiveResult") -> None:
+        self.metrics.record(result)
+        self._maybe_flush()
+
+    def record_error(self, exc: BaseException) -> None:
+        self.metrics.record_error(exc)
+        self._maybe_flush()
+
+    def _maybe_flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_sec:
+            return
+        with self._flush_lock:
+            self._last_flush = now
+            self._flush()
+
+    def _flush(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self._maybe_flush(force=True)
+
+
+class PrometheusFileSink(_FileSink):
+    """Сукупні метрики у файлі Prometheus text format; файл замінюється атомарно."""
+
+    def _flush(self) -> None:
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(self.metrics.prometheus_text(), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class JsonLinesSink(_FileSink):
+    """
+    JSON lines: рядок "transfer" / "error" на кожну подію (зі стадіями і байтами)
+    і рядок "snapshot" із сукупними лічильниками та гістограмами при кожному скиданні.
+    """
+
+    def __init__(self, path: str | Path, flush_sec: float = METRICS_FLUSH_SEC):
+        super().__init__(path, flush_sec)
+        self._pending: List[str] = []
+        self._pending_lock = threading.Lock()
+
+    def record(self, result: "ReceiveResult") -> None:
+        self._append({"event": "transfer", "ts": time.time(), "sha256": result.sha256,
+                      "saved_path": result.saved_path, "bytes_received": result.bytes_received,
+                      "bytes_saved": result.bytes_saved, "timings": result.timings})
+        super().record(result)
+
+    def record_error(self, exc: BaseException) -> None:
+        self._append({"event": "error", "ts": time.time(), "error": type(exc).__name__, "message": str(exc)})
+        super().record_error(exc)
+
+    def _append(self, event: Dict) -> None:
+        with self._pending_lock:
+            self._pending.append(json.dumps(event, ensure_ascii=False))
+
+    def _flush(self) -> None:
+        with self._pending_lock:
+            lines, self._pending = self._pending, []
+        lines.append(json.dumps({"event": "snapshot", "ts": time.time(), **self.metrics.snapshot()}))
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def sink_for_path(path: str | Path, flush_sec: float = METRICS_FLUSH_SEC) -> MetricsSink:
+    """.jsonl -> JsonLinesSink, інакше (.prom тощо) -> PrometheusFileSink."""
+    if str(path).endswith((".jsonl", ".ndjson")):
+        return JsonLinesSink(path, flush_sec)
+    return PrometheusFileSink(path, flush_sec)
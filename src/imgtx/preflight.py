@@ -0,0 +1,78 @@
+from __future__ import annotations
+import hashlib
+import io
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from .image_utils import ImageInfo, validate_image
+from .verification import DEFAULT_VERIFY_LEVEL, fingerprint_for_level
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class MappedFile:
+    """
+    Файл, прочитаний ОДИН раз: read-only mmap (або bytes, якщо use_mmap=False / файл порожній).
+    Використовувати як context manager; буфер валідний лише всередині with.
+    """
+
+    def __init__(self, path: str | Path, use_mmap: bool = True):
+        self.path = Path(path)
+        self.use_mmap = use_mmap
+        self._mm: Optional[mmap.mmap] = None
+
+    def __enter__(self) -> Buffer:
+        with self.path.open("rb") as f:
+            if self.use_mmap:
+                try:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    return self._mm
+                except ValueError:
+                    # порожній файл не мапиться
+                    pass
+            return f.read()
+
+    def __exit__(self, *exc) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+@dataclass(frozen=True)
+class PreflightResult:
+    path: str
+    size_bytes: int
+    sha256: str
+    info: ImageInfo
+    pixel_fp: Optional[str] = None
+
+
+def as_stream(buf: Buffer):
+    """Seekable потік над буфером без копіювання (mmap вже вміє read/seek/tell)."""
+    if isinstance(buf, mmap.mmap):
+        buf.seek(0)
+        return buf
+    return io.BytesIO(buf)
+
+
+def preflight_buffer(buf: Buffer, path: str | Path = "<buffer>", fingerprint: bool = True,
+                     level: str = DEFAULT_VERIFY_LEVEL) -> PreflightResult:
+    """
+    Все, що sender-у треба знати про файл, з одного буфера:
+    розмір, sha256, формат/розміри (verify) і, за бажанням, fingerprint рівня level
+    (reduced/full; для sha-only/structure його нема).
+    """
+    digest = hashlib.sha256(buf).hexdigest()
+    name = Path(path).name
+    stream = as_stream(buf)
+    info = validate_image(stream, name=name)
+    px = fingerprint_for_level(stream, level, name=name) if fingerprint else None
+    return PreflightResult(path=str(path), size_bytes=len(buf), sha256=digest, info=info, pixel_fp=px)
+
+
+def preflight_image(path: str | Path, fingerprint: bool = True, use_mmap: bool = True,
+                    level: str = DEFAULT_VERIFY_LEVEL) -> PreflightResult:
+    with MappedFile(path, use_mmap=use_mmap) as buf:
+        return preflight_buffer(buf, path, fingerprint=fingerprint, level=level)
@@ -1,10 +1,50 @@
 from __future__ import annotations
+import hashlib
 import json
+import os
 import socket
-from typing import Dict, Tuple
+import stat
+import struct
+import sys
+from typing import Callable, Dict, NamedTuple, Optional, Protocol, Tuple
+
+from .buffers import find_from, recv_exact, recv_exact_into, recv_into_file
+from .config import DELIMITER, HEADER_MAX_BYTES, CHUNK_SIZE, VERSION, SUPPORTED_VERSIONS, PROGRESS_STEP
+from .exceptions import ProtocolError, ConnectionClosed, IntegrityError, InvalidImageError
+
+# статуси у відповіді receiver-а на кожне зображення в сесії
+STATUS_OK = "ok"
+STATUS_INTEGRITY_ERROR = "integrity_error"
+STATUS_INVALID_IMAGE = "invalid_image"
+# receiver не підтримує щось у заголовку; повторювати той самий запит марно
+STATUS_PROTOCOL_ERROR = "protocol_error"
+# відповідь до тіла на resumable-заголовок: {"status": "resume", "offset": N}
+STATUS_RESUME = "resume"
+# відповіді до тіла на заголовок з "dedup": true — receiver уже має ці байти / надсилай тіло
+STATUS_HAVE = "have"
+STATUS_SEND = "send"
+# відповідь на заголовок з "cdc": true — бітова мапа шматків, яких receiver не має
+STATUS_CHUNKS = "chunks"
+# відповідь на діапазон striped передачі, після якого файл ще не повний: {"status": "stripe", "pending": N}
+STATUS_STRIPE = "stripe"
+
+# v2: фіксована преамбула magic, версія, прапорці, довжина заголовка, довжина даних одразу після заголовка.
+# Перший байт v1 — "{" JSON, тож receiver розрізняє формати за першими 4 байтами
+MAGIC = b"IMGX"
+PREAMBLE = struct.Struct(">4sBBxxIQ")
+FLAG_PACKED = 0x01
+# packed-заголовок: size_bytes, sha256 (сирі 32 байти), width, height, довжина filename;
+# далі filename (utf-8) і JSON з рештою полів
+PACKED_FIXED = struct.Struct(">Q32sIIH")
+_PACKED_KEYS = ("size_bytes", "sha256", "width", "height", "filename")
+
+
+class Message(NamedTuple):
+    header: Dict
+    rest: memoryview          # байти після заголовка, прочитані разом з ним (у v2 завжди порожньо)
+    version: int              # версія кадрування: 1 — JSON + DELIMITER, 2 — преамбула
+    payload_len: Optional[int]  # v2: скільки байтів іде одразу після заголовка; v1 — невідомо
 
-from .config import DELIMITER, HEADER_MAX_BYTES, CHUNK_SIZE
-from .exceptions import ProtocolError
 
 def encode_header(header: Dict) -> bytes:
     data = json.dumps(header, ensure_ascii=False).encode("utf-8")
@@ -12,23 +52,125 @@ def encode_header(header: Dict) -> bytes:
         raise ProtocolError("Header too large")
     return data + DELIMITER
 
-def recv_until_delimiter(sock: socket.socket) -> Tuple[bytes, bytes]:
+def _packable(header: Dict) -> bool:
+    try:
+        return (all(type(header[k]) is int and 0 <= header[k] < 2 ** 32 for k in ("width", "height"))
+                and type(header["size_bytes"]) is int and 0 <= header["size_bytes"] < 2 ** 64
+                and isinstance(header["filename"], str) and len(bytes.fromhex(header["sha256"])) == 32
+                and header["sha256"] == header["sha256"].lower())
+    except (KeyError, TypeError, ValueError):
+        return False
+
+def pack_header(header: Dict) -> bytes:
+    """Гарячі поля — у фіксованій структурі (без JSON-розбору), решта — компактний JSON."""
+    name = header["filename"].encode("utf-8")
+    extra = {k: v for k, v in header.items() if k not in _PACKED_KEYS and k != "version"}
+    return (PACKED_FIXED.pack(header["size_bytes"], bytes.fromhex(header["sha256"]), header["width"],
+                              header["height"], len(name))
+            + name + json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+def unpack_header(data: bytes | memoryview) -> Dict:
+    try:
+        size, sha, width, height, name_len = PACKED_FIXED.unpack_from(data)
+        pos = PACKED_FIXED.size + name_len
+        header = {"filename": bytes(data[PACKED_FIXED.size:pos]).decode("utf-8"), "size_bytes": size,
+                  "sha256": sha.hex(), "width": width, "height": height}
+        extra = json.loads(bytes(data[pos:]).decode("utf-8"))
+    except (struct.error, ValueError) as e:
+        raise ProtocolError(f"Invalid packed header: {e}") from e
+    if not isinstance(extra, dict):
+        raise ProtocolError("Invalid packed header: extra fields are not an object")
+    return {**extra, **header}
+
+def encode_message(header: Dict, version: int = VERSION, payload_len: int = 0, packed: bool = True) -> bytes:
     """
-    Returns (header_bytes_without_delim, remainder_bytes_after_delim)
+    Кадр заголовка у форматі version. v1 — JSON + DELIMITER з "version": 1 (його розуміють старі receiver-и);
+    v2 — преамбула + заголовок (packed, якщо поля дозволяють, інакше JSON), payload_len — байти одразу після.
     """
-    buffer = bytearray()
-    while True:
-        chunk = sock.recv(CHUNK_SIZE)
-        if not chunk:
-            raise ProtocolError("Connection closed before header delimiter")
-        buffer.extend(chunk)
-        if DELIMITER in buffer:
-            idx = buffer.index(DELIMITER)
-            header = bytes(buffer[:idx])
-            rest = bytes(buffer[idx + len(DELIMITER):])
-            return header, rest
-        if len(buffer) > HEADER_MAX_BYTES:
+    if version == 1:
+        return encode_header({**header, "version": 1} if "version" in header else header)
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"unsupported wire version {version}")
+    flags = 0
+    if packed and _packable(header):
+        data, flags = pack_header(header), FLAG_PACKED
+    else:
+        data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    if len(data) > HEADER_MAX_BYTES:
+        raise ProtocolError("Header too large")
+    return PREAMBLE.pack(MAGIC, version, flags, len(data), payload_len) + data
+
+def parse_preamble(data: bytes | bytearray) -> Tuple[int, int, int, int]:
+    """(version, flags, header_len, payload_len) з PREAMBLE.size байтів; перевіряє версію і розмір."""
+    _magic, version, flags, header_len, payload_len = PREAMBLE.unpack(data)
+    if version not in SUPPORTED_VERSIONS or version < 2:
+        raise ProtocolError("Unsupported protocol version")
+    if header_len > HEADER_MAX_BYTES:
+        raise ProtocolError("Header exceeds max size")
+    return version, flags, header_len, payload_len
+
+def decode_message_header(data: bytes | bytearray, version: int, flags: int) -> Dict:
+    header = unpack_header(data) if flags & FLAG_PACKED else decode_header(bytes(data))
+    if not isinstance(header, dict):
+        raise ProtocolError("Header is not an object")
+    header["version"] = version   # версія з преамбули, а не з тіла заголовка
+    return header
+
+def recv_message(sock: socket.socket) -> Message:
+    """
+    Прочитати заголовок у будь-якому форматі. v2 — рівно дві операції читання фіксованої довжини
+    (преамбула, заголовок) без сканування; v1 — пошук DELIMITER, як раніше.
+    """
+    first = bytearray(len(MAGIC))
+    with memoryview(first) as view:
+        got = recv_exact_into(sock, view)
+    if not got:
+        raise ConnectionClosed("Connection closed")
+    if got < len(first):
+        raise ProtocolError("Connection closed before end of header")
+    if first != MAGIC:
+        header_bytes, rest = recv_until_delimiter(sock, initial=first)
+        header = decode_header(header_bytes)
+        if not isinstance(header, dict):
+            raise ProtocolError("Header is not an object")
+        return Message(header, rest, 1, None)
+    try:
+        version, flags, header_len, payload_len = parse_preamble(recv_exact(sock, PREAMBLE.size, first))
+        data = recv_exact(sock, header_len)
+    except ConnectionError as e:
+        raise ProtocolError("Connection closed before end of header") from e
+    return Message(decode_message_header(data, version, flags), memoryview(b""), version, payload_len)
+
+def recv_until_delimiter(sock: socket.socket, initial: bytes | bytearray = b"") -> Tuple[bytes, memoryview]:
+    """
+    Returns (header_bytes_without_delim, remainder_after_delim).
+    The remainder is a memoryview into the receive buffer (no copy).
+    initial — already-read start of the header (the 4 bytes recv_message used to detect the format).
+    """
+    # типовий заголовок (і відповідь) приходить одним recv у перший CHUNK_SIZE; інакше буфер росте вдвічі,
+    # до заголовка + одного recv зверху: більше ніж HEADER_MAX_BYTES без delimiter — помилка
+    end = len(initial)
+    buf = bytearray(end + CHUNK_SIZE)
+    buf[:end] = initial
+    idx = find_from(buf, DELIMITER, 0, end)
+    while idx == -1:
+        if end > HEADER_MAX_BYTES:
             raise ProtocolError("Header exceeds max size")
+        if len(buf) < end + CHUNK_SIZE:
+            buf += bytes(min(len(buf), HEADER_MAX_BYTES + CHUNK_SIZE - len(buf)))
+        # view відпускається до наступного розширення: bytearray з експортованим буфером не росте
+        with memoryview(buf) as view:
+            n = sock.recv_into(view[end:end + CHUNK_SIZE])
+        if not n:
+            if not end:
+                raise ConnectionClosed("Connection closed")
+            raise ProtocolError("Connection closed before header delimiter")
+        scanned, end = end, end + n
+        idx = find_from(buf, DELIMITER, scanned, end)
+    if idx > HEADER_MAX_BYTES:
+        raise ProtocolError("Header exceeds max size")
+    view = memoryview(buf)
+    return bytes(view[:idx]), view[idx + len(DELIMITER):end]
 
 def decode_header(header_bytes: bytes) -> Dict:
     try:
@@ -36,17 +178,102 @@ def decode_header(header_bytes: bytes) -> Dict:
     except Exception as e:
         raise ProtocolError(f"Invalid header JSON: {e}") from e
 
-def send_file(sock: socket.socket, file_path: str, chunk_size: int = CHUNK_SIZE) -> None:
+def send_reply(sock: socket.socket, reply: Dict, version: int = 1) -> None:
+    """Відповідь у тому ж форматі кадру, що й заголовок sender-а (version — з Message.version)."""
+    sock.sendall(encode_header(reply) if version == 1 else encode_message(reply, version, packed=False))
+
+def recv_reply(sock: socket.socket) -> Dict:
+    msg = recv_message(sock)
+    if msg.rest or msg.payload_len:
+        raise ProtocolError("Unexpected data after reply")
+    return msg.header
+
+def reply_for_error(e: Exception) -> Dict:
+    if isinstance(e, InvalidImageError):
+        status = STATUS_INVALID_IMAGE
+    elif isinstance(e, ProtocolError):
+        status = STATUS_PROTOCOL_ERROR
+    else:
+        status = STATUS_INTEGRITY_ERROR
+    return {"status": status, "error": str(e)}
+
+def raise_for_reply(reply: Dict) -> None:
+    """Перетворити відповідь receiver-а назад на виняток на боці sender-а."""
+    status = reply.get("status")
+    if status == STATUS_OK:
+        return
+    if status == STATUS_INVALID_IMAGE:
+        raise InvalidImageError(reply.get("error", "Receiver rejected image"))
+    if status == STATUS_INTEGRITY_ERROR:
+        raise IntegrityError(reply.get("error", "Receiver reported integrity error"))
+    if status == STATUS_PROTOCOL_ERROR:
+        raise ProtocolError(reply.get("error", "Receiver rejected the request"))
+    raise ProtocolError(f"Unexpected reply status: {status!r}")
+
+def _can_sendfile(sock: socket.socket, f) -> bool:
+    if not hasattr(os, "sendfile"):
+        return False
+    # TLS шифрує в user space, ядро не може відправити сторінки напряму.
+    # Якщо ssl ще не імпортовано, SSLSocket тут бути не може.
+    ssl = sys.modules.get("ssl")
+    if ssl is not None and isinstance(sock, ssl.SSLSocket):
+        return False
+    try:
+        return stat.S_ISREG(os.fstat(f.fileno()).st_mode)
+    except (OSError, AttributeError, ValueError):
+        return False
+
+# скільки байтів тіла вже пройшло (відправлено / записано)
+Progress = Callable[[int], None]
+# колбек Sender/ReceiverServer: (ім'я файлу, байтів пройшло, усього байтів); викликається з потоку передачі
+TransferProgress = Callable[[str, int, int], None]
+
+def send_file(sock: socket.socket, file_path: str, chunk_size: int = CHUNK_SIZE,
+              offset: int = 0, count: int | None = None, zero_copy: bool = True,
+              progress: Optional[Progress] = None) -> int:
+    """
+    Відправити файл (або діапазон offset..offset+count) у сокет. Повертає кількість байтів.
+    На Linux іде через sendfile без копіювання в user space; для TLS-сокетів,
+    не-регулярних файлів чи zero_copy=False — звичайний цикл читання частинами.
+    progress отримує кількість відправлених байтів (з sendfile — кожні PROGRESS_STEP).
+    """
     with open(file_path, "rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
+        if zero_copy and _can_sendfile(sock, f):
+            if progress is None:
+                return sock.sendfile(f, offset, count)
+            end = os.fstat(f.fileno()).st_size if count is None else offset + count
+            sent = 0
+            while offset + sent < end:
+                n = sock.sendfile(f, offset + sent, min(PROGRESS_STEP, end - offset - sent))
+                if not n:
+                    break
+                sent += n
+                progress(sent)
+            return sent
+
+        f.seek(offset)
+        sent = 0
+        while count is None or sent < count:
+            to_read = chunk_size if count is None else min(chunk_size, count - sent)
+            chunk = f.read(to_read)
             if not chunk:
                 break
             sock.sendall(chunk)
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent)
+        return sent
 
-def recv_exact_to_file(sock: socket.socket, total_bytes: int, out_path: str, initial: bytes = b"") -> int:
+class Digest(Protocol):
+    """Будь-що з update(data): hashlib-об'єкт або власний споживач потоку байтів."""
+    def update(self, data: bytes, /) -> None: ...
+
+def recv_exact_to_file(sock: socket.socket, total_bytes: int, out_path: str, initial: bytes | memoryview = b"",
+                       digest: Optional[Digest] = None, progress: Optional[Progress] = None) -> int:
     """
     Receives exactly total_bytes and writes to out_path.
+    Every written chunk is also fed to digest.update(), so the hash is ready
+    without re-reading the file. progress gets the running byte count.
     Returns number of bytes written.
     """
     written = 0
@@ -54,13 +281,19 @@ def recv_exact_to_file(sock: socket.socket, total_bytes: int, out_path: str, ini
         if initial:
             take = initial[:total_bytes]
             f.write(take)
+            if digest is not None:
+                digest.update(take)
             written += len(take)
 
-        while written < total_bytes:
-            to_read = min(CHUNK_SIZE, total_bytes - written)
-            chunk = sock.recv(to_read)
-            if not chunk:
-                break
-            f.write(chunk)
-            written += len(chunk)
+        base = written
+        written += recv_into_file(sock, f, total_bytes - written, digest=digest,
+                                  progress=None if progress is None else (lambda n: progress(base + n)))
     return written
+
+def recv_exact_to_file_hashed(sock: socket.socket, total_bytes: int, out_path: str,
+                              initial: bytes | memoryview = b"",
+                              progress: Optional[Progress] = None) -> Tuple[int, str]:
+    """Як recv_exact_to_file, але повертає (written, sha256 hex) за один прохід."""
+    h = hashlib.sha256()
+    written = recv_exact_to_file(sock, total_bytes, out_path, initial=initial, digest=h, progress=progress)
+    return written, h.hexdigest()
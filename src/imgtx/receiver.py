@@ -1,14 +1,40 @@
 from __future__ import annotations
+import contextlib
+import hashlib
 import os
+import secrets
 import socket
+import threading
+import time
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Dict, Sequence
 
-from .config import DEFAULT_HOST, DEFAULT_PORT, VERSION
-from .protocol import recv_until_delimiter, decode_header, recv_exact_to_file
+from .config import (
+    DEFAULT_HOST, DEFAULT_PORT, SUPPORTED_VERSIONS, MAX_WORKERS, CLIENT_TIMEOUT_SEC, CDC_MIN_SIZE, CDC_MAX_SIZE,
+    CDC_MAX_CHUNKS,
+    RESUME_STALE_SEC, RESUME_SWEEP_SEC,
+)
+from .protocol import (
+    recv_message, recv_exact_to_file_hashed, send_reply, reply_for_error, TransferProgress,
+    STATUS_OK, STATUS_RESUME, STATUS_HAVE, STATUS_SEND, STATUS_CHUNKS, STATUS_STRIPE,
+)
+from .buffers import recv_exact, recv_exact_into
+from .cdc import CHUNK_ENTRY, parse_chunk_list, encode_bitmap
+from .compress import CODECS, pick_encoding, recv_compressed_to_file
+from .resume import PartialTransfer, sweep_stale
+from .stripe import StripeRegistry
 from .crypto import sha256_file
-from .image_utils import validate_image, pixel_fingerprint
-from .exceptions import ProtocolError, IntegrityError, InvalidImageError
+from .verification import DEFAULT_VERIFY_LEVEL, VERIFY_LEVELS, check_level, check_image, negotiate_level
+from .exceptions import ProtocolError, IntegrityError, InvalidImageError, ConnectionClosed
+from .metrics import StageTimer
+from .serving import PooledServer
+
+if TYPE_CHECKING:
+    from .cdc import ChunkStore
+    from .dedup import DigestIndex
+    from .metrics import MetricsSink
+    from .verify_pool import VerifyPool
 
 @dataclass(frozen=True)
 class ReceiveResult:
@@ -18,68 +44,430 @@ class ReceiveResult:
     width: int
     height: int
     format: str
+    verify: str = DEFAULT_VERIFY_LEVEL   # рівень перевірки, реально застосований до файлу
+    bytes_saved: int = 0                 # байти, які не довелося передавати (dedup / cdc)
+    bytes_received: int = 0              # байти тіла, прочитані з мережі (стиснуті / лише відсутні шматки)
+    # тривалості стадій у секундах: header, receive, sha256, validate, fingerprint, rename, verify_queue
+    timings: Dict[str, float] = field(default_factory=dict)
+
+class ReceiverServer(PooledServer):
+    recoverable_errors = (IntegrityError, InvalidImageError)
 
-class ReceiverServer:
-    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, output_dir: str = "outputs/received"):
-        self.host = host
-        self.port = port
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, output_dir: str = "outputs/received",
+                 max_workers: int = MAX_WORKERS, client_timeout: float | None = CLIENT_TIMEOUT_SEC,
+                 verify_pool: "VerifyPool | None" = None, verify_level: str = DEFAULT_VERIFY_LEVEL,
+                 dedup_index: "DigestIndex | None" = None, dedup_link: bool = True,
+                 chunk_store: "ChunkStore | None" = None, accept_encodings: Sequence[str] | None = None,
+                 stripe_registry: StripeRegistry | None = None, metrics: "MetricsSink | None" = None,
+                 progress: TransferProgress | None = None, resume_stale_sec: float | None = RESUME_STALE_SEC):
+        super().__init__(host, port, max_workers=max_workers, client_timeout=client_timeout)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # з пулом процесів декодування не блокує GIL потоків прийому; життєвим циклом пулу керує викликач
+        self.verify_pool = verify_pool
+        # мінімальний рівень перевірки; sender може попросити суворіший у полі "verify"
+        self.verify_level = check_level(verify_level)
+        # transfer_id resumable передач, які зараз приймаються (один .part — один писач)
+        self._active_transfers: set[str] = set()
+        self._transfers_lock = threading.Lock()
+        # покинуті .part старші за resume_stale_sec прибираються (None — ніколи)
+        self.resume_stale_sec = resume_stale_sec
+        self._resume_swept: float | None = None
+        self._sweep_partials()
+        # дедуплікація: sha256 -> вже збережений файл; при збігу тіло не передається взагалі,
+        # а під новим іменем створюється hardlink (dedup_link=False — повертається наявний шлях)
+        self.dedup_index = dedup_index
+        self.dedup_link = dedup_link
+        # блокова (CDC) дедуплікація: без сховища receiver просто просить усі шматки
+        self.chunk_store = chunk_store
+        # кодеки стиснення тіла, які receiver погоджується приймати (None — усі доступні; [] — жодного)
+        self.accept_encodings = list(CODECS) if accept_encodings is None else list(accept_encodings)
+        # діапазони striped передач, спільні для всіх з'єднань цього receiver-а
+        self.stripes = stripe_registry if stripe_registry is not None else StripeRegistry()
+        self.stripes.sweep(self.output_dir)
+        # сукупні лічильники/гістограми (metrics.PrometheusFileSink, JsonLinesSink); закриває викликач
+        self.metrics = metrics
+        # прогрес прийому тіла (звичайні передачі і сесії); для стиснутого тіла — лише після завершення
+        self.progress = progress
 
     def serve_once(self) -> ReceiveResult:
         """
         Прийняти ОДНЕ зображення і завершитися (ідеально для інтеграційних тестів).
+        Для тривалої роботи див. serve_forever().
         """
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind((self.host, self.port))
-            s.listen(1)
+        with self._bind(1) as s:
             conn, _addr = s.accept()
+            results: list[ReceiveResult] = []
             with conn:
-                return self._handle_client(conn)
+                # клієнт сесії може надіслати кілька зображень — повертаємо останнє
+                self._serve_connection(conn, results.append, None)
+            if not results:
+                # напр. лише проміжні діапазони striped передачі: файл ще не повний
+                raise ProtocolError("Connection ended before a complete image was received")
+            return results[-1]
 
-    def _handle_client(self, conn: socket.socket) -> ReceiveResult:
-        header_bytes, rest = recv_until_delimiter(conn)
-        header = decode_header(header_bytes)
+    def _handle_client(self, conn: socket.socket) -> ReceiveResult | None:
+        timer = StageTimer()
+        try:
+            result = self._receive(conn, timer)
+        except ConnectionClosed:
+            raise   # кінець сесії, не помилка
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record_error(e)
+            raise
+        if result is None:
+            return None
+        # стадії перевірки (можливо, з процесу пулу) + стадії цього потоку
+        result = replace(result, timings={**result.timings, **timer.stages})
+        if self.metrics is not None:
+            self.metrics.record(result)
+        return result
 
-        if int(header.get("version", -1)) != VERSION:
-            raise ProtocolError("Unsupported protocol version")
+    def _receive(self, conn: socket.socket, timer: StageTimer) -> ReceiveResult | None:
+        # у сесії "header" включає й очікування наступного зображення від sender-а
+        with timer.stage("header"):
+            msg = recv_message(conn)
+        header, rest = msg.header, msg.rest
+        if msg.version == 1:
+            if int(header.get("version", -1)) not in SUPPORTED_VERSIONS:
+                raise ProtocolError("Unsupported protocol version")
+            # далі "version" — формат кадру: відповіді йдуть у тому ж форматі, що й заголовок
+            header["version"] = 1
+        elif msg.payload_len != inline_payload_len(header):
+            raise ProtocolError("Payload length in the preamble does not match the header")
 
         filename = str(header.get("filename", "image"))
         size_bytes = int(header["size_bytes"])
-        expected_sha = str(header["sha256"]).lower()
+        # session: sender чекає на відповідь після кожного зображення і шле наступне тим самим з'єднанням
+        session = bool(header.get("session", False))
+        if len(rest) > size_bytes:
+            raise ProtocolError("Unexpected data after payload")
+        if header.get("cdc"):
+            return self._handle_cdc(conn, header, rest, timer)
+        if "stripe" in header:
+            return self._handle_stripe(conn, header, rest, timer)
+        offers = header.get("compress") or []
+        if header.get("dedup") or offers or "transfer_id" in header:
+            # sender чекає відповіді до тіла — нічого з тіла ще не мало прийти
+            if rest:
+                raise ProtocolError("Payload sent before the receiver's reply")
+        if header.get("dedup"):
+            hit = self._dedup_hit(header)
+            if hit is not None:
+                hit = replace(hit, bytes_saved=size_bytes)
+                send_reply(conn, {"status": STATUS_HAVE, "sha256": hit.sha256, "verify": hit.verify}, header["version"])
+                return hit
+        if "transfer_id" in header:
+            return self._handle_resumable(conn, header, timer)
+        encoding = None
+        if header.get("dedup") or offers:
+            # стиснення не входить у sha256: хешуються розпаковані (оригінальні) байти
+            encoding = pick_encoding(offers, self.accept_encodings)
+            send_reply(conn, {"status": STATUS_SEND, "encoding": encoding}, header["version"])
+
+        tmp_path = tmp_path_for(self.output_dir, filename)
+        try:
+            # sha256 рахується під час прийому — без окремого читання файлу з диска
+            with timer.stage("receive"):
+                if encoding is None:
+                    report = None if self.progress is None else (lambda n: self.progress(filename, n, size_bytes))
+                    written, actual_sha = recv_exact_to_file_hashed(conn, size_bytes, str(tmp_path), initial=rest,
+                                                                    progress=report)
+                    wire = written
+                else:
+                    whole = hashlib.sha256()
+                    with tmp_path.open("wb") as f:
+                        written, wire = recv_compressed_to_file(conn, size_bytes, f, encoding, digest=whole)
+                    actual_sha = whole.hexdigest()
+                    if self.progress is not None:
+                        self.progress(filename, written, size_bytes)
+
+            if written != size_bytes:
+                # неповна передача
+                raise IntegrityError(f"Incomplete transfer: expected {size_bytes}, got {written}")
+
+            try:
+                result = self._verify(header, tmp_path, actual_sha, timer)
+            except (IntegrityError, InvalidImageError) as e:
+                if session:
+                    send_reply(conn, reply_for_error(e), header["version"])
+                raise
+            result = replace(result, bytes_received=wire)
+            if session:
+                send_reply(conn, {"status": STATUS_OK, "sha256": result.sha256, "verify": result.verify},
+                           header["version"])
+            return result
+        finally:
+            # після replace() файлу вже нема; інакше прибираємо недокачаний/битий tmp
+            tmp_path.unlink(missing_ok=True)
+
+    def _handle_resumable(self, conn: socket.socket, header: dict, timer: StageTimer) -> ReceiveResult:
+        """
+        Resumable передача: до тіла відповідаємо offset-ом, приймаємо решту з перевіркою
+        шматків за маніфестом і завжди підтверджуємо результат (sender вирішує, чи повторювати).
+        """
+        partial = PartialTransfer(self.output_dir, header)
+        self._sweep_partials()
+        with self._claim(partial.transfer_id):
+            offset = partial.resume_offset()
+            send_reply(conn, {"status": STATUS_RESUME, "offset": offset}, header["version"])
+            # з нуля — sha256 рахуємо під час прийому; після відновлення — з диска
+            whole = hashlib.sha256() if offset == 0 else None
+            try:
+                with timer.stage("receive"):
+                    partial.receive(conn, offset, digest=whole)
+            except IntegrityError as e:
+                with contextlib.suppress(OSError):   # після обриву відповідати вже нікому
+                    send_reply(conn, reply_for_error(e), header["version"])
+                raise
+
+            tmp_path = tmp_path_for(self.output_dir, str(header.get("filename", "image")))
+            partial.part_path.replace(tmp_path)
+            partial.finish()
+            try:
+                result = self._verify(header, tmp_path, whole.hexdigest() if whole is not None else None, timer)
+            except (IntegrityError, InvalidImageError) as e:
+                send_reply(conn, reply_for_error(e), header["version"])
+                raise
+            finally:
+                tmp_path.unlink(missing_ok=True)
+        result = replace(result, bytes_received=partial.size - offset)
+        send_reply(conn, {"status": STATUS_OK, "sha256": result.sha256, "verify": result.verify}, header["version"])
+        return result
+
+    def _handle_stripe(self, conn: socket.socket, header: dict, rest: memoryview,
+                       timer: StageTimer) -> ReceiveResult | None:
+        """
+        Один діапазон striped передачі: pwrite на своє місце і відповідь "stripe" з рештою байтів.
+        З'єднання, що доставило останній діапазон, перевіряє весь файл і відповідає підсумком.
+        """
+        stripe = header["stripe"]
+        offset, length = int(stripe["offset"]), int(stripe["length"])
+        if len(rest) > length:
+            raise ProtocolError("Unexpected data after stripe range")
+        transfer = self.stripes.open(self.output_dir, header)
+        with timer.stage("receive"):
+            pending = transfer.receive(conn, transfer.claim(offset, length), rest)
+        if pending:
+            send_reply(conn, {"status": STATUS_STRIPE, "pending": pending}, header["version"])
+            return None
+
+        self.stripes.finish(transfer)
+        try:
+            # діапазони прийшли не по порядку — sha256 один раз з диска, коли файл повний
+            result = self._verify(header, transfer.tmp_path, None, timer)
+        except (IntegrityError, InvalidImageError) as e:
+            send_reply(conn, reply_for_error(e), header["version"])
+            raise
+        finally:
+            transfer.tmp_path.unlink(missing_ok=True)
+        # "receive" тут — лише останній діапазон; байти — усього файлу (усі з'єднання)
+        result = replace(result, bytes_received=transfer.size)
+        send_reply(conn, {"status": STATUS_OK, "sha256": result.sha256, "verify": result.verify}, header["version"])
+        return result
+
+    def _handle_cdc(self, conn: socket.socket, header: dict, rest: memoryview, timer: StageTimer) -> ReceiveResult:
+        """
+        Блокова дедуплікація: список шматків (бінарний кадр одразу після заголовка) ->
+        бітова мапа відсутніх -> лише ці шматки -> файл збирається зі сховища і нових шматків.
+        Відповідь після зображення надсилається завжди.
+        """
+        size_bytes = int(header["size_bytes"])
+        count = int(header["chunk_count"])
+        # заголовок не автентифікований: межі — до будь-якого виділення пам'яті під список чи шматки.
+        # size_bytes теж від peer-а, тож кількість обмежена ще й фіксованим CDC_MAX_CHUNKS
+        if size_bytes < 0 or not 0 <= count <= min(size_bytes // CDC_MIN_SIZE + 1, CDC_MAX_CHUNKS) \
+                or len(rest) > count * CHUNK_ENTRY.size:
+            raise ProtocolError("Bad chunk list")
+        with timer.stage("receive"):
+            entries = parse_chunk_list(bytes(recv_exact(conn, count * CHUNK_ENTRY.size, rest)))
+        if any(length > CDC_MAX_SIZE for _d, length in entries):
+            raise ProtocolError(f"Chunk longer than {CDC_MAX_SIZE} bytes")
+        if sum(length for _d, length in entries) != size_bytes:
+            raise ProtocolError("Chunk lengths do not add up to size_bytes")
+
+        store = self.chunk_store
+        missing = store.missing([d for d, _n in entries]) if store is not None else [True] * count
+        need_bytes = sum(length for (_d, length), m in zip(entries, missing) if m)
+        send_reply(conn, {"status": STATUS_CHUNKS, "missing": encode_bitmap(missing), "bytes": need_bytes},
+                   header["version"])
+
+        tmp_path = tmp_path_for(self.output_dir, str(header.get("filename", "image")))
+        try:
+            try:
+                with timer.stage("receive"):
+                    actual_sha = self._assemble_chunks(conn, entries, missing, tmp_path)
+                result = self._verify(header, tmp_path, actual_sha, timer)
+            except (IntegrityError, InvalidImageError) as e:
+                send_reply(conn, reply_for_error(e), header["version"])
+                raise
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        result = replace(result, bytes_saved=size_bytes - need_bytes,
+                         bytes_received=need_bytes + count * CHUNK_ENTRY.size)
+        send_reply(conn, {"status": STATUS_OK, "sha256": result.sha256, "verify": result.verify,
+                          "bytes_saved": result.bytes_saved}, header["version"])
+        return result
+
+    def _assemble_chunks(self, conn: socket.socket, entries, missing, tmp_path: Path) -> str:
+        """Зібрати файл; нові шматки звіряються зі своїм sha256 і одразу йдуть у сховище."""
+        store = self.chunk_store
+        whole = hashlib.sha256()
+        error: IntegrityError | None = None
+        fresh: list[tuple[bytes, bytes]] = []
+        # один scratch-буфер на всі шматки (довжина кожного вже перевірена: <= CDC_MAX_SIZE)
+        scratch = bytearray(CDC_MAX_SIZE)
+        with tmp_path.open("wb") as f, memoryview(scratch) as view:
+            for (digest, length), need in zip(entries, missing):
+                if need:
+                    # дочитуємо всі надіслані шматки навіть після помилки — з'єднання лишається синхронним
+                    if recv_exact_into(conn, view[:length]) != length:
+                        raise ConnectionError("Socket closed")
+                    data = view[:length]
+                    if hashlib.sha256(data).digest() != digest:
+                        error = error or IntegrityError("Chunk does not match its digest")
+                        continue
+                    if store is not None:
+                        fresh.append((digest, bytes(data)))
+                        if len(fresh) >= 1024:
+                            store.put_many(fresh)
+                            fresh = []
+                else:
+                    data = store.get(digest) if store is not None else None
+                    if data is None:
+                        error = error or IntegrityError("Chunk disappeared from the chunk store")
+                        continue
+                if error is None:
+                    f.write(data)
+                    whole.update(data)
+        if store is not None and fresh:
+            store.put_many(fresh)
+        if error is not None:
+            raise error
+        return whole.hexdigest()
+
+    @contextlib.contextmanager
+    def _claim(self, transfer_id: str):
+        with self._transfers_lock:
+            if transfer_id in self._active_transfers:
+                raise ProtocolError("Transfer already in progress")
+            self._active_transfers.add(transfer_id)
+        try:
+            yield
+        finally:
+            with self._transfers_lock:
+                self._active_transfers.discard(transfer_id)
+
+    def _sweep_partials(self) -> None:
+        if self.resume_stale_sec is None:
+            return
+        now = time.monotonic()
+        # під lock-ом: передача, яку саме зараз claim-лять, не зникне з-під неї
+        with self._transfers_lock:
+            if self._resume_swept is not None and now - self._resume_swept < RESUME_SWEEP_SEC:
+                return
+            self._resume_swept = now
+            sweep_stale(self.output_dir, self.resume_stale_sec, self._active_transfers)
+
+    def _verify(self, header: dict, tmp_path: Path, actual_sha: str | None, timer: StageTimer) -> ReceiveResult:
+        if self.verify_pool is not None:
+            t0 = time.perf_counter()
+            result = self.verify_pool.verify(self.output_dir, header, tmp_path, actual_sha, self.verify_level)
+            # очікування слота пулу + передача задачі між процесами
+            timer.stages["verify_queue"] = max(0.0, time.perf_counter() - t0 - sum(result.timings.values()))
+        else:
+            result = verify_and_store(self.output_dir, header, tmp_path, actual_sha=actual_sha, policy=self.verify_level)
+        if self.dedup_index is not None:
+            self.dedup_index.add(result)
+        return result
+
+    def _dedup_hit(self, header: dict) -> ReceiveResult | None:
+        """Збережений файл з тим самим sha256, перевірений щонайменше на потрібному рівні."""
+        if self.dedup_index is None:
+            return None
+        hit = self.dedup_index.lookup(str(header["sha256"]))
+        if hit is None:
+            return None
+        level = negotiate_level(self.verify_level, header.get("verify"))
+        if VERIFY_LEVELS.index(hit.verify) < VERIFY_LEVELS.index(level):
+            # збережено з дешевшою перевіркою — доперевіряємо локально, мережею нічого не йде
+            try:
+                info, px = check_image(Path(hit.saved_path), level)
+            except InvalidImageError:
+                self.dedup_index.remove(hit.sha256)
+                return None
+            hit = replace(hit, pixel_fp=px or "", verify=level)
+            self.dedup_index.add(hit)
+
+        filename = os.path.basename(str(header.get("filename", "image")))
+        final_path = self.output_dir / f"{hit.sha256[:12]}__{filename}"
+        if self.dedup_link and str(final_path) != hit.saved_path:
+            try:
+                os.link(hit.saved_path, final_path)
+            except FileExistsError:
+                pass   # той самий вміст під тим самим іменем уже є
+            except OSError:
+                return hit   # інша ФС / без підтримки hardlink: лишаємо наявний шлях
+            return replace(hit, saved_path=str(final_path))
+        return hit
+
+
+def inline_payload_len(header: dict) -> int:
+    """Скільки байтів sender шле одразу після заголовка, не чекаючи відповіді (v2 payload_len)."""
+    if header.get("cdc"):
+        return int(header["chunk_count"]) * CHUNK_ENTRY.size
+    if "stripe" in header:
+        return int(header["stripe"]["length"])
+    if header.get("dedup") or header.get("compress") or "transfer_id" in header:
+        return 0
+    return int(header["size_bytes"])
+
 
-        tmp_path = self.output_dir / (".tmp_" + filename)
-        written = recv_exact_to_file(conn, size_bytes, str(tmp_path), initial=rest)
+def tmp_path_for(output_dir: Path, filename: str) -> Path:
+    # унікальне тимчасове ім'я: кілька клієнтів можуть слати однаковий filename одночасно
+    return output_dir / f".tmp_{secrets.token_hex(6)}_{os.path.basename(filename)}"
 
-        if written != size_bytes:
-            # неповна передача
-            raise IntegrityError(f"Incomplete transfer: expected {size_bytes}, got {written}")
 
-        actual_sha = sha256_file(tmp_path)
-        if actual_sha.lower() != expected_sha:
-            raise IntegrityError("SHA256 mismatch (data corrupted)")
+def verify_and_store(output_dir: Path, header: dict, tmp_path: Path, actual_sha: str | None = None,
+                     policy: str = DEFAULT_VERIFY_LEVEL) -> ReceiveResult:
+    """
+    Перевірити прийнятий tmp-файл (sha256, зображення, розміри) і перейменувати у фінальне ім'я.
+    actual_sha — digest, порахований під час прийому; якщо None, файл хешується з диска.
+    policy — мінімальний рівень перевірки receiver-а (див. verification.negotiate_level).
+    Спільне для ReceiverServer і AsyncReceiverServer.
+    """
+    filename = str(header.get("filename", "image"))
+    expected_sha = str(header["sha256"]).lower()
+    level = negotiate_level(policy, header.get("verify"))
 
-        # валідність зображення + метадані
-        info = validate_image(tmp_path)
+    timer = StageTimer()
+    if actual_sha is None:
+        with timer.stage("sha256"):
+            actual_sha = sha256_file(tmp_path)
+    if actual_sha.lower() != expected_sha:
+        raise IntegrityError("SHA256 mismatch (data corrupted)")
 
-        hdr_w = int(header.get("width", info.width))
-        hdr_h = int(header.get("height", info.height))
-        if (info.width, info.height) != (hdr_w, hdr_h):
-            raise InvalidImageError("Image dimensions mismatch")
+    # валідність зображення + метадані; fingerprint "відображення" для reduced/full
+    info, px = check_image(tmp_path, level, timer=timer)
 
-        # fingerprint "відображення"
-        px = pixel_fingerprint(tmp_path)
+    hdr_w = int(header.get("width", info.width))
+    hdr_h = int(header.get("height", info.height))
+    if (info.width, info.height) != (hdr_w, hdr_h):
+        raise InvalidImageError("Image dimensions mismatch")
 
-        safe_name = f"{actual_sha[:12]}__{os.path.basename(filename)}"
-        final_path = self.output_dir / safe_name
+    safe_name = f"{actual_sha[:12]}__{os.path.basename(filename)}"
+    final_path = output_dir / safe_name
+    with timer.stage("rename"):
         tmp_path.replace(final_path)
 
-        return ReceiveResult(
-            saved_path=str(final_path),
-            sha256=actual_sha,
-            pixel_fp=px,
-            width=info.width,
-            height=info.height,
-            format=info.format,
-        )
+    return ReceiveResult(
+        saved_path=str(final_path),
+        sha256=actual_sha,
+        pixel_fp=px or "",
+        width=info.width,
+        height=info.height,
+        format=info.format,
+        verify=level,
+        timings=timer.stages,
+    )
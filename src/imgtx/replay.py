@@ -0,0 +1,141 @@
+from __future__ import annotations
+import heapq, sqlite3, threading, time
+from pathlib import Path
+from typing import Dict, List, Protocol, Tuple
+
+REPLAY_TTL_SEC = 300
+REPLAY_CAPACITY = 100_000
+
+
+class ReplayDetected(Exception):
+    pass
+
+class TimestampOutOfWindow(Exception):
+    pass
+
+
+class ReplayGuard(Protocol):
+    """Будь-що з check_and_mark(session_id, ts): кеш у пам'яті або спільний SQLite."""
+
+    def check_and_mark(self, session_id: str, ts: int) -> None: ...
+
+
+# Запис живе до ts + ttl: пізніше той самий заголовок однаково відхилить перевірка вікна,
+# тож пам'ятати його довше не треба. При переповненні витісняється запис, що спливає першим,
+# і "поріг" піднімається до його ts: усе з ts <= порогу далі вважається застарілим.
+# Так обмеження пам'яті лише звужує вікно, але ніколи не пропускає повтор.
+
+
+class ReplayCache:
+    """
+    In-memory кеш session_id: dict + heap за часом спливання.
+    check_and_mark — амортизовано O(log n), розмір не більший за capacity.
+    """
+
+    def __init__(self, ttl_sec: int = REPLAY_TTL_SEC, capacity: int = REPLAY_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.ttl = ttl_sec
+        self.capacity = capacity
+        self.seen: Dict[str, int] = {}          # session_id -> ts
+        self._expiry: List[Tuple[int, str]] = []  # (ts + ttl, session_id)
+        self._floor: int | None = None
+        self._lock = threading.Lock()  # serve_forever викликає з кількох потоків
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+    def check_and_mark(self, session_id: str, ts: int) -> None:
+        with self._lock:
+            now = int(time.time())
+            self._expire(now)
+
+            if session_id in self.seen:
+                raise ReplayDetected("REPLAY_DETECTED")
+
+            if abs(now - ts) > self.ttl or (self._floor is not None and ts <= self._floor):
+                raise TimestampOutOfWindow("TIMESTAMP_OUT_OF_WINDOW")
+
+            if len(self.seen) >= self.capacity:
+                _, oldest = heapq.heappop(self._expiry)
+                oldest_ts = self.seen.pop(oldest)
+                self._floor = oldest_ts if self._floor is None else max(self._floor, oldest_ts)
+                if ts <= self._floor:
+                    raise TimestampOutOfWindow("TIMESTAMP_OUT_OF_WINDOW")
+
+            self.seen[session_id] = ts
+            heapq.heappush(self._expiry, (ts + self.ttl, session_id))
+
+    def _expire(self, now: int) -> None:
+        heap = self._expiry
+        while heap and heap[0][0] < now:
+            _, sid = heapq.heappop(heap)
+            del self.seen[sid]
+
+
+class SqliteReplayCache:
+    """
+    Той самий контракт, але в SQLite-файлі: кілька процесів receiver'а на одному хості
+    бачать спільні session_id. Кожна перевірка — одна IMMEDIATE-транзакція,
+    спливання і витіснення йдуть по індексу expires.
+    """
+
+    def __init__(self, path: str | Path, ttl_sec: int = REPLAY_TTL_SEC, capacity: int = REPLAY_CAPACITY,
+                 busy_timeout: float = 5.0):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.path = Path(path)
+        self.ttl = ttl_sec
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen ("
+                             "session_id TEXT PRIMARY KEY, ts INTEGER NOT NULL, expires INTEGER NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS seen_expires ON seen(expires)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v INTEGER)")
+            self._db.execute("INSERT OR IGNORE INTO meta VALUES ('count', 0)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT v FROM meta WHERE k = 'count'").fetchone()[0]
+
+    def check_and_mark(self, session_id: str, ts: int) -> None:
+        with self._lock, self._db:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")  # серіалізує перевірку між процесами
+            now = int(time.time())
+            expired = db.execute("DELETE FROM seen WHERE expires < ?", (now,)).rowcount
+            # без UPDATE ... RETURNING: він є лише з SQLite 3.35, а Python може бути зібраний зі старішою
+            count = db.execute("SELECT v FROM meta WHERE k = 'count'").fetchone()[0] - expired
+
+            if db.execute("SELECT 1 FROM seen WHERE session_id = ?", (session_id,)).fetchone():
+                raise ReplayDetected("REPLAY_DETECTED")
+
+            row = db.execute("SELECT v FROM meta WHERE k = 'floor'").fetchone()
+            floor = row[0] if row else None
+            if abs(now - ts) > self.ttl or (floor is not None and ts <= floor):
+                raise TimestampOutOfWindow("TIMESTAMP_OUT_OF_WINDOW")
+
+            if count >= self.capacity:
+                sid, oldest_ts = db.execute("SELECT session_id, ts FROM seen ORDER BY expires LIMIT 1").fetchone()
+                db.execute("DELETE FROM seen WHERE session_id = ?", (sid,))
+                floor = oldest_ts if floor is None else max(floor, oldest_ts)
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('floor', ?)", (floor,))
+                count -= 1
+                if ts <= floor:
+                    # відхилення теж треба зафіксувати: витіснення і новий поріг
+                    db.execute("UPDATE meta SET v = ? WHERE k = 'count'", (count,))
+                    db.execute("COMMIT")
+                    raise TimestampOutOfWindow("TIMESTAMP_OUT_OF_WINDOW")
+
+            db.execute("INSERT INTO seen VALUES (?, ?, ?)", (session_id, ts, ts + self.ttl))
+            db.execute("UPDATE meta SET v = ? WHERE k = 'count'", (count + 1,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,170 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import socket
+import time
+from pathlib import Path
+from typing import Container, Dict, Optional
+
+from .buffers import recv_into_file
+from .config import CHUNK_SIZE, RESUME_CHUNK_SIZE, RESUME_MAX_CHUNKS, RESUME_STALE_SEC
+from .exceptions import IntegrityError, ProtocolError
+from .protocol import Digest
+
+# Resumable передача: заголовок несе transfer_id і маніфест (sha256 кожного шматка).
+# Receiver тримає недокачаний файл як .part_<id> і поруч запис прогресу .part_<id>.json
+# з кількістю перевірених байтів. На повторне підключення він відповідає offset-ом,
+# і sender досилає лише решту; кожен шматок звіряється з маніфестом ще до запису прогресу.
+
+TRANSFER_ID_RE = re.compile(r"^[0-9a-f]{16,64}$")
+
+
+def transfer_id_for(sha256: str, filename: str) -> str:
+    """Стабільний id: той самий файл після перезапуску sender-а продовжує ту саму передачу."""
+    return hashlib.sha256(f"{sha256}/{filename}".encode("utf-8")).hexdigest()[:32]
+
+
+def manifest_chunk_size(size: int, base: int = RESUME_CHUNK_SIZE) -> int:
+    """Шматок не менший за base і такий, щоб шматків було не більше RESUME_MAX_CHUNKS (кратно CHUNK_SIZE)."""
+    per_chunk = -(-size // RESUME_MAX_CHUNKS)
+    return max(base, -(-per_chunk // CHUNK_SIZE) * CHUNK_SIZE)
+
+
+def build_manifest(buf, chunk_size: Optional[int] = None) -> Dict:
+    """Маніфест для буфера файлу (bytes/mmap з MappedFile)."""
+    size = len(buf)
+    cs = chunk_size or manifest_chunk_size(size)
+    with memoryview(buf) as view:
+        hashes = [hashlib.sha256(view[off:off + cs]).hexdigest() for off in range(0, size, cs)]
+    return {"chunk_size": cs, "hashes": hashes}
+
+
+def sweep_stale(output_dir: Path, max_age: float = RESUME_STALE_SEC, keep: Container[str] = (),
+                prefix: str = ".part_") -> int:
+    """
+    Видалити .part_<id> і записи прогресу, що не змінювались довше за max_age секунд
+    (sender так і не повернувся). keep — id передач, які зараз приймаються. Повертає кількість файлів.
+    prefix=".stripe_" — те саме для tmp-файлів striped передач.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in output_dir.glob(prefix + "*"):
+        # .part_<id>, .part_<id>.json, .part_<id>.tmp
+        if path.name[len(prefix):].split(".", 1)[0] in keep:
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+class PartialTransfer:
+    """Стан однієї resumable передачі на receiver-і."""
+
+    def __init__(self, output_dir: Path, header: Dict):
+        transfer_id = str(header["transfer_id"])
+        if not TRANSFER_ID_RE.match(transfer_id):
+            raise ProtocolError("Bad transfer_id")
+        manifest = header.get("manifest") or {}
+        self.size = int(header["size_bytes"])
+        self.sha256 = str(header["sha256"]).lower()
+        self.chunk_size = int(manifest.get("chunk_size", 0))
+        self.hashes = [str(h).lower() for h in manifest.get("hashes", [])]
+        if self.chunk_size <= 0 or len(self.hashes) != -(-self.size // self.chunk_size):
+            raise ProtocolError("Bad resume manifest")
+
+        self.transfer_id = transfer_id
+        self.part_path = output_dir / f".part_{transfer_id}"
+        self.record_path = output_dir / f".part_{transfer_id}.json"
+
+    def _fingerprint(self) -> str:
+        # запис прогресу дійсний лише для того самого файлу і маніфесту
+        m = hashlib.sha256(f"{self.size}/{self.sha256}/{self.chunk_size}/".encode())
+        m.update("".join(self.hashes).encode())
+        return m.hexdigest()
+
+    def resume_offset(self) -> int:
+        """Скільки перевірених байтів уже є; все після них обрізається."""
+        offset = 0
+        try:
+            record = json.loads(self.record_path.read_text(encoding="utf-8"))
+            if record.get("manifest") == self._fingerprint():
+                offset = int(record.get("offset", 0))
+        except (OSError, ValueError):
+            pass
+        try:
+            offset = min(offset, self.part_path.stat().st_size)
+        except FileNotFoundError:
+            offset = 0
+        if offset < self.size:
+            offset -= offset % self.chunk_size   # неповний шматок наприкінці не перевірено
+        with self.part_path.open("ab") as f:
+            f.truncate(offset)
+        self._save(offset)
+        return offset
+
+    def _save(self, offset: int) -> None:
+        tmp = self.record_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"manifest": self._fingerprint(), "offset": offset}), encoding="utf-8")
+        os.replace(tmp, self.record_path)
+
+    def receive(self, sock: socket.socket, offset: int, digest: Optional[Digest] = None) -> int:
+        """
+        Прийняти байти [offset, size) шматками маніфесту. Прогрес зберігається після кожного
+        перевіреного шматка. Повертає кількість перевірених байтів на диску (size, якщо все).
+        Шматок, що не збігся з маніфестом, відкидається (решта тіла дочитується, щоб
+        з'єднання лишалось синхронним) -> IntegrityError; обрив -> IntegrityError з offset.
+        """
+        with self.part_path.open("r+b") as f:
+            f.seek(offset)
+            index = offset // self.chunk_size
+            while offset < self.size:
+                n = min(self.chunk_size, self.size - offset)
+                h = hashlib.sha256()
+                got = recv_into_file(sock, f, n, digest=_Tee(h, digest))
+                if got != n:
+                    f.truncate(offset)
+                    raise IntegrityError(f"Incomplete transfer: resumable at offset {offset} of {self.size}")
+                if h.hexdigest() != self.hashes[index]:
+                    f.truncate(offset)
+                    _drain(sock, self.size - offset - n)
+                    raise IntegrityError(f"Chunk {index} does not match manifest")
+                offset += n
+                index += 1
+                f.flush()
+                self._save(offset)
+        return offset
+
+    def finish(self) -> None:
+        """Прибрати запис прогресу (сам .part уже перейменовано або відкинуто)."""
+        self.record_path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        self.part_path.unlink(missing_ok=True)
+        self.finish()
+
+
+class _Tee:
+    def __init__(self, first: Digest, second: Optional[Digest]):
+        self._first = first
+        self._second = second
+
+    def update(self, data, /) -> None:
+        self._first.update(data)
+        if self._second is not None:
+            self._second.update(data)
+
+
+def _drain(sock: socket.socket, n: int) -> None:
+    scratch = bytearray(min(n, RESUME_CHUNK_SIZE) or 1)
+    with memoryview(scratch) as view:
+        while n > 0:
+            got = sock.recv_into(view, min(n, len(scratch)))
+            if not got:
+                return
+            n -= got
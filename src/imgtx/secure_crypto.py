@@ -1,14 +1,29 @@
 from __future__ import annotations
-import os, time, json, secrets
+import os, time, json, secrets, struct
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Iterator, Tuple
 
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 KEY_LEN = 32           # AES-256
 SALT_LEN = 16
 NONCE_LEN = 12         # recommended for GCM
+TAG_LEN = 16
+
+# streaming: nonce = prefix(7) || counter(4, big-endian) || last(1)
+STREAM_NONCE_PREFIX_LEN = 7
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_MAX_CHUNK_SIZE = 16 * 1024 * 1024
+# MODE_WHOLE: receiver тримає весь шифротекст у пам'яті — більший cipher_len відхиляється до прийому
+WHOLE_MAX_CIPHER_LEN = 256 * 1024 * 1024
+
+# session key: scrypt раз на з'єднання, далі дешевий HKDF на кожен файл
+REKEY_AFTER_FILES = 10_000
+REKEY_AFTER_SEC = 3600.0
+FILE_KEY_INFO = b"imgtx/file-key/"
 
 def derive_key(password: str, salt: bytes) -> bytes:
     kdf = Scrypt(salt=salt, length=KEY_LEN, n=2**14, r=8, p=1)
@@ -24,3 +39,95 @@ def encrypt(password: str, plaintext: bytes, aad: bytes) -> Tuple[bytes, bytes,
 def decrypt(password: str, salt: bytes, nonce: bytes, ciphertext: bytes, aad: bytes) -> bytes:
     key = derive_key(password, salt)
     return AESGCM(key).decrypt(nonce, ciphertext, aad)  # raises if tag mismatch
+
+
+def stream_chunks(plain_len: int, chunk_size: int) -> Iterator[Tuple[int, int, bool]]:
+    """(offset, length, last) для кожного шматка; порожній файл = один порожній фінальний шматок."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be > 0")
+    off = 0
+    while True:
+        n = min(chunk_size, plain_len - off)
+        last = off + n >= plain_len
+        yield off, n, last
+        if last:
+            return
+        off += n
+
+def stream_cipher_len(plain_len: int, chunk_size: int) -> int:
+    n_chunks = max(1, -(-plain_len // chunk_size))
+    return plain_len + n_chunks * TAG_LEN
+
+
+class AeadStream:
+    """
+    Потокове AES-GCM шифрування шматками фіксованого розміру (конструкція STREAM).
+    Лічильник і прапорець останнього шматка входять у nonce, тому
+    перестановка, пропуск чи обрізання шматків ламають tag.
+    """
+
+    def __init__(self, key: bytes, nonce_prefix: bytes, aad: bytes):
+        if len(nonce_prefix) != STREAM_NONCE_PREFIX_LEN:
+            raise ValueError("bad nonce prefix length")
+        self._aead = AESGCM(key)
+        self._prefix = nonce_prefix
+        self._aad = aad
+        self._counter = 0
+        self._finished = False
+
+    def _next_nonce(self, last: bool) -> bytes:
+        if self._finished:
+            raise ValueError("stream already finalized")
+        if self._counter > 0xFFFFFFFF:
+            raise ValueError("stream too long")
+        nonce = self._prefix + struct.pack(">IB", self._counter, 1 if last else 0)
+        self._counter += 1
+        self._finished = last
+        return nonce
+
+    def encrypt_chunk(self, data, last: bool) -> bytes:
+        return self._aead.encrypt(self._next_nonce(last), data, self._aad)
+
+    def decrypt_chunk(self, ct, last: bool) -> bytes:
+        # InvalidTag, якщо шматок підмінено/переставлено або це не справжній останній
+        return self._aead.decrypt(self._next_nonce(last), ct, self._aad)
+
+
+def new_stream(password: str, aad: bytes) -> Tuple[bytes, bytes, AeadStream]:
+    """Новий потік для відправника: (salt, nonce_prefix, stream)."""
+    salt = os.urandom(SALT_LEN)
+    prefix = os.urandom(STREAM_NONCE_PREFIX_LEN)
+    return salt, prefix, AeadStream(derive_key(password, salt), prefix, aad)
+
+
+def derive_file_key(master: bytes, file_salt: bytes, file_id: str) -> bytes:
+    """Ключ файлу з master key сесії: HKDF-SHA256 (мікросекунди замість scrypt)."""
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=KEY_LEN, salt=file_salt,
+                info=FILE_KEY_INFO + file_id.encode("utf-8"))
+    return hkdf.derive(master)
+
+
+class SessionKey:
+    """
+    Master key сесії: scrypt(password, salt) рахується один раз,
+    кожен файл отримує власний ключ через derive_file_key.
+    """
+
+    def __init__(self, password: str, salt: bytes | None = None):
+        self.salt = salt if salt is not None else os.urandom(SALT_LEN)
+        self._master = derive_key(password, self.salt)
+        self.created = time.monotonic()
+        self.files = 0
+
+    def expired(self, max_files: int = REKEY_AFTER_FILES, max_age_sec: float = REKEY_AFTER_SEC) -> bool:
+        return self.files >= max_files or time.monotonic() - self.created >= max_age_sec
+
+    def file_key(self, file_salt: bytes, file_id: str) -> bytes:
+        return derive_file_key(self._master, file_salt, file_id)
+
+    def new_stream(self, file_id: str, aad: bytes) -> Tuple[bytes, bytes, AeadStream]:
+        """Як new_stream(), але без scrypt: (file_salt, nonce_prefix, stream)."""
+        self.files += 1
+        file_salt = os.urandom(SALT_LEN)
+        prefix = os.urandom(STREAM_NONCE_PREFIX_LEN)
+        return file_salt, prefix, AeadStream(self.file_key(file_salt, file_id), prefix, aad)
@@ -3,20 +3,35 @@ import json, struct, time, secrets
 from dataclasses import dataclass
 from typing import Dict, Any
 
+from . import buffers
+from .config import HEADER_MAX_BYTES
+from .exceptions import ConnectionClosed, ProtocolError
+
+# режими шифрування в полі "mode" заголовка
+MODE_WHOLE = "aesgcm+scrypt"            # увесь файл одним AESGCM.encrypt (старі sender-и)
+MODE_STREAM = "aesgcm-stream+scrypt"    # шматки фіксованого розміру, див. secure_crypto.AeadStream
+MODE_SESSION = "aesgcm-stream+hkdf"     # те саме, ключ файлу = HKDF(master сесії), див. secure_crypto.SessionKey
+
 def pack_header(h: Dict[str, Any]) -> bytes:
     raw = json.dumps(h, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
     return struct.pack(">I", len(raw)) + raw
 
-def recv_exact(sock, n: int) -> bytes:
-    buf = b""
-    while len(buf) < n:
-        chunk = sock.recv(n - len(buf))
-        if not chunk:
-            raise ConnectionError("Socket closed")
-        buf += chunk
-    return buf
+def recv_exact(sock, n: int) -> bytearray:
+    # один bytearray(n) + recv_into замість квадратичного buf += chunk; n має бути вже обмежене викликачем
+    return buffers.recv_exact(sock, n)
 
 def recv_header(sock) -> Dict[str, Any]:
-    ln = struct.unpack(">I", recv_exact(sock, 4))[0]
+    prefix = bytearray(4)
+    with memoryview(prefix) as view:
+        got = buffers.recv_exact_into(sock, view)
+    if got == 0:
+        # чисте закриття між кадрами = кінець сесії
+        raise ConnectionClosed("Connection closed")
+    if got != 4:
+        raise ConnectionError("Socket closed")
+    ln = struct.unpack(">I", prefix)[0]
+    # довжина з мережі, ще не автентифікована: перевіряємо до виділення буфера
+    if ln > HEADER_MAX_BYTES:
+        raise ProtocolError("Header too large")
     raw = recv_exact(sock, ln)
     return json.loads(raw.decode("utf-8"))
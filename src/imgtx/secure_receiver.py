@@ -1,81 +1,173 @@
 from __future__ import annotations
-import socket, time
+import os, socket, threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any
 from cryptography.exceptions import InvalidTag
 
-from .secure_protocol import recv_header, recv_exact
-from .secure_crypto import decrypt
+from .config import MAX_WORKERS, CLIENT_TIMEOUT_SEC
+from .buffers import recv_exact_into
+from .exceptions import ProtocolError
+from .protocol import TransferProgress
+from .secure_protocol import recv_header, recv_exact, pack_header, MODE_WHOLE, MODE_STREAM, MODE_SESSION
+from .secure_crypto import (
+    decrypt, derive_key, AeadStream, SessionKey, stream_chunks, stream_cipher_len, TAG_LEN, STREAM_MAX_CHUNK_SIZE,
+    WHOLE_MAX_CIPHER_LEN,
+)
+from .replay import ReplayCache, ReplayGuard, ReplayDetected, TimestampOutOfWindow, REPLAY_TTL_SEC
+from .serving import PooledServer
 
-class ReplayDetected(Exception):
-    pass
-
-class TimestampOutOfWindow(Exception):
-    pass
+SESSION_KEY_CACHE_SIZE = 256
 
 class DecryptFailed(Exception):
     pass
 
+# статуси відповіді в secure-сесії
+STATUS_OK = "ok"
+ERROR_STATUS = {
+    ReplayDetected: "replay_detected",
+    TimestampOutOfWindow: "timestamp_out_of_window",
+    DecryptFailed: "decrypt_failed",
+}
 
-class ReplayCache:
-    def __init__(self, ttl_sec: int = 300):
-        self.ttl = ttl_sec
-        self.seen: Dict[str, int] = {}
-
-    def check_and_mark(self, session_id: str, ts: int) -> None:
-        now = int(time.time())
-        # cleanup
-        for k, v in list(self.seen.items()):
-            if now - v > self.ttl:
-                del self.seen[k]
 
-        if session_id in self.seen:
-            raise ReplayDetected("REPLAY_DETECTED")
+class SecureReceiverServer(PooledServer):
+    # replay/timestamp відхиляються до прийому ciphertext, тож після них сесію не продовжити
+    recoverable_errors = (DecryptFailed,)
 
-        if abs(now - ts) > self.ttl:
-            raise TimestampOutOfWindow("TIMESTAMP_OUT_OF_WINDOW")
-
-        self.seen[session_id] = now
-
-class SecureReceiverServer:
-    def __init__(self, host: str, port: int, output_dir: str, password: str):
-        self.host = host
-        self.port = port
+    def __init__(self, host: str, port: int, output_dir: str, password: str,
+                 max_workers: int = MAX_WORKERS, client_timeout: float | None = CLIENT_TIMEOUT_SEC,
+                 replay_cache: ReplayGuard | None = None, progress: TransferProgress | None = None):
+        super().__init__(host, port, max_workers=max_workers, client_timeout=client_timeout)
         self.output_dir = Path(output_dir)
         self.password = password
-        self.cache = ReplayCache(ttl_sec=300)
+        # SqliteReplayCache(path) — спільний захист від повторів для кількох процесів
+        self.cache = replay_cache if replay_cache is not None else ReplayCache(ttl_sec=REPLAY_TTL_SEC)
+        self._session_keys: "OrderedDict[bytes, SessionKey]" = OrderedDict()
+        self._keys_lock = threading.Lock()
+        # progress(name, розшифровано байтів, plain_len) з потоку з'єднання; для MODE_WHOLE — одним викликом
+        self.progress = progress
 
     def serve_once(self) -> str:
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as srv:
-            srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            srv.bind((self.host, self.port))
-            srv.listen(1)
+        with self._bind(1) as srv:
             conn, _ = srv.accept()
 
+            results: list[str] = []
             with conn:
-                header = recv_header(conn)
-
-                session_id = header["session_id"]
-                ts = int(header["ts"])
-                self.cache.check_and_mark(session_id, ts)
-
-                ct = recv_exact(conn, int(header["cipher_len"]))
+                self._serve_connection(conn, results.append, None)
+            return results[-1]
 
-                salt = bytes.fromhex(header["salt"])
-                nonce = bytes.fromhex(header["nonce"])
-                aad_dict = header["aad"]
-                aad = str(aad_dict).encode("utf-8")
+    def _handle_client(self, conn: socket.socket) -> str:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        header = recv_header(conn)
+        session = bool(header.get("session", False))
+        try:
+            out_path = self._receive_file(conn, header)
+        except tuple(ERROR_STATUS) as e:
+            if session:
+                conn.sendall(pack_header({"status": ERROR_STATUS[type(e)], "error": str(e)}))
+            raise
+        if session:
+            conn.sendall(pack_header({"status": STATUS_OK}))
+        return out_path
+
+    def _receive_file(self, conn: socket.socket, header: Dict[str, Any]) -> str:
+        session_id = header["session_id"]
+        ts = int(header["ts"])
+        self.cache.check_and_mark(session_id, ts)
+
+        mode = header.get("mode", MODE_WHOLE)
+        if mode not in (MODE_WHOLE, MODE_STREAM, MODE_SESSION):
+            raise ProtocolError(f"Unsupported secure mode: {mode!r}")
+
+        salt = bytes.fromhex(header["salt"])
+        nonce = bytes.fromhex(header["nonce"])
+        aad_dict = header["aad"]
+        aad = str(aad_dict).encode("utf-8")
+
+        filename = os.path.basename(str(header["filename"]))
+        out_path = self.output_dir / f"{session_id}__{filename}"
+        # розшифровуємо в tmp і атомарно перейменовуємо: недописаний файл ніколи не видно під фінальним ім'ям
+        tmp_path = self.output_dir / f".tmp_{session_id}__{filename}"
+        try:
+            if mode == MODE_SESSION:
+                session_key = self._session_key(bytes.fromhex(header["session_salt"]))
+                key = session_key.file_key(salt, session_id)
+                self._decrypt_stream_to(conn, header, key, nonce, aad, tmp_path)
+            elif mode == MODE_STREAM:
+                self._decrypt_stream_to(conn, header, derive_key(self.password, salt), nonce, aad, tmp_path)
+            else:
+                cipher_len = int(header["cipher_len"])
+                if not TAG_LEN <= cipher_len <= WHOLE_MAX_CIPHER_LEN:
+                    raise ProtocolError("Bad cipher_len")
+                ct = recv_exact(conn, cipher_len)
                 # Якщо пароль не той / дані зіпсовані — тут впаде (tag mismatch)
                 try:
                     plaintext = decrypt(self.password, salt, nonce, ct, aad)
                 except InvalidTag:
                     raise DecryptFailed("DECRYPT_FAILED: invalid tag (ciphertext/header corrupted or wrong password)")
-
-                out_name = f"{session_id}__{header['filename']}"
-                out_path = self.output_dir / out_name
-                out_path.write_bytes(plaintext)
-
-                return str(out_path)
+                tmp_path.write_bytes(plaintext)
+                if self.progress is not None:
+                    self.progress(filename, len(plaintext), len(plaintext))
+            tmp_path.replace(out_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        return str(out_path)
+
+    def _session_key(self, session_salt: bytes) -> SessionKey:
+        """
+        Master key сесії: scrypt лише для нового session_salt, далі з кешу.
+        Кеш обмежений (LRU), щоб потік нових salt не їв пам'ять.
+        """
+        with self._keys_lock:
+            key = self._session_keys.get(session_salt)
+            if key is not None:
+                self._session_keys.move_to_end(session_salt)
+                return key
+        key = SessionKey(self.password, session_salt)  # scrypt поза lock
+        with self._keys_lock:
+            self._session_keys[session_salt] = key
+            while len(self._session_keys) > SESSION_KEY_CACHE_SIZE:
+                self._session_keys.popitem(last=False)
+        return key
+
+    def _decrypt_stream_to(self, conn: socket.socket, header: Dict[str, Any], key: bytes, nonce_prefix: bytes,
+                           aad: bytes, tmp_path: Path) -> None:
+        """
+        Прийом шматками: пам'ять = один буфер шматка, незалежно від розміру файлу.
+        Після невдалого tag дочитуємо решту шифротексту, щоб сесія лишалась синхронною.
+        """
+        chunk_size = int(header["chunk_size"])
+        plain_len = int(header["plain_len"])
+        if not 0 < chunk_size <= STREAM_MAX_CHUNK_SIZE or plain_len < 0:
+            raise ProtocolError("Bad stream parameters")
+        if int(header["cipher_len"]) != stream_cipher_len(plain_len, chunk_size):
+            raise ProtocolError("cipher_len does not match plain_len/chunk_size")
+
+        name = os.path.basename(str(header["filename"]))
+        stream = AeadStream(key, nonce_prefix, aad)
+        buf = bytearray(min(chunk_size, plain_len) + TAG_LEN)
+        view = memoryview(buf)
+        failed = False
+        try:
+            with tmp_path.open("wb") as f:
+                for off, n, last in stream_chunks(plain_len, chunk_size):
+                    ct = view[:n + TAG_LEN]
+                    if recv_exact_into(conn, ct) != len(ct):
+                        raise ConnectionError("Socket closed")
+                    if failed:
+                        continue
+                    try:
+                        f.write(stream.decrypt_chunk(ct, last))
+                    except InvalidTag:
+                        failed = True
+                        continue
+                    if self.progress is not None:
+                        self.progress(name, off + n, plain_len)
+        finally:
+            view.release()
+
+        if failed:
+            raise DecryptFailed("DECRYPT_FAILED: invalid tag (chunk corrupted, reordered, truncated or wrong password)")
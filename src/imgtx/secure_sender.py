@@ -1,20 +1,70 @@
 from __future__ import annotations
-import socket, time, secrets
+import contextlib, os, queue, socket, threading, time, secrets
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
-from .secure_crypto import encrypt
-from .secure_protocol import pack_header
+from .preflight import MappedFile, preflight_buffer
+from .secure_crypto import (
+    new_stream, stream_chunks, stream_cipher_len, AeadStream, SessionKey,
+    STREAM_CHUNK_SIZE, REKEY_AFTER_FILES, REKEY_AFTER_SEC,
+)
+from .secure_protocol import pack_header, recv_header, MODE_STREAM, MODE_SESSION
+from .protocol import Progress, TransferProgress
+from .secure_receiver import ERROR_STATUS, STATUS_OK
+from .exceptions import ProtocolError
+
+# скільки шматків може чекати між стадіями конвеєра (пам'ять ~ 2 * depth * chunk_size);
+# на одному ядрі стадії не перекриваються, і черги — лише накладні витрати
+PIPELINE_DEPTH = 4 if (os.cpu_count() or 1) > 1 else 0
 
 class SecureSender:
-    def __init__(self, host: str, port: int, password: str):
+    def __init__(self, host: str, port: int, password: str, chunk_size: int = STREAM_CHUNK_SIZE,
+                 rekey_after_files: int = REKEY_AFTER_FILES, rekey_after_sec: float = REKEY_AFTER_SEC,
+                 pipeline_depth: int = PIPELINE_DEPTH, progress: TransferProgress | None = None):
         self.host = host
         self.port = port
         self.password = password
+        self.chunk_size = chunk_size
+        self.rekey_after_files = rekey_after_files
+        self.rekey_after_sec = rekey_after_sec
+        self.pipeline_depth = pipeline_depth   # 0 = послідовно: шифрування і відправка в одному потоці
+        # progress(name, відправлено відкритих байтів, plain_len) після кожного шматка
+        self.progress = progress
 
     def send_image(self, path: str) -> Dict[str, Any]:
         p = Path(path)
-        data = p.read_bytes()
+        # з'єднання встановлюється, поки йдуть preflight і scrypt
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="imgtx-connect") as ex:
+            connecting = ex.submit(socket.create_connection, (self.host, self.port), 5)
+            try:
+                header, stream = self._prepare(p)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    connecting.result().close()
+                raise
+            sock = connecting.result()
+        with sock:
+            self._send_prepared(sock, p, header, stream)
+        return header
+
+    def open_session(self) -> "SecureSenderSession":
+        """Одне з'єднання для багатьох зашифрованих зображень; receiver підтверджує кожне."""
+        return SecureSenderSession(self, socket.create_connection((self.host, self.port), timeout=5))
+
+    def _send_file(self, sock: socket.socket, p: Path, session_key: SessionKey | None = None) -> Dict[str, Any]:
+        header, stream = self._prepare(p, session_key)
+        self._send_prepared(sock, p, header, stream)
+        return header
+
+    def _prepare(self, p: Path, session_key: SessionKey | None = None) -> Tuple[Dict[str, Any], AeadStream]:
+        """
+        Preflight (валідація з одного mmap) і ключ потоку.
+        Заголовок іде відкритим текстом, тож у ньому нема нічого про вміст файлу (sha256 тощо).
+        З session_key (сесія) ключ файлу — HKDF від master key, без scrypt на кожен файл.
+        """
+        with MappedFile(p) as data:
+            pf = preflight_buffer(data, p, fingerprint=False)
 
         session_id = secrets.token_hex(16)
         ts = int(time.time())
@@ -23,22 +73,162 @@ class SecureSender:
         aad_dict = {"session_id": session_id, "ts": ts, "filename": p.name}
         aad = str(aad_dict).encode("utf-8")
 
-        salt, nonce, ct = encrypt(self.password, data, aad)
+        if session_key is None:
+            salt, nonce_prefix, stream = new_stream(self.password, aad)
+        else:
+            salt, nonce_prefix, stream = session_key.new_stream(session_id, aad)
 
         header = {
-            "mode": "aesgcm+scrypt",
+            "mode": MODE_STREAM if session_key is None else MODE_SESSION,
             "session_id": session_id,
             "ts": ts,
             "filename": p.name,
             "salt": salt.hex(),
-            "nonce": nonce.hex(),
-            "aad": aad_dict,           # receiver відтворить AAD
-            "cipher_len": len(ct),
+            "nonce": nonce_prefix.hex(),   # префікс; лічильник шматка додається в nonce
+            "aad": aad_dict,               # receiver відтворить AAD
+            "chunk_size": self.chunk_size,
+            "plain_len": pf.size_bytes,
+            "cipher_len": stream_cipher_len(pf.size_bytes, self.chunk_size),
         }
+        if session_key is not None:
+            header["session"] = True
+            header["session_salt"] = session_key.salt.hex()   # salt для scrypt master key
+        return header, stream
+
+    def _send_prepared(self, sock: socket.socket, p: Path, header: Dict[str, Any], stream: AeadStream) -> None:
+        """Шифрує і відправляє файл шматками: пам'ять не залежить від розміру файлу."""
+        sock.sendall(pack_header(header))
+        plain_len = int(header["plain_len"])
+        report = None if self.progress is None else (lambda n: self.progress(p.name, n, plain_len))
+        if self.pipeline_depth > 0:
+            pipelined_encrypt_send(sock, p, plain_len, stream, self.chunk_size, self.pipeline_depth, report)
+            return
+        with MappedFile(p) as data, memoryview(data) as view:
+            for off, n, last in stream_chunks(plain_len, self.chunk_size):
+                sock.sendall(stream.encrypt_chunk(view[off:off + n], last))
+                if report is not None:
+                    report(off + n)
+
+
+def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _get(q: "queue.Queue", stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
+
 
-        payload = pack_header(header) + ct
+def pipelined_encrypt_send(sock: socket.socket, path: Path, plain_len: int, stream: AeadStream,
+                           chunk_size: int = STREAM_CHUNK_SIZE, depth: int = PIPELINE_DEPTH,
+                           progress: Progress | None = None) -> None:
+    """
+    Конвеєр читання -> шифрування -> відправка: диск, CPU і мережа працюють одночасно,
+    тож час наближається до max(read, encrypt, send), а не до їх суми.
+    Стадії з'єднані обмеженими чергами; помилка будь-якої стадії зупиняє решту.
+    progress викликається зі стадії відправки: скільки відкритих байтів уже в сокеті.
+    """
+    read_q: "queue.Queue" = queue.Queue(depth)
+    send_q: "queue.Queue" = queue.Queue(depth)
+    stop = threading.Event()
+    errors: list[BaseException] = []
 
-        with socket.create_connection((self.host, self.port), timeout=5) as s:
-            s.sendall(payload)
+    def reader() -> None:
+        try:
+            with path.open("rb", buffering=0) as f:
+                for off, n, last in stream_chunks(plain_len, chunk_size):
+                    buf = bytearray(n)
+                    if f.readinto(buf) != n:
+                        raise ProtocolError("File changed while sending")
+                    if not _put(read_q, (buf, off + n, last), stop):
+                        return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
 
+    def encryptor() -> None:
+        try:
+            while True:
+                item = _get(read_q, stop)
+                if item is None:
+                    return
+                buf, done, last = item
+                if not _put(send_q, (stream.encrypt_chunk(buf, last), done, last), stop):
+                    return
+                if last:
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [threading.Thread(target=reader, name="imgtx-read", daemon=True),
+               threading.Thread(target=encryptor, name="imgtx-encrypt", daemon=True)]
+    for t in threads:
+        t.start()
+    try:
+        while True:
+            item = _get(send_q, stop)
+            if item is None:
+                break
+            ct, done, last = item
+            sock.sendall(ct)
+            if progress is not None:
+                progress(done)
+            if last:
+                break
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+
+class SecureSenderSession:
+    """
+    scrypt виконується один раз на з'єднання (і після кожного rekey-інтервалу),
+    кожен файл шифрується власним HKDF-ключем.
+    """
+
+    def __init__(self, sender: SecureSender, sock: socket.socket):
+        self._sender = sender
+        self._sock = sock
+        self._key = SessionKey(sender.password)
+
+    def rekey(self) -> None:
+        """Новий master key (новий salt + scrypt) для наступних файлів."""
+        self._key = SessionKey(self._sender.password)
+
+    def send_image(self, path: str) -> Dict[str, Any]:
+        if self._key.expired(self._sender.rekey_after_files, self._sender.rekey_after_sec):
+            self.rekey()
+        header = self._sender._send_file(self._sock, Path(path), session_key=self._key)
+
+        reply = recv_header(self._sock)
+        status = reply.get("status")
+        if status != STATUS_OK:
+            for exc_type, exc_status in ERROR_STATUS.items():
+                if status == exc_status:
+                    raise exc_type(reply.get("error", status))
+            raise ProtocolError(f"Unexpected reply status: {status!r}")
         return header
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> "SecureSenderSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
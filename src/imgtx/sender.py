@@ -1,43 +1,295 @@
 from __future__ import annotations
+import logging
+import queue
+import secrets
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from .config import DEFAULT_HOST, DEFAULT_PORT, VERSION
-from .crypto import sha256_file
-from .image_utils import validate_image, pixel_fingerprint
-from .protocol import encode_header, send_file
+from .config import (
+    DEFAULT_HOST, DEFAULT_PORT, VERSION, SUPPORTED_VERSIONS, WIRE_VERSION, CHUNK_SIZE, RESUME_CHUNK_SIZE, RESUME_RETRIES,
+    RESUME_BACKOFF_SEC, STRIPES, STRIPE_RANGE_SIZE, STRIPE_MIN_RANGE_SIZE, STRIPE_MAX_RANGES, PROGRESS_STEP,
+    CDC_MAX_CHUNKS, RESUME_TIMEOUT_SEC,
+)
+from .exceptions import IntegrityError, ProtocolError
+from .metrics import StageTimer
+from .preflight import MappedFile, PreflightResult, preflight_buffer, preflight_image
+from .cdc import cdc_chunks, chunk_list, decode_bitmap
+from .compress import COMPRESS_NONE, check_compression, compression_offers, send_compressed
+from .protocol import (
+    encode_message, send_file, Progress, TransferProgress, recv_reply, raise_for_reply, STATUS_RESUME, STATUS_HAVE, STATUS_SEND, STATUS_CHUNKS,
+    STATUS_STRIPE,
+)
+from .resume import build_manifest, manifest_chunk_size, transfer_id_for
+from .verification import DEFAULT_VERIFY_LEVEL, check_level
+
+logger = logging.getLogger(__name__)
 
 class Sender:
-    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verify: str = DEFAULT_VERIFY_LEVEL,
+                 resume: bool = False, retries: int = RESUME_RETRIES, resume_chunk_size: int = RESUME_CHUNK_SIZE,
+                 dedup: bool = False, cdc: bool = False, compression: str = COMPRESS_NONE,
+                 stripes: int = STRIPES, stripe_range_size: int = STRIPE_RANGE_SIZE, wire_version: int = WIRE_VERSION,
+                 progress: TransferProgress | None = None, resume_timeout: float = RESUME_TIMEOUT_SEC):
         self.host = host
         self.port = port
+        # формат кадру заголовка: 2 — бінарна преамбула; 1 — для receiver-ів, що не знають v2
+        self.wire_version = check_wire_version(wire_version)
+        # рівень перевірки, який sender просить у receiver-а (receiver може вимагати суворіший)
+        self.verify = check_level(verify)
+        # resume: після обриву перепідключитися і дослати лише те, чого receiver ще не має
+        self.resume = resume
+        self.retries = retries
+        self.resume_chunk_size = resume_chunk_size
+        self.resume_timeout = resume_timeout
+        # dedup: спершу спитати, чи receiver уже має цей sha256; якщо так — тіло не надсилається
+        self.dedup = dedup
+        # cdc: блокова дедуплікація — надсилаються лише шматки, яких нема у сховищі receiver-а
+        if cdc and resume:
+            raise ValueError("cdc and resume cannot be combined")
+        self.cdc = cdc
+        # compression: none / auto (за форматом і пробою) / конкретний кодек; receiver обирає з пропозиції.
+        # resume і cdc працюють зі зміщеннями в оригінальних байтах, тож там тіло не стискається
+        self.compression = check_compression(compression)
+        # stripes > 1: файл більший за stripe_range_size іде діапазонами через кілька з'єднань
+        if stripes < 1 or stripe_range_size < STRIPE_MIN_RANGE_SIZE:
+            raise ValueError(f"stripes must be >= 1 and stripe_range_size >= {STRIPE_MIN_RANGE_SIZE}")
+        if stripes > 1 and (cdc or resume or dedup or compression != COMPRESS_NONE):
+            raise ValueError("striped transfer cannot be combined with cdc, resume, dedup or compression")
+        self.stripes = stripes
+        self.stripe_range_size = stripe_range_size
+        # progress(name, sent, total) з потоку відправки; для stripes — з потоків з'єднань, сумарно по файлу
+        self.progress = progress
 
     def send_image(self, path: str) -> dict:
+        """
+        Повертає надісланий заголовок; "deduplicated": True, якщо тіло не знадобилось,
+        "bytes_sent" — байти тіла в мережі, "timings" — тривалості стадій sender-а (секунди);
+        в режимі cdc — ще "bytes_saved", зі стисненням — "encoding".
+        """
         p = Path(path)
-        info = validate_image(p)
-        digest = sha256_file(p)
-        px = pixel_fingerprint(p)
+        timer = StageTimer()
+        if self.cdc:
+            result = self._send_cdc(p, timer)
+        elif self.resume:
+            result = self._send_resumable(p, timer)
+        elif self.stripes > 1 and p.stat().st_size > self.stripe_range_size:
+            result = self._send_striped(p, timer)
+        else:
+            with timer.stage("preflight"):
+                header = self.plain_header(p, self.verify, self.dedup, self.compression)
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                with timer.stage("connect"):
+                    s.connect((self.host, self.port))
+                result = send_body(s, p, header, timer, self.wire_version, self.progress)
+        result["timings"] = timer.stages
+        return result
 
-        header = {
-            "version": VERSION,
-            "filename": p.name,
-            "content_type": self._content_type_from_format(info.format),
-            "size_bytes": p.stat().st_size,
-            "sha256": digest,
-            "width": info.width,
-            "height": info.height,
-            "pixel_fp": px,  # корисно для тестів/логів (можна не використовувати на приймачі)
-        }
+    def _send_cdc(self, p: Path, timer: StageTimer) -> dict:
+        with MappedFile(p) as buf:
+            with timer.stage("preflight"):
+                header = self.build_header(p, buf, self.verify)
+            with timer.stage("chunking"):
+                spans = cdc_chunks(buf)
+                if len(spans) > CDC_MAX_CHUNKS:
+                    raise ValueError(f"{p.name}: {len(spans)} chunks, receivers accept at most {CDC_MAX_CHUNKS}; "
+                                     "send it without cdc")
+                _digests, frame = chunk_list(buf, spans)
+            header["cdc"] = True
+            header["chunk_count"] = len(spans)
+
+            sent = 0
+            with socket.create_connection((self.host, self.port)) as s:
+                with timer.stage("send"):
+                    # список шматків — одним записом із заголовком
+                    s.sendall(encode_message(header, self.wire_version, len(frame)) + frame)
+                with timer.stage("reply"):
+                    reply = recv_reply(s)
+                if reply.get("status") != STATUS_CHUNKS:
+                    raise_for_reply(reply)
+                    raise ProtocolError(f"Unexpected reply status: {reply.get('status')!r}")
+                missing = decode_bitmap(reply["missing"], len(spans))
+                size = header["size_bytes"]
+                reported = 0
+                with timer.stage("send"), memoryview(buf) as view:
+                    for (off, n), need in zip(spans, missing):
+                        if need:
+                            s.sendall(view[off:off + n])
+                            sent += n
+                        # прогрес — позиція у файлі (шматки, які receiver уже має, теж пройдені), не частіше PROGRESS_STEP
+                        if self.progress is not None and (off + n - reported >= PROGRESS_STEP or off + n == size):
+                            reported = off + n
+                            self.progress(p.name, reported, size)
+                with timer.stage("reply"):
+                    raise_for_reply(recv_reply(s))
+
+        logger.info("%s: sent %d of %d bytes", p.name, sent, header["size_bytes"])
+        return {**header, "bytes_sent": sent, "bytes_saved": header["size_bytes"] - sent}
+
+    def _send_striped(self, p: Path, timer: StageTimer) -> dict:
+        """
+        Діапазони по stripe_range_size розбираються з черги stripes з'єднаннями (швидше з'єднання
+        бере більше). Receiver відповідає на кожен діапазон; на останній — підсумком перевірки.
+        """
+        with timer.stage("preflight"):
+            header = self.build_header(p, None, self.verify)
+        # receiver приймає не більше STRIPE_MAX_RANGES діапазонів — для дуже великих файлів діапазон росте
+        size = header["size_bytes"]
+        rs = max(self.stripe_range_size, -(-size // STRIPE_MAX_RANGES))
+        # id нової спроби щоразу новий: діапазони недокачаної попередньої спроби не заважають
+        header["stripe"] = {"id": secrets.token_hex(16), "range_size": rs}
+        ranges: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+        for off in range(0, size, rs):
+            ranges.put(off)
+        sent_total = 0
+        progress_lock = threading.Lock()
+
+        def range_progress() -> Progress | None:
+            """progress для одного діапазону: send_file рахує від початку діапазону, колбек отримує суму по файлу."""
+            if self.progress is None:
+                return None
+            last = 0
+
+            def report(n: int) -> None:
+                nonlocal last, sent_total
+                with progress_lock:
+                    sent_total += n - last
+                    last = n
+                    self.progress(p.name, sent_total, size)
+            return report
 
-        payload = encode_header(header)
+        def next_range() -> int | None:
+            try:
+                return ranges.get_nowait()
+            except queue.Empty:
+                return None
 
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((self.host, self.port))
-            s.sendall(payload)
-            send_file(s, str(p))
+        def stripe_worker() -> dict | None:
+            # діапазон береться до підключення: з'єднання без жодного діапазону не відкривається
+            off, final = next_range(), None
+            if off is None:
+                return None
+            with socket.create_connection((self.host, self.port)) as s:
+                while off is not None:
+                    n = min(rs, size - off)
+                    s.sendall(encode_message({**header, "stripe": {**header["stripe"], "offset": off, "length": n}},
+                                             self.wire_version, n))
+                    send_file(s, str(p), offset=off, count=n, progress=range_progress())
+                    reply = recv_reply(s)
+                    if reply.get("status") != STATUS_STRIPE:
+                        raise_for_reply(reply)
+                        final = reply
+                    off = next_range()
+            return final
 
+        workers = min(self.stripes, -(-size // rs))
+        with timer.stage("send"):
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imgtx-stripe") as pool:
+                futures = [pool.submit(stripe_worker) for _ in range(workers)]
+        finals = [f.result() for f in futures]   # перший виняток з'єднання піднімається тут
+        if not any(finals):
+            raise IntegrityError("Striped transfer finished without a final reply")
+        return {**header, "stripes": workers, "bytes_sent": size}
+
+    def resumable_header(self, p: Path) -> dict:
+        """Заголовок з transfer_id і маніфестом шматків (preflight і хеші — з одного mmap)."""
+        with MappedFile(p) as buf:
+            header = self.build_header(p, buf, self.verify)
+            header["transfer_id"] = transfer_id_for(header["sha256"], p.name)
+            header["manifest"] = build_manifest(buf, manifest_chunk_size(len(buf), self.resume_chunk_size))
+        if self.dedup:
+            header["dedup"] = True
         return header
 
+    def _send_resumable(self, p: Path, timer: StageTimer) -> dict:
+        with timer.stage("preflight"):
+            header = self.resumable_header(p)
+        header["version"] = self.wire_version   # формат кадру для _send_remainder
+        for attempt in range(self.retries + 1):
+            try:
+                with timer.stage("send"), socket.create_connection((self.host, self.port), self.resume_timeout) as s:
+                    offset = self._send_remainder(s, p, header, progress=self.progress)
+                if offset is None:
+                    return {**header, "deduplicated": True, "bytes_sent": 0}
+                return {**header, "bytes_sent": header["size_bytes"] - offset}
+            except (OSError, IntegrityError) as e:
+                # обрив, socket.timeout (теж OSError) або шматок, відкинутий за маніфестом:
+                # наступна спроба продовжить з offset-у receiver-а
+                if attempt == self.retries:
+                    raise
+                logger.warning("transfer of %s interrupted (%s), resuming", p.name, e)
+                time.sleep(RESUME_BACKOFF_SEC * (2 ** attempt))
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    def _send_remainder(sock: socket.socket, p: Path, header: dict,
+                        progress: TransferProgress | None = None) -> int | None:
+        """
+        Заголовок -> offset від receiver-а -> байти [offset, size) -> підсумкова відповідь.
+        None — receiver уже має ці байти (dedup), тіло не надсилалось. progress рахує від початку файлу.
+        """
+        sock.sendall(encode_message(header, header["version"]))
+        reply = recv_reply(sock)
+        if reply.get("status") == STATUS_HAVE:
+            return None
+        if reply.get("status") != STATUS_RESUME:
+            raise_for_reply(reply)
+            raise ProtocolError("Receiver did not answer with a resume offset")
+        offset = int(reply["offset"])
+        if not 0 <= offset <= header["size_bytes"]:
+            raise ProtocolError(f"Bad resume offset: {offset}")
+        size = header["size_bytes"]
+        report = None if progress is None else (lambda n: progress(p.name, offset + n, size))
+        send_file(sock, str(p), offset=offset, progress=report)
+        raise_for_reply(recv_reply(sock))
+        return offset
+
+    def open_session(self) -> "SenderSession":
+        """Одне TCP-з'єднання для багатьох зображень (без handshake/slow-start на кожен файл)."""
+        return SenderSession(socket.create_connection((self.host, self.port)), verify=self.verify, dedup=self.dedup,
+                             compression=self.compression, wire_version=self.wire_version, progress=self.progress)
+
+    @classmethod
+    def plain_header(cls, p: Path, level: str, dedup: bool = False, compression: str = COMPRESS_NONE) -> dict:
+        """Заголовок звичайної передачі: "dedup" і пропозиція кодеків "compress", якщо вони потрібні."""
+        if compression == COMPRESS_NONE:
+            # preflight читає файл один раз; тіло йде через sendfile прямо з page cache
+            header = cls.build_header(p, None, level)
+        else:
+            with MappedFile(p) as buf:
+                header = cls.build_header(p, buf, level)
+                offers = compression_offers(compression, header["content_type"].split("/")[-1], buf)
+            if offers:
+                header["compress"] = offers
+        if dedup:
+            header["dedup"] = True
+        return header
+
+    @classmethod
+    def build_header(cls, p: Path, buf=None, level: str = DEFAULT_VERIFY_LEVEL) -> dict:
+        """
+        buf — вже прочитаний вміст файлу (MappedFile); якщо None, файл читається тут.
+        level визначає, який fingerprint рахується (reduced/full) і що просимо перевірити.
+        """
+        pf = preflight_image(p, level=level) if buf is None else preflight_buffer(buf, p, level=level)
+        return cls.header_from_preflight(p, pf, level)
+
+    @classmethod
+    def header_from_preflight(cls, p: Path, pf: PreflightResult, level: str = DEFAULT_VERIFY_LEVEL) -> dict:
+        return {
+            "version": VERSION,
+            "filename": p.name,
+            "content_type": cls._content_type_from_format(pf.info.format),
+            "size_bytes": pf.size_bytes,
+            "sha256": pf.sha256,
+            "width": pf.info.width,
+            "height": pf.info.height,
+            "pixel_fp": pf.pixel_fp,  # корисно для тестів/логів (можна не використовувати на приймачі)
+            "verify": level,
+        }
+
     @staticmethod
     def _content_type_from_format(fmt: str) -> str:
         fmt = fmt.upper()
@@ -46,3 +298,99 @@ class Sender:
         if fmt == "PNG":
             return "image/png"
         return f"image/{fmt.lower()}"
+
+
+def check_wire_version(version: int) -> int:
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"unknown wire version {version!r}, expected one of {SUPPORTED_VERSIONS}")
+    return version
+
+
+def send_body(sock: socket.socket, p: Path, header: dict, timer: StageTimer | None = None,
+              wire_version: int = WIRE_VERSION, progress: TransferProgress | None = None) -> dict:
+    """
+    Заголовок -> (відповідь до тіла, якщо просили "dedup"/"compress") -> тіло.
+    Receiver відповідає "have" (тіло не потрібне) або "send" з обраним "encoding" (None — як є).
+    Повертає заголовок з "bytes_sent" (байти тіла в мережі); timer отримує стадії "reply" і "send",
+    progress — відправлені байти оригіналу (для стиснутого тіла — одним викликом наприкінці).
+    """
+    timer = timer or StageTimer()
+    size = header["size_bytes"]
+    report = None if progress is None else (lambda n: progress(header["filename"], n, size))
+    awaits_reply = bool(header.get("dedup") or header.get("compress"))
+    frame = encode_message(header, wire_version, 0 if awaits_reply else size)
+    if not awaits_reply and size <= CHUNK_SIZE:
+        # мале тіло — одним записом із заголовком: без затримки Nagle/delayed ACK між двома дрібними сегментами
+        with timer.stage("send"):
+            body = p.read_bytes()
+            sock.sendall(frame + body)
+        if report is not None:
+            report(len(body))
+        return {**header, "bytes_sent": len(body)}
+    with timer.stage("send"):
+        sock.sendall(frame)
+    encoding = None
+    if awaits_reply:
+        with timer.stage("reply"):
+            reply = recv_reply(sock)
+        status = reply.get("status")
+        if status == STATUS_HAVE:
+            return {**header, "deduplicated": True, "bytes_sent": 0}
+        if status != STATUS_SEND:
+            raise_for_reply(reply)
+            raise ProtocolError(f"Unexpected reply status: {status!r}")
+        encoding = reply.get("encoding")
+        if encoding is not None and encoding not in header.get("compress", ()):
+            raise ProtocolError(f"Receiver chose an encoding that was not offered: {encoding!r}")
+
+    with timer.stage("send"):
+        if encoding is None:
+            return {**header, "bytes_sent": send_file(sock, str(p), progress=report)}
+        with p.open("rb") as f:
+            wire = send_compressed(sock, f, encoding)
+    if report is not None:
+        report(size)
+    logger.info("%s: %s, %d -> %d bytes", p.name, encoding, size, wire)
+    return {**header, "encoding": encoding, "bytes_sent": wire}
+
+
+class SenderSession:
+    """
+    Сесія: кілька header+payload кадрів одним з'єднанням.
+    Receiver відповідає на кожне зображення (ok / integrity_error / invalid_image).
+    """
+
+    def __init__(self, sock: socket.socket, verify: str = DEFAULT_VERIFY_LEVEL, dedup: bool = False,
+                 compression: str = COMPRESS_NONE, wire_version: int = WIRE_VERSION,
+                 progress: TransferProgress | None = None):
+        self._sock = sock
+        self.verify = check_level(verify)
+        self.dedup = dedup
+        self.compression = check_compression(compression)
+        self.wire_version = check_wire_version(wire_version)
+        self.progress = progress
+
+    def send_image(self, path: str) -> dict:
+        p = Path(path)
+        timer = StageTimer()
+        with timer.stage("preflight"):
+            header = Sender.plain_header(p, self.verify, self.dedup, self.compression)
+        header["session"] = True
+
+        result = send_body(self._sock, p, header, timer, self.wire_version, self.progress)
+        # збіг за sha256: відповідь "have" і є підсумком для цього зображення
+        if not result.get("deduplicated"):
+            # IntegrityError / InvalidImageError, якщо receiver відхилив; сесія лишається робочою
+            with timer.stage("reply"):
+                raise_for_reply(recv_reply(self._sock))
+        result["timings"] = timer.stages
+        return result
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> "SenderSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
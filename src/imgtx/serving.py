@@ -0,0 +1,130 @@
+from __future__ import annotations
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from .config import MAX_WORKERS, LISTEN_BACKLOG, ACCEPT_POLL_SEC, CLIENT_TIMEOUT_SEC
+from .exceptions import ConnectionClosed
+
+logger = logging.getLogger(__name__)
+
+ResultCallback = Callable[[Any], None]
+ErrorCallback = Callable[[BaseException], None]
+
+
+class PooledServer:
+    """
+    Base for receivers: one listening socket, accepted connections go to a
+    bounded thread pool that runs ``_handle_client(conn)``.
+    """
+
+    # помилки, після яких потік даних лишається синхронним і сесію можна продовжити
+    recoverable_errors: Tuple[type, ...] = ()
+
+    def __init__(self, host: str, port: int, max_workers: int = MAX_WORKERS,
+                 client_timeout: Optional[float] = CLIENT_TIMEOUT_SEC):
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.client_timeout = client_timeout
+        self.server_address: Optional[Tuple[str, int]] = None
+        self._shutdown_request = threading.Event()
+        self._stopped = threading.Event()
+        self._stopped.set()
+
+    def _handle_client(self, conn: socket.socket) -> Any:
+        raise NotImplementedError
+
+    def _serve_connection(self, conn: socket.socket, on_result: Optional[ResultCallback],
+                          on_error: Optional[ErrorCallback]) -> None:
+        """
+        Викликати _handle_client, доки peer не закриє з'єднання (сесія з кількох зображень).
+        Клієнт з одним зображенням просто закриває сокет після payload.
+        """
+        served = 0
+        while served == 0 or not self._shutdown_request.is_set():
+            try:
+                result = self._handle_client(conn)
+            except ConnectionClosed:
+                if served == 0:
+                    raise
+                return
+            except self.recoverable_errors as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            else:
+                # None — кадр не завершив зображення (напр. один діапазон striped передачі)
+                if on_result is not None and result is not None:
+                    on_result(result)
+            served += 1
+
+    def _bind(self, backlog: int) -> socket.socket:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind((self.host, self.port))
+            s.listen(backlog)
+        except BaseException:
+            s.close()
+            raise
+        self.server_address = s.getsockname()[:2]
+        return s
+
+    def serve_forever(self, on_result: Optional[ResultCallback] = None,
+                      on_error: Optional[ErrorCallback] = None) -> None:
+        """
+        Приймати з'єднання, доки не викликано shutdown().
+        Не більше max_workers передач одночасно; решта чекає в backlog ядра.
+        """
+        self._shutdown_request.clear()
+        self._stopped.clear()
+        slots = threading.BoundedSemaphore(self.max_workers)
+        try:
+            with self._bind(LISTEN_BACKLOG) as srv, \
+                    ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="imgtx-recv") as pool:
+                srv.settimeout(ACCEPT_POLL_SEC)
+                while not self._shutdown_request.is_set():
+                    # не приймаємо більше, ніж можемо обробити
+                    if not slots.acquire(timeout=ACCEPT_POLL_SEC):
+                        continue
+                    try:
+                        conn, _addr = srv.accept()
+                    except socket.timeout:
+                        slots.release()
+                        continue
+                    except OSError:
+                        slots.release()
+                        if self._shutdown_request.is_set():
+                            break
+                        raise
+                    conn.settimeout(self.client_timeout)
+                    pool.submit(self._run_client, conn, slots, on_result, on_error)
+                # вихід з with чекає завершення активних передач (graceful shutdown)
+        finally:
+            self._stopped.set()
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """
+        Зупинити serve_forever: нові з'єднання більше не приймаються,
+        активні передачі завершуються. Повертає True, якщо сервер зупинився за timeout.
+        """
+        self._shutdown_request.set()
+        return self._stopped.wait(timeout)
+
+    def _run_client(self, conn: socket.socket, slots: threading.BoundedSemaphore,
+                    on_result: Optional[ResultCallback], on_error: Optional[ErrorCallback]) -> None:
+        try:
+            with conn:
+                self._serve_connection(conn, on_result, on_error)
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                logger.exception("client handling failed")
+        finally:
+            slots.release()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from .buffers import recv_exact_into
+from .config import (
+    STRIPE_IDLE_SEC, STRIPE_MIN_RANGE_SIZE, STRIPE_MAX_RANGES, STRIPE_MAX_FILE_SIZE, STRIPE_MAX_ACTIVE,
+    STRIPE_MAX_RESERVED,
+)
+from .exceptions import ProtocolError
+from .resume import TRANSFER_ID_RE, sweep_stale
+
+# Striped передача: sender відкриває кілька з'єднань, кожне шле свої діапазони того самого файлу
+# (заголовок з "stripe": {"id", "range_size", "offset", "length"} + байти діапазону).
+# Receiver пише кожен діапазон на його місце в заздалегідь виділений tmp-файл (pwrite),
+# відповідає "stripe" з кількістю байтів, що ще бракує, а з'єднання, яке доставило
+# останній діапазон, хешує файл, перевіряє зображення і відповідає підсумком.
+
+_PENDING, _RECEIVING, _DONE = 0, 1, 2
+_SCRATCH = 1024 * 1024
+
+
+class StripedTransfer:
+    """Стан одного striped файлу на receiver-і; діапазони можуть приходити в будь-якому порядку."""
+
+    def __init__(self, output_dir: Path, header: Dict, max_size: int = STRIPE_MAX_FILE_SIZE):
+        stripe = header.get("stripe") or {}
+        transfer_id = str(stripe.get("id", ""))
+        if not TRANSFER_ID_RE.match(transfer_id):
+            raise ProtocolError("Bad stripe id")
+        self.transfer_id = transfer_id
+        self.header = header
+        self.size = int(header["size_bytes"])
+        self.sha256 = str(header["sha256"]).lower()
+        self.range_size = int(stripe.get("range_size", 0))
+        if self.range_size < STRIPE_MIN_RANGE_SIZE or self.size <= 0:
+            raise ProtocolError("Bad stripe parameters")
+        if self.size > max_size:
+            raise ProtocolError(f"Striped file larger than {max_size} bytes")
+        if -(-self.size // self.range_size) > STRIPE_MAX_RANGES:
+            raise ProtocolError(f"More than {STRIPE_MAX_RANGES} stripe ranges")
+        self._state = bytearray(-(-self.size // self.range_size))
+        self._pending = self.size
+        self._lock = threading.Lock()
+        self.touched = time.monotonic()
+
+        self.tmp_path = output_dir / f".stripe_{transfer_id}"
+        self._fd = os.open(self.tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            _preallocate(self._fd, self.size)
+        except BaseException:
+            self.close()
+            self.tmp_path.unlink(missing_ok=True)
+            raise
+
+    def matches(self, header: Dict) -> bool:
+        stripe = header.get("stripe") or {}
+        return (int(header["size_bytes"]) == self.size and str(header["sha256"]).lower() == self.sha256
+                and int(stripe.get("range_size", 0)) == self.range_size)
+
+    @property
+    def idle(self) -> bool:
+        with self._lock:
+            return _RECEIVING not in self._state
+
+    def claim(self, offset: int, length: int) -> int:
+        """Індекс діапазону; ProtocolError, якщо діапазон не вирівняний або вже приймається/прийнятий."""
+        if offset < 0 or offset % self.range_size or length != min(self.range_size, self.size - offset):
+            raise ProtocolError("Bad stripe range")
+        index = offset // self.range_size
+        with self._lock:
+            if self._state[index] != _PENDING:
+                raise ProtocolError(f"Stripe range {index} sent twice")
+            self._state[index] = _RECEIVING
+            self.touched = time.monotonic()
+        return index
+
+    def receive(self, sock: socket.socket, index: int, initial: bytes | memoryview = b"") -> int:
+        """
+        Прийняти діапазон index і записати на його місце. Повертає, скільки байтів файлу ще бракує
+        (0 — файл повний). Обрив -> ConnectionError, діапазон можна надіслати знову.
+        """
+        offset = index * self.range_size
+        length = min(self.range_size, self.size - offset)
+        try:
+            pos = len(initial)
+            if pos:
+                self._pwrite(initial, offset)
+            scratch = bytearray(min(_SCRATCH, length - pos) or 1)
+            with memoryview(scratch) as view:
+                while pos < length:
+                    n = min(len(scratch), length - pos)
+                    if recv_exact_into(sock, view[:n]) != n:
+                        raise ConnectionError("Socket closed")
+                    self._pwrite(view[:n], offset + pos)
+                    pos += n
+        except BaseException:
+            with self._lock:
+                self._state[index] = _PENDING
+            raise
+        with self._lock:
+            self._state[index] = _DONE
+            self._pending -= length
+            self.touched = time.monotonic()
+            return self._pending
+
+    def _pwrite(self, data, offset: int) -> None:
+        with memoryview(data) as view:
+            while len(view):
+                n = _pwrite(self._fd, view, offset, self._lock)
+                view, offset = view[n:], offset + n
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def discard(self) -> None:
+        self.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class StripeRegistry:
+    """Спільні для всіх з'єднань receiver-а striped передачі за id."""
+
+    def __init__(self, idle_sec: float = STRIPE_IDLE_SEC, max_size: int = STRIPE_MAX_FILE_SIZE,
+                 max_active: int = STRIPE_MAX_ACTIVE, max_reserved: int = STRIPE_MAX_RESERVED):
+        self.idle_sec = idle_sec
+        # найбільший файл, під який receiver погоджується заздалегідь виділити місце на диску
+        self.max_size = max_size
+        # id не автентифікований: без цих меж кожен новий id — ще max_size байтів fallocate
+        self.max_active = max_active
+        self.max_reserved = max_reserved
+        self._transfers: Dict[str, StripedTransfer] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._transfers)
+
+    def open(self, output_dir: Path, header: Dict) -> StripedTransfer:
+        transfer_id = str((header.get("stripe") or {}).get("id", ""))
+        with self._lock:
+            self._expire()
+            transfer = self._transfers.get(transfer_id)
+            if transfer is None:
+                if len(self._transfers) >= self.max_active:
+                    raise ProtocolError(f"More than {self.max_active} striped transfers in progress")
+                reserved = sum(t.size for t in self._transfers.values())
+                if reserved + int(header["size_bytes"]) > self.max_reserved:
+                    raise ProtocolError(f"Striped transfers would reserve more than {self.max_reserved} bytes")
+                transfer = StripedTransfer(output_dir, header, self.max_size)
+                self._transfers[transfer_id] = transfer
+            elif not transfer.matches(header):
+                raise ProtocolError("Stripe header does not match the transfer in progress")
+            return transfer
+
+    def finish(self, transfer: StripedTransfer) -> None:
+        """Файл повний: прибрати з реєстру і закрити дескриптор (tmp-файл лишається для перевірки)."""
+        with self._lock:
+            self._transfers.pop(transfer.transfer_id, None)
+        transfer.close()
+
+    def sweep(self, output_dir: Path) -> int:
+        """
+        Прибрати .stripe_* без активності довше за idle_sec, яких нема в реєстрі
+        (лишились після падіння receiver-а). Повертає кількість файлів.
+        """
+        with self._lock:
+            return sweep_stale(output_dir, self.idle_sec, self._transfers.keys(), prefix=".stripe_")
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for tid, t in list(self._transfers.items()):
+            if now - t.touched > self.idle_sec and t.idle:
+                del self._transfers[tid]
+                t.discard()
+
+    def close(self) -> None:
+        with self._lock:
+            transfers, self._transfers = list(self._transfers.values()), {}
+        for t in transfers:
+            t.discard()
+
+
+def _preallocate(fd: int, size: int) -> None:
+    # справжнє резервування місця, де є; інакше (або якщо ФС не вміє) — розріджений файл потрібної довжини
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
+def _pwrite(fd: int, data, offset: int, lock: threading.Lock) -> int:
+    if hasattr(os, "pwrite"):
+        return os.pwrite(fd, data, offset)
+    with lock:   # без pwrite (Windows): seek + write атомарно для інших потоків цього файлу
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.write(fd, data)
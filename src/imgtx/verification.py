@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+
+from .exceptions import ProtocolError
+from .image_utils import ImageInfo, ImageSource, probe_image, validate_image, pixel_fingerprint, reduced_fingerprint
+from .metrics import StageTimer
+
+# Рівні перевірки зображення, від найдешевшого до найсуворішого.
+#   sha-only  — лише sha256 (метадані з заголовка файлу, без декодування)
+#   structure — + Image.verify() і перевірка розмірів
+#   reduced   — + fingerprint зменшеного декодування (reduced_fingerprint)
+#   full      — + fingerprint повного RGB декодування (pixel_fingerprint)
+VERIFY_SHA_ONLY = "sha-only"
+VERIFY_STRUCTURE = "structure"
+VERIFY_REDUCED = "reduced"
+VERIFY_FULL = "full"
+VERIFY_LEVELS = (VERIFY_SHA_ONLY, VERIFY_STRUCTURE, VERIFY_REDUCED, VERIFY_FULL)
+DEFAULT_VERIFY_LEVEL = VERIFY_FULL
+
+
+def check_level(level: str) -> str:
+    if level not in VERIFY_LEVELS:
+        raise ValueError(f"Unknown verify level {level!r}, expected one of {', '.join(VERIFY_LEVELS)}")
+    return level
+
+
+def negotiate_level(local: str, requested: Optional[str]) -> str:
+    """
+    Рівень для конкретного зображення: суворіший з політики receiver-а і запиту sender-а
+    (поле "verify" в заголовку). Без поля — політика receiver-а.
+    """
+    if requested is None:
+        return local
+    if requested not in VERIFY_LEVELS:
+        raise ProtocolError(f"Unknown verify level: {requested!r}")
+    return max(local, requested, key=VERIFY_LEVELS.index)
+
+
+def fingerprint_for_level(src: ImageSource, level: str, name: str | None = None) -> Optional[str]:
+    """Fingerprint, який відповідає рівню (None для sha-only/structure)."""
+    if level == VERIFY_FULL:
+        return pixel_fingerprint(src, name=name)
+    if level == VERIFY_REDUCED:
+        return reduced_fingerprint(src, name=name)
+    return None
+
+
+def check_image(src: ImageSource, level: str, name: str | None = None,
+                timer: StageTimer | None = None) -> Tuple[ImageInfo, Optional[str]]:
+    """
+    Перевірки, що входять у level (sha256 — окремо): (ImageInfo, fingerprint або None).
+    timer (якщо є) отримує стадії "validate" і "fingerprint".
+    """
+    timer = timer or StageTimer()
+    with timer.stage("validate"):
+        info = probe_image(src, name=name) if level == VERIFY_SHA_ONLY else validate_image(src, name=name)
+    if level in (VERIFY_SHA_ONLY, VERIFY_STRUCTURE):
+        return info, None
+    with timer.stage("fingerprint"):
+        return info, fingerprint_for_level(src, level, name=name)
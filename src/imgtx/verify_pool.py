@@ -0,0 +1,94 @@
+from __future__ import annotations
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+from .config import VERIFY_TIMEOUT_SEC
+from .exceptions import VerificationTimeout
+from .receiver import ReceiveResult, verify_and_store
+from .verification import DEFAULT_VERIFY_LEVEL
+
+logger = logging.getLogger(__name__)
+
+
+def _mp_context():
+    # не fork: дочірній процес успадкував би відкриті сокети клієнтів
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class VerifyPool:
+    """
+    Перевірка зображень (sha256, декодування, fingerprint) в окремих процесах:
+    важке декодування не тримає GIL потоків, що приймають дані з мережі.
+
+    Одночасно в пулі не більше processes задач; решта чекає на слот (обмежена черга —
+    потоки з'єднань, яких не більше max_workers сервера). Таймаут рахується від початку
+    виконання задачі; після таймауту пул перезапускається, бо процес із задачею не скасувати.
+    """
+
+    def __init__(self, processes: Optional[int] = None, timeout: Optional[float] = VERIFY_TIMEOUT_SEC):
+        self.processes = processes or os.cpu_count() or 1
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.processes)
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.processes, mp_context=_mp_context())
+
+    def verify(self, output_dir: Path, header: dict, tmp_path: Path, actual_sha: str | None = None,
+               policy: str = DEFAULT_VERIFY_LEVEL) -> ReceiveResult:
+        """Як verify_and_store(), але в процесі пулу. Блокує лише потік, що викликав."""
+        with self._slots:
+            for attempt in (1, 2):
+                with self._lock:
+                    pool = self._pool
+                fut = pool.submit(verify_and_store, output_dir, header, tmp_path, actual_sha, policy)
+                try:
+                    return fut.result(timeout=self.timeout)
+                except FutureTimeout:
+                    self._recycle(pool)
+                    raise VerificationTimeout(f"Image verification exceeded {self.timeout}s")
+                except BrokenProcessPool:
+                    # пул перезапустили через чужий таймаут — пробуємо ще раз у новому
+                    with self._lock:
+                        recycled = pool is not self._pool
+                    if not recycled or attempt == 2:
+                        self._recycle(pool)
+                        raise
+        raise AssertionError("unreachable")
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if pool is not self._pool:
+                return  # уже перезапущено іншим потоком
+            self._pool = self._new_pool()
+        logger.warning("verification pool recycled")
+        _terminate(pool)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool = self._pool
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "VerifyPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+def _terminate(pool: ProcessPoolExecutor) -> None:
+    terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
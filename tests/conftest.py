@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+class RunningServer:
+    """serve_forever у фоновому потоці; results/errors — усе, що сервер передав у колбеки."""
+
+    def __init__(self, server):
+        self.server = server
+        self.results: list = []
+        self.errors: list = []
+        self._thread = threading.Thread(target=server.serve_forever, args=(self.results.append, self.errors.append),
+                                        daemon=True)
+
+    def start(self, timeout: float = 5.0) -> "RunningServer":
+        self._thread.start()
+        deadline = time.time() + timeout
+        # server_address з'являється після bind+listen: з цього моменту можна підключатись
+        while self.server.server_address is None:
+            if not self._thread.is_alive() or time.time() > deadline:
+                raise RuntimeError("server did not start")
+            time.sleep(0.01)
+        return self
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def wait(self, results: int = 0, errors: int = 0, timeout: float = 5.0) -> None:
+        """Чекати, доки прийде щонайменше стільки результатів і помилок (або мине timeout)."""
+        deadline = time.time() + timeout
+        while (len(self.results) < results or len(self.errors) < errors) and time.time() < deadline:
+            time.sleep(0.05)
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """shutdown() сервера; True, якщо він зупинився за timeout (активні передачі завершуються)."""
+        stopped = self.server.shutdown(timeout=timeout)
+        self._thread.join(timeout)
+        return stopped
+
+@pytest.fixture
+def serve():
+    """
+    serve(server) -> RunningServer. Сервер створюється з port=0: ОС дає вільний порт,
+    тож тести не конфліктують між собою. Після тесту сервер зупиняється, навіть якщо тест упав.
+    """
+    running = []
+
+    def start(server) -> RunningServer:
+        r = RunningServer(server).start()
+        running.append(r)
+        return r
+
+    yield start
+    for r in running:
+        r.stop()
@@ -0,0 +1,91 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from imgtx.async_transport import AsyncReceiverServer, AsyncSender
+from imgtx.crypto import sha256_file
+from imgtx.exceptions import ProtocolError
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+@pytest.mark.timeout(10)
+def test_async_sender_and_receiver(tmp_path: Path):
+    sample = Path("tests/assets/sample_ok.jpg")
+
+    async def scenario():
+        srv = AsyncReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"))
+        results = []
+        await srv.start(on_result=results.append)
+        host, port = srv.server_address
+        try:
+            # async sender і звичайний blocking Sender говорять тим самим wire format
+            header = await AsyncSender(host=host, port=port).send_image(str(sample))
+            await asyncio.get_running_loop().run_in_executor(
+                None, Sender(host=host, port=port).send_image, str(sample))
+            for _ in range(100):
+                if len(results) == 2:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await srv.close()
+        return header, results
+
+    header, results = asyncio.run(scenario())
+    assert len(results) == 2
+    for res in results:
+        assert res.sha256 == header["sha256"]
+        assert sha256_file(res.saved_path) == sha256_file(sample)
+
+@pytest.mark.timeout(20)
+@pytest.mark.parametrize("options", [{"dedup": True}, {"compression": "zlib"}, {"resume": True}, {"cdc": True},
+                                     {"dedup": True, "wire_version": 2}])
+def test_unsupported_features_are_rejected_with_a_reply(tmp_path: Path, options):
+    sample = Path("tests/assets/sample_ok.jpg")
+
+    async def scenario():
+        srv = AsyncReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"))
+        errors = []
+        await srv.start(on_error=errors.append)
+        host, port = srv.server_address
+        try:
+            # sender чекає відповіді до тіла — без неї завис би назавжди
+            with pytest.raises(ProtocolError, match="does not support"):
+                await asyncio.get_running_loop().run_in_executor(
+                    None, Sender(host=host, port=port, **options).send_image, str(sample))
+            for _ in range(100):
+                if errors:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await srv.close()
+        return errors
+
+    errors = asyncio.run(scenario())
+    assert len(errors) == 1 and isinstance(errors[0], ProtocolError)
+    assert not list((tmp_path / "received").iterdir())
+
+@pytest.mark.timeout(10)
+def test_idle_client_times_out(tmp_path: Path):
+    async def scenario():
+        srv = AsyncReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"), client_timeout=0.2)
+        errors = []
+        await srv.start(on_error=errors.append)
+        host, port = srv.server_address
+        try:
+            # початок заголовка — і тиша: з'єднання не тримається вічно
+            _reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b'{"version": 1')
+            await writer.drain()
+            for _ in range(100):
+                if errors:
+                    break
+                await asyncio.sleep(0.05)
+            writer.close()
+        finally:
+            await srv.close()
+        return errors
+
+    errors = asyncio.run(scenario())
+    assert len(errors) == 1 and isinstance(errors[0], asyncio.TimeoutError)
@@ -0,0 +1,84 @@
+import hashlib
+import io
+import json
+
+import pytest
+
+from imgtx.buffers import find_from, recv_exact, recv_exact_into, recv_into_file
+from imgtx.config import CHUNK_SIZE, DELIMITER, HEADER_MAX_BYTES
+from imgtx.exceptions import ProtocolError
+from imgtx.protocol import recv_message, recv_until_delimiter
+
+class ScriptedSocket:
+    """Віддає дані рівно тими шматками, що задані (socketpair може злити кілька send в один recv)."""
+
+    def __init__(self, *chunks: bytes):
+        self.chunks = [bytes(c) for c in chunks]
+        self.recvs = 0
+
+    def recv_into(self, view, nbytes: int = 0) -> int:
+        if not self.chunks:
+            return 0
+        self.recvs += 1
+        limit = min(nbytes or len(view), len(view))
+        chunk = self.chunks.pop(0)
+        if len(chunk) > limit:
+            self.chunks.insert(0, chunk[limit:])
+            chunk = chunk[:limit]
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+def test_short_read():
+    buf = bytearray(10)
+    with memoryview(buf) as view:
+        assert recv_exact_into(ScriptedSocket(b"abc", b"de"), view) == 5
+    assert buf[:5] == b"abcde"
+    with pytest.raises(ConnectionError):
+        recv_exact(ScriptedSocket(b"abc"), 4)
+    assert recv_exact(ScriptedSocket(b"cd"), 4, initial=b"ab") == b"abcd"
+
+def test_find_from_sees_a_delimiter_split_between_recvs():
+    buf = bytearray(b'{"a": 1}\n')
+    assert find_from(buf, DELIMITER, 0, len(buf)) == -1
+    scanned = len(buf)
+    buf += b'\nrest'
+    assert find_from(buf, DELIMITER, scanned, len(buf)) == 8
+
+    sock = ScriptedSocket(b'{"a": 1}\n', b'\nrest')
+    header, rest = recv_until_delimiter(sock)
+    assert (header, bytes(rest), sock.recvs) == (b'{"a": 1}', b"rest", 2)
+    # заголовку, що прийшов одним recv, вистачає одного CHUNK_SIZE, а не HEADER_MAX_BYTES + CHUNK_SIZE
+    _header, rest = recv_until_delimiter(ScriptedSocket(b'{"a": 1}\n\nrest'))
+    assert len(rest.obj) == CHUNK_SIZE and bytes(rest) == b"rest"
+
+def _header_of(size: int) -> bytes:
+    header = json.dumps({"pad": ""}).encode()
+    return json.dumps({"pad": "x" * (size - len(header))}).encode()
+
+def test_header_size_limit():
+    header = _header_of(HEADER_MAX_BYTES)
+    assert len(header) == HEADER_MAX_BYTES
+    msg = recv_message(ScriptedSocket(header, DELIMITER + b"body"))
+    assert (len(msg.header["pad"]), bytes(msg.rest)) == (HEADER_MAX_BYTES - 11, b"body")
+    # заголовок, розбитий на дрібні recv, теж доходить, поки буфер росте
+    msg = recv_message(ScriptedSocket(*[header[i:i + 1000] for i in range(0, len(header), 1000)], DELIMITER))
+    assert len(msg.header["pad"]) == HEADER_MAX_BYTES - 11 and not msg.rest
+
+    with pytest.raises(ProtocolError, match="max size"):
+        recv_message(ScriptedSocket(_header_of(HEADER_MAX_BYTES + 1), DELIMITER))
+    # без delimiter receiver не читає далі ніж заголовок + один recv
+    with pytest.raises(ProtocolError, match="max size"):
+        recv_message(ScriptedSocket(*[b"{" + b" " * 1023] * 200))
+
+def test_recv_into_file():
+    data = bytes(range(256)) * 1000
+    f, h, progress = io.BytesIO(), hashlib.sha256(), []
+    sock = ScriptedSocket(data[:1000], data[1000:])
+    assert recv_into_file(sock, f, len(data), digest=h, chunk_size=4096, progress=progress.append) == len(data)
+    assert f.getvalue() == data and h.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert progress[0] == 1000 and progress[-1] == len(data)
+
+    # обрив — повертає скільки встигло прийти, без винятку
+    f = io.BytesIO()
+    assert recv_into_file(ScriptedSocket(data[:5000]), f, len(data), chunk_size=4096) == 5000
+    assert f.getvalue() == data[:5000]
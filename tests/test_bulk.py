@@ -0,0 +1,98 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from imgtx.bulk import BulkSender, find_images
+from imgtx.exceptions import ConnectionClosed
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+def make_tree(root: Path) -> None:
+    sample = Path("tests/assets/sample_ok.jpg")
+    (root / "nested").mkdir(parents=True)
+    for i in range(6):
+        shutil.copy(sample, root / f"img_{i}.jpg")
+    shutil.copy(sample, root / "nested" / "deep.jpg")
+    (root / "notes.txt").write_text("not an image")
+    (root / "broken.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64)
+
+def test_find_images_filters(tmp_path: Path):
+    make_tree(tmp_path)
+    assert len(find_images(tmp_path)) == 7
+    assert len(find_images(tmp_path, "*.jpg")) == 6
+    assert len(find_images(tmp_path, "*.jpg", recursive=True)) == 7
+
+@pytest.mark.timeout(30)
+def test_bulk_send_reuses_sessions_and_reports_failures(tmp_path: Path, serve):
+    src = tmp_path / "src"
+    make_tree(src)
+    srv = ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"))
+    connections = []
+    real_serve = srv._serve_connection
+    def counting(conn, *a):
+        connections.append(conn)
+        return real_serve(conn, *a)
+    srv._serve_connection = counting
+    server = serve(srv)
+
+    bulk = BulkSender(Sender(server.host, server.port), jobs=2, retries=1, backoff_sec=0.01)
+    summary = bulk.send_all(find_images(src, recursive=True))
+    assert server.stop()
+    results = server.results
+
+    assert summary.files == 8 and summary.sent == 7
+    # невалідне зображення не повторюється
+    assert [Path(o.path).name for o in summary.failed] == ["broken.png"]
+    assert summary.failed[0].attempts == 1
+    assert len(results) == 7
+    # сесії: по з'єднанню на потік і одне перепідключення після помилки з broken.png
+    assert len(connections) <= 3
+    assert summary.files_per_sec > 0 and summary.mb_per_sec > 0
+
+class FakeSender:
+    """open_session/send_image без мережі; перша сесія падає з first_error на першому ж файлі."""
+
+    def __init__(self, first_error: BaseException):
+        self.first_error = first_error
+        self.sessions = 0
+        self.via_session: list = []
+        self.per_connection: list = []
+
+    def open_session(self):
+        self.sessions += 1
+        return FakeSession(self, self.first_error if self.sessions == 1 else None)
+
+    def send_image(self, path: str) -> dict:
+        self.per_connection.append(path)
+        return {}
+
+class FakeSession:
+    def __init__(self, sender: FakeSender, error: BaseException | None):
+        self.sender, self.error = sender, error
+
+    def send_image(self, path: str) -> dict:
+        if self.error is not None:
+            raise self.error
+        self.sender.via_session.append(path)
+        return {}
+
+    def close(self) -> None:
+        pass
+
+@pytest.mark.parametrize("error, falls_back", [(ConnectionClosed("Connection closed"), True),
+                                               (ConnectionResetError(), False)])
+def test_session_fallback_only_when_receiver_closes_without_reply(tmp_path: Path, error, falls_back):
+    sender = FakeSender(error)
+    paths = [str(tmp_path / f"img_{i}.jpg") for i in range(4)]
+    for p in paths:
+        Path(p).write_bytes(b"x")
+    summary = BulkSender(sender, jobs=1, retries=1, backoff_sec=0).send_all(paths)
+    assert summary.sent == 4
+    # reset — звичайний обрив: нова сесія; закриття без відповіді — далі по з'єднанню на файл
+    if falls_back:
+        assert sender.sessions == 1 and sender.per_connection == paths and not sender.via_session
+    else:
+        assert sender.sessions == 2 and sender.via_session == paths and not sender.per_connection
@@ -0,0 +1,75 @@
+import os
+import socket
+from pathlib import Path
+
+import pytest
+
+from imgtx.cdc import CHUNK_ENTRY, ChunkStore, cdc_chunks
+from imgtx.config import CDC_MAX_CHUNKS, CDC_MAX_SIZE
+from imgtx.crypto import sha256_file
+from imgtx.exceptions import ProtocolError
+from imgtx.metrics import StageTimer
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+def test_cdc_boundaries_survive_insertion():
+    data = os.urandom(300_000)
+    edited = data[:100] + b"inserted metadata" + data[100:]
+    a = {data[o:o + n] for o, n in cdc_chunks(data)}
+    b = {edited[o:o + n] for o, n in cdc_chunks(edited)}
+    assert sum(o == 0 for o, _n in cdc_chunks(data)) == 1
+    assert len(a & b) >= len(a) - 2
+
+@pytest.mark.timeout(20)
+def test_near_duplicate_sends_only_changed_chunks(tmp_path: Path, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    raw = sample.read_bytes()
+    # той самий JPEG з доданим COM-сегментом одразу після SOI (інші "метадані")
+    comment = b"re-exported"
+    edited = tmp_path / "edited.jpg"
+    edited.write_bytes(raw[:2] + b"\xff\xfe" + (len(comment) + 2).to_bytes(2, "big") + comment + raw[2:])
+
+    out = tmp_path / "received"
+    out.mkdir()
+    store = ChunkStore.in_dir(out)
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(out), chunk_store=store))
+
+    sender = Sender(server.host, server.port, cdc=True)
+    first = sender.send_image(str(sample))
+    second = sender.send_image(str(edited))
+
+    server.wait(results=2)
+    assert server.stop()
+    store.close()
+    results = server.results
+
+    assert first["bytes_saved"] == 0 and first["bytes_sent"] == len(raw)
+    assert second["bytes_saved"] > 0.8 * len(raw)
+    assert results[1].bytes_saved == second["bytes_saved"]
+    assert sha256_file(results[1].saved_path) == sha256_file(edited)
+
+@pytest.mark.timeout(10)
+def test_hostile_chunk_list_is_rejected_before_allocating(tmp_path: Path):
+    srv = ReceiverServer(output_dir=str(tmp_path))
+    header = {"version": 1, "filename": "x.png", "size_bytes": 1_000_000, "cdc": True}
+    a, b = socket.socketpair()
+    with a, b:
+        with pytest.raises(ProtocolError):
+            srv._handle_cdc(b, {**header, "chunk_count": 200_000_000}, memoryview(b""), StageTimer())
+        # size_bytes теж від peer-а: величезний файл не відкриває місця під мільярди записів
+        with pytest.raises(ProtocolError):
+            srv._handle_cdc(b, {**header, "size_bytes": 10 ** 12, "chunk_count": 400_000_000}, memoryview(b""),
+                            StageTimer())
+        with pytest.raises(ProtocolError):
+            srv._handle_cdc(b, {**header, "size_bytes": 10 ** 12, "chunk_count": CDC_MAX_CHUNKS + 1}, memoryview(b""),
+                            StageTimer())
+        # один шматок довжиною майже 2**32
+        a.sendall(CHUNK_ENTRY.pack(b"\0" * 32, 2 ** 32 - 1))
+        with pytest.raises(ProtocolError):
+            srv._handle_cdc(b, {**header, "size_bytes": 2 ** 32 - 1, "chunk_count": 1}, memoryview(b""), StageTimer())
+        a.sendall(CHUNK_ENTRY.pack(b"\0" * 32, CDC_MAX_SIZE + 1))
+        with pytest.raises(ProtocolError):
+            srv._handle_cdc(b, {**header, "size_bytes": CDC_MAX_SIZE + 1, "chunk_count": 1}, memoryview(b""),
+                            StageTimer())
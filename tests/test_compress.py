@@ -0,0 +1,62 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from imgtx.compress import COMPRESS_AUTO, compression_offers
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+def make_bmp(path: Path, side: int = 512) -> Path:
+    img = Image.new("RGB", (side, side))
+    img.putdata([(x % 256, y % 256, 128) for y in range(side) for x in range(side)])
+    img.save(path, "BMP")
+    return path
+
+def test_auto_offers_skip_already_compressed_formats(tmp_path: Path):
+    bmp = make_bmp(tmp_path / "scan.bmp").read_bytes()
+    jpeg = Path("tests/assets/sample_ok.jpg").read_bytes()
+    assert compression_offers(COMPRESS_AUTO, "bmp", bmp)
+    assert compression_offers(COMPRESS_AUTO, "jpeg", jpeg) == []
+    assert compression_offers("none", "bmp", bmp) == []
+    assert compression_offers("lzma", "jpeg", jpeg) == ["lzma"]
+
+@pytest.mark.timeout(20)
+def test_compressed_body_keeps_original_sha256(tmp_path: Path, serve):
+    bmp = make_bmp(tmp_path / "scan.bmp")
+    out = tmp_path / "received"
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(out)))
+
+    sender = Sender(server.host, server.port, compression=COMPRESS_AUTO)
+    with sender.open_session() as session:
+        headers = [session.send_image(str(bmp)), session.send_image("tests/assets/sample_ok.jpg")]
+    lzma_header = Sender(server.host, server.port, compression="lzma").send_image(str(bmp))
+
+    server.wait(results=3)
+    assert server.stop()
+    results = server.results
+
+    assert headers[0]["encoding"] in headers[0]["compress"]
+    assert headers[0]["bytes_sent"] < headers[0]["size_bytes"] // 2
+    assert lzma_header["encoding"] == "lzma"
+    # JPEG уже стиснутий — тіло йде як є
+    assert "compress" not in headers[1] and "encoding" not in headers[1]
+    assert len(results) == 3
+    expected = hashlib.sha256(bmp.read_bytes()).hexdigest()
+    assert results[0].sha256 == expected == headers[0]["sha256"]
+    assert Path(results[0].saved_path).read_bytes() == bmp.read_bytes()
+
+@pytest.mark.timeout(20)
+def test_receiver_may_decline_compression(tmp_path: Path, serve):
+    bmp = make_bmp(tmp_path / "scan.bmp", side=128)
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"), accept_encodings=[]))
+
+    with Sender(server.host, server.port, compression="zlib").open_session() as session:
+        header = session.send_image(str(bmp))
+    assert server.stop()
+
+    assert header["compress"] == ["zlib"] and "encoding" not in header
+    assert server.results and server.results[0].sha256 == header["sha256"]
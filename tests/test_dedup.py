@@ -0,0 +1,47 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from imgtx.dedup import DigestIndex
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+@pytest.mark.timeout(20)
+def test_known_digest_skips_payload_and_hardlinks(tmp_path: Path, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    renamed = tmp_path / "again.jpg"
+    shutil.copy(sample, renamed)
+    out = tmp_path / "received"
+    out.mkdir()
+
+    index = DigestIndex.in_dir(out)
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(out), dedup_index=index))
+
+    sender = Sender(server.host, server.port, dedup=True)
+    first = sender.send_image(str(sample))
+    # без сесії sender не чекає, поки receiver збереже файл
+    server.wait(results=1)
+    second = sender.send_image(str(renamed))
+    with sender.open_session() as session:
+        third = session.send_image(str(sample))
+
+    server.wait(results=3)
+    assert server.stop()
+    index.close()
+    results = server.results
+
+    assert "deduplicated" not in first
+    assert second["deduplicated"] and third["deduplicated"]
+    assert len(results) == 3 and len({r.sha256 for r in results}) == 1
+    # нове ім'я — hardlink на вже збережені байти
+    assert Path(results[1].saved_path).name.endswith("__again.jpg")
+    assert os.path.samefile(results[0].saved_path, results[1].saved_path)
+
+    # індекс переживає перезапуск receiver-а
+    reopened = DigestIndex.in_dir(out)
+    assert reopened.lookup(first["sha256"]).saved_path == results[0].saved_path
+    reopened.close()
@@ -0,0 +1,83 @@
+import socket
+from pathlib import Path
+
+import pytest
+
+from imgtx.async_transport import AsyncSender
+from imgtx.exceptions import ProtocolError
+from imgtx.protocol import FLAG_PACKED, MAGIC, PREAMBLE, encode_header, encode_message, recv_message
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+SAMPLE = "tests/assets/sample_ok.jpg"
+
+def _read(data: bytes):
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(data)
+        a.shutdown(socket.SHUT_WR)
+        return recv_message(b)
+
+def test_packed_and_json_headers_roundtrip():
+    header = Sender.build_header(Path(SAMPLE))
+    frame = encode_message(header, 2, header["size_bytes"])
+    _magic, version, flags, header_len, payload_len = PREAMBLE.unpack_from(frame)
+    assert (version, flags, payload_len) == (2, FLAG_PACKED, header["size_bytes"])
+    assert len(frame) == PREAMBLE.size + header_len
+
+    msg = _read(frame + b"body")
+    assert msg.header == {**header, "version": 2}
+    assert (msg.version, msg.payload_len, bytes(msg.rest)) == (2, header["size_bytes"], b"")
+
+    # без полів зображення (напр. відповідь) — JSON у тому ж кадрі
+    msg = _read(encode_message({"status": "ok", "name": "фото"}, 2, packed=False))
+    assert msg.header == {"status": "ok", "name": "фото", "version": 2}
+
+def test_v1_frames_still_parse():
+    msg = _read(encode_header({"version": 1, "size_bytes": 3}) + b"abc")
+    assert (msg.header, msg.version, msg.payload_len, bytes(msg.rest)) == ({"version": 1, "size_bytes": 3}, 1, None, b"abc")
+    # delimiter у перших 4 байтах, якими визначається формат
+    assert _read(b"{}\n\n").header == {}
+
+def test_senders_default_to_v1_framing():
+    # v2 лише явно: receiver, що не знає преамбули, мовчки відкинув би кадр
+    assert Sender().wire_version == AsyncSender().wire_version == 1
+    with pytest.raises(ValueError):
+        Sender(wire_version=3)
+
+def test_bad_preamble_is_rejected():
+    with pytest.raises(ProtocolError):
+        _read(PREAMBLE.pack(MAGIC, 9, 0, 2, 0) + b"{}")
+    with pytest.raises(ProtocolError):
+        _read(PREAMBLE.pack(MAGIC, 2, 0, 1 << 30, 0))
+    with pytest.raises(ProtocolError):
+        _read(PREAMBLE.pack(MAGIC, 2, 0, 10, 0) + b"{}")
+
+@pytest.mark.timeout(20)
+def test_receiver_accepts_v1_and_v2_senders(tmp_path: Path, serve):
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path)))
+
+    Sender(server.host, server.port).send_image(SAMPLE)
+    with Sender(server.host, server.port, wire_version=2).open_session() as session:
+        session.send_image(SAMPLE)
+        session.send_image(SAMPLE)
+    Sender(server.host, server.port, dedup=True, wire_version=2).send_image(SAMPLE)
+
+    server.wait(results=4)
+    assert server.stop()
+    assert len(server.results) == 4
+    assert len({r.sha256 for r in server.results}) == 1
+
+@pytest.mark.timeout(20)
+def test_payload_length_mismatch_is_a_protocol_error(tmp_path: Path, serve):
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path)))
+
+    header = Sender.build_header(Path(SAMPLE))
+    with socket.create_connection((server.host, server.port)) as s:
+        s.sendall(encode_message(header, 2, header["size_bytes"] - 1))
+
+    server.wait(errors=1)
+    assert server.stop()
+    assert len(server.errors) == 1 and isinstance(server.errors[0], ProtocolError)
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from imgtx.exceptions import IntegrityError
+from imgtx.metrics import JsonLinesSink, PrometheusFileSink, ReceiverMetrics
+from imgtx.receiver import ReceiveResult, ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+class _Both:
+    def __init__(self, *sinks):
+        self.sinks = sinks
+    def record(self, result):
+        for s in self.sinks:
+            s.record(result)
+    def record_error(self, exc):
+        for s in self.sinks:
+            s.record_error(exc)
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+@pytest.mark.timeout(20)
+def test_stage_timings_and_metric_files(tmp_path: Path, monkeypatch, serve):
+    prom = PrometheusFileSink(tmp_path / "imgtx.prom", flush_sec=0)
+    jsonl = JsonLinesSink(tmp_path / "imgtx.jsonl", flush_sec=60)
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"),
+                                  metrics=_Both(prom, jsonl)))
+
+    real_build = Sender.build_header
+    def tampered(*a):
+        h = real_build(*a)
+        h["sha256"] = "0" * 64
+        return h
+    with Sender(server.host, server.port).open_session() as session:
+        sent = session.send_image("tests/assets/sample_ok.jpg")
+        # сесія кличе Sender.plain_header, а той — cls.build_header: підміняємо build_header на класі,
+        # лише в цьому блоці. Receiver бачить чужий sha256 і відповідає integrity_error
+        with monkeypatch.context() as m:
+            m.setattr(Sender, "build_header", tampered)
+            with pytest.raises(IntegrityError):
+                session.send_image("tests/assets/sample_ok.jpg")
+    assert server.stop()
+    prom.close()
+    jsonl.close()
+
+    assert len(server.results) == 1 and len(server.errors) == 1
+    r = server.results[0]
+    assert {"header", "receive", "validate", "fingerprint", "rename"} <= set(r.timings)
+    assert all(v >= 0 for v in r.timings.values())
+    assert r.bytes_received == sent["size_bytes"] == sent["bytes_sent"]
+    assert {"preflight", "send", "reply"} <= set(sent["timings"])
+
+    text = (tmp_path / "imgtx.prom").read_text()
+    assert "imgtx_transfers_total 1" in text
+    assert 'imgtx_transfer_errors_total{error="IntegrityError"} 1' in text
+    assert 'imgtx_stage_seconds_bucket{stage="receive",le="+Inf"} 1' in text
+    assert f"imgtx_bytes_received_total {r.bytes_received}" in text
+
+    events = [json.loads(line) for line in (tmp_path / "imgtx.jsonl").read_text().splitlines()]
+    # перша подія скидається одразу, далі — не частіше ніж раз на flush_sec і при close
+    assert [e["event"] for e in events] == ["transfer", "snapshot", "error", "snapshot"]
+    assert events[0]["timings"] == r.timings
+    assert events[-1]["transfers"] == 1 and events[-1]["errors"] == {"IntegrityError": 1}
+
+def test_histogram_buckets_are_cumulative():
+    m = ReceiverMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        m.record(ReceiveResult("p", "s", "", 1, 1, "PNG", timings={"receive": seconds}))
+    snap = m.snapshot()["stage_seconds"]["receive"]
+    assert snap["count"] == 3
+    assert snap["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 3}
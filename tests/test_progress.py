@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+@pytest.mark.timeout(20)
+def test_send_and_receive_loops_report_byte_counts(tmp_path: Path, serve):
+    src = tmp_path / "big.bmp"
+    Image.effect_noise((1200, 1200), 64).convert("RGB").save(src, "BMP")   # ~4.3 MB: кілька кроків sendfile
+    size = src.stat().st_size
+    sent, received = [], []
+    srv = ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "out"),
+                         progress=lambda *a: received.append(a))
+    server = serve(srv)
+
+    Sender(server.host, server.port, progress=lambda *a: sent.append(a)).send_image(str(src))
+
+    server.wait(results=1)
+    assert server.stop()
+    assert len(server.results) == 1
+    for events in (sent, received):
+        _assert_progress(events, "big.bmp", size)
+
+def _assert_progress(events, name, size):
+    assert len(events) > 1
+    assert {(n, total) for n, _done, total in events} == {(name, size)}
+    done = [d for _name, d, _total in events]
+    assert done == sorted(done) and done[-1] == size
+
+@pytest.mark.timeout(30)
+@pytest.mark.parametrize("options", [{"cdc": True}, {"resume": True, "resume_chunk_size": 256 * 1024},
+                                     {"stripes": 3, "stripe_range_size": 1024 * 1024}])
+def test_cdc_resume_and_striped_senders_report_progress(tmp_path: Path, options, serve):
+    src = tmp_path / "big.bmp"
+    Image.effect_noise((1200, 1200), 64).convert("RGB").save(src, "BMP")
+    srv = ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "out"))
+    server = serve(srv)
+
+    sent = []
+    Sender(server.host, server.port, progress=lambda *a: sent.append(a), **options).send_image(str(src))
+
+    server.wait(results=1)
+    assert server.stop()
+    assert len(server.results) == 1
+    _assert_progress(sent, "big.bmp", src.stat().st_size)
+
+@pytest.mark.timeout(30)
+@pytest.mark.parametrize("pipeline_depth", [0, 2])
+def test_secure_sender_and_receiver_report_progress(tmp_path: Path, pipeline_depth, serve):
+    from imgtx.secure_receiver import SecureReceiverServer
+    from imgtx.secure_sender import SecureSender
+
+    src = tmp_path / "big.bmp"
+    Image.effect_noise((300, 300), 64).convert("RGB").save(src, "BMP")   # ~270 KB: кілька шматків потоку
+    sent, received = [], []
+    srv = SecureReceiverServer(TEST_HOST, 0, str(tmp_path / "out"), password="pw",
+                               progress=lambda *a: received.append(a))
+    server = serve(srv)
+
+    SecureSender(server.host, server.port, "pw", pipeline_depth=pipeline_depth,
+                 progress=lambda *a: sent.append(a)).send_image(str(src))
+
+    server.wait(results=1)
+    assert server.stop()
+    assert len(server.results) == 1
+    for events in (sent, received):
+        _assert_progress(events, "big.bmp", src.stat().st_size)
+
+def test_tracker_coalesces_updates_and_computes_rate():
+    pytest.importorskip("tkinter")   # gui імпортує tkinter; дисплей не потрібен
+    from imgtx.gui import ProgressTracker
+
+    now = [0.0]
+    tracker = ProgressTracker(clock=lambda: now[0])
+    for done in range(0, 5_000_001, 1_000_000):
+        tracker.update("RECV: a.png", done, 10_000_000)
+    now[0] = 1.0
+    [status] = tracker.drain()
+    assert (status.done, status.finished) == (5_000_000, False)
+    assert status.mb_per_s == pytest.approx(5.0)
+    assert tracker.drain() == []
+
+    tracker.update("RECV: a.png", 10_000_000, 10_000_000)
+    now[0] = 2.0
+    [status] = tracker.drain()
+    assert status.finished and status.mb_per_s == pytest.approx(5.0)
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from imgtx.config import CHUNK_SIZE, PROGRESS_STEP
+from imgtx.crypto import sha256_file
+from imgtx.protocol import recv_exact_to_file_hashed, send_file
+
+SIZE = 2 * PROGRESS_STEP + 12345
+
+@pytest.fixture
+def data_file(tmp_path: Path) -> Path:
+    path = tmp_path / "body.bin"
+    path.write_bytes(os.urandom(SIZE))
+    return path
+
+@pytest.fixture
+def sendfile_calls(monkeypatch):
+    calls = []
+    real = socket.socket.sendfile
+    def spy(self, *a, **kw):
+        calls.append(a)
+        return real(self, *a, **kw)
+    monkeypatch.setattr(socket.socket, "sendfile", spy)
+    return calls
+
+def _transfer(path, **kwargs):
+    """send_file у socketpair з потоку; повертає (результат send_file, прийняті байти, виклики progress)."""
+    a, b = socket.socketpair()
+    progress, result = [], []
+    def run():
+        with a:
+            result.append(send_file(a, str(path), progress=progress.append, **kwargs))
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    received = bytearray()
+    with b:
+        while chunk := b.recv(1 << 20):
+            received += chunk
+    t.join(5)
+    return result[0], bytes(received), progress
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize("zero_copy", [True, False])
+def test_whole_file_on_both_paths(data_file: Path, sendfile_calls, zero_copy):
+    sent, received, progress = _transfer(data_file, zero_copy=zero_copy)
+    assert sent == SIZE and received == data_file.read_bytes()
+    assert progress[-1] == SIZE and progress == sorted(set(progress))
+    if zero_copy:
+        # sendfile кроками PROGRESS_STEP, щоб між ними повідомити про прогрес
+        assert len(sendfile_calls) == 3 and progress == [PROGRESS_STEP, 2 * PROGRESS_STEP, SIZE]
+    else:
+        assert not sendfile_calls and progress[0] == CHUNK_SIZE
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize("zero_copy", [True, False])
+def test_range_on_both_paths(data_file: Path, sendfile_calls, zero_copy):
+    offset, count = 1000, PROGRESS_STEP + 5000
+    sent, received, progress = _transfer(data_file, offset=offset, count=count, zero_copy=zero_copy)
+    assert sent == count and received == data_file.read_bytes()[offset:offset + count]
+    # прогрес рахує байти діапазону, а не зсув у файлі
+    assert progress[-1] == count and progress == sorted(set(progress))
+    assert bool(sendfile_calls) == zero_copy
+
+@pytest.mark.timeout(10)
+@pytest.mark.skipif(not os.path.exists("/dev/zero"), reason="needs /dev/zero")
+def test_non_regular_file_falls_back_to_reads(sendfile_calls):
+    sent, received, progress = _transfer("/dev/zero", count=3 * CHUNK_SIZE + 7)
+    assert sent == len(received) == 3 * CHUNK_SIZE + 7 and not received.strip(b"\0")
+    assert progress == [CHUNK_SIZE, 2 * CHUNK_SIZE, 3 * CHUNK_SIZE, 3 * CHUNK_SIZE + 7]
+    assert not sendfile_calls
+
+def test_hashed_receive_digest_matches_the_file(tmp_path: Path):
+    data = os.urandom(3 * CHUNK_SIZE + 100)
+    out = tmp_path / "out.bin"
+    a, b = socket.socketpair()
+    with a, b:
+        t = threading.Thread(target=lambda: (a.sendall(data[100:]), a.shutdown(socket.SHUT_WR)), daemon=True)
+        t.start()
+        progress = []
+        # initial — залишок після заголовка; теж іде в digest
+        written, digest = recv_exact_to_file_hashed(b, len(data), str(out), initial=data[:100],
+                                                    progress=progress.append)
+        t.join(5)
+    assert written == len(data) and progress[-1] == len(data)
+    assert digest == hashlib.sha256(data).hexdigest() == sha256_file(str(out))
+
+def test_hashed_receive_of_a_truncated_stream(tmp_path: Path):
+    data = os.urandom(CHUNK_SIZE + 100)
+    out = tmp_path / "out.bin"
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(data[:-100])
+        a.close()
+        written, digest = recv_exact_to_file_hashed(b, len(data), str(out))
+    # коротше за size_bytes — receiver відкидає це як IntegrityError
+    assert written == len(data) - 100
+    assert digest == hashlib.sha256(data[:-100]).hexdigest() != hashlib.sha256(data).hexdigest()
+    assert out.read_bytes() == data[:-100]
@@ -0,0 +1,48 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from imgtx.replay import ReplayCache, SqliteReplayCache, ReplayDetected, TimestampOutOfWindow
+
+
+def _caches(tmp_path: Path):
+    return [ReplayCache(ttl_sec=300, capacity=3), SqliteReplayCache(tmp_path / "replay.db", ttl_sec=300, capacity=3)]
+
+def test_replay_cache_bounded_and_never_readmits(tmp_path: Path):
+    now = int(time.time())
+    for cache in _caches(tmp_path):
+        cache.check_and_mark("a", now - 10)
+        with pytest.raises(ReplayDetected):
+            cache.check_and_mark("a", now - 10)
+        with pytest.raises(TimestampOutOfWindow):
+            cache.check_and_mark("stale", now - 301)
+
+        cache.check_and_mark("b", now - 5)
+        cache.check_and_mark("c", now - 1)
+        cache.check_and_mark("d", now)   # витісняє "a", поріг = ts "a"
+        assert len(cache) == 3
+        # витіснений id не можна повторити: його ts уже нижче порогу
+        with pytest.raises(TimestampOutOfWindow):
+            cache.check_and_mark("a", now - 10)
+
+def test_sqlite_replay_cache_is_shared(tmp_path: Path):
+    db = tmp_path / "replay.db"
+    first, second = SqliteReplayCache(db), SqliteReplayCache(db)
+    ts = int(time.time())
+    first.check_and_mark("shared", ts)
+    with pytest.raises(ReplayDetected):
+        second.check_and_mark("shared", ts)
+    first.close()
+    second.close()
+
+def test_sqlite_replay_cache_counts_expired_entries(tmp_path: Path):
+    cache = SqliteReplayCache(tmp_path / "replay.db", ttl_sec=1, capacity=2)
+    now = int(time.time())
+    cache.check_and_mark("a", now - 1)   # expires == now
+    time.sleep(1.1)
+    # "a" спливає в тій самій транзакції: лічильник зменшується без витіснення і без нового порогу
+    cache.check_and_mark("b", int(time.time()))
+    cache.check_and_mark("c", int(time.time()))
+    assert len(cache) == 2
+    cache.close()
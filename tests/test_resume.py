@@ -0,0 +1,87 @@
+import os
+import socket
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from imgtx.crypto import sha256_file
+from imgtx.exceptions import IntegrityError
+from imgtx.protocol import encode_header, recv_reply
+from imgtx.receiver import ReceiverServer
+from imgtx.resume import sweep_stale
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+CHUNK = 64 * 1024
+
+@pytest.mark.timeout(20)
+def test_interrupted_transfer_resumes_from_verified_offset(tmp_path: Path, serve):
+    src = tmp_path / "big.png"
+    Image.effect_noise((400, 400), 64).convert("RGB").save(src)   # ~480 KB, кілька шматків по 64 KB
+    out = tmp_path / "received"
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(out)))
+
+    sender = Sender(server.host, server.port, resume=True, resume_chunk_size=CHUNK)
+    header = sender.resumable_header(src)
+    data = src.read_bytes()
+
+    # перша спроба обривається посеред третього шматка
+    with socket.create_connection((server.host, server.port)) as s:
+        s.sendall(encode_header(header))
+        assert recv_reply(s) == {"status": "resume", "offset": 0}
+        s.sendall(data[:2 * CHUNK + 1000])
+    server.wait(errors=1)
+    assert isinstance(server.errors[0], IntegrityError)
+    assert (out / f".part_{header['transfer_id']}").stat().st_size == 2 * CHUNK
+
+    # новий Sender продовжує з 2 * CHUNK: лише решта йде мережею
+    offsets = []
+    def spy(sock, p, h, **kw):
+        offsets.append(Sender._send_remainder(sock, p, h, **kw))
+    sender._send_remainder = spy   # лише цей екземпляр, клас не змінюється
+    assert sender.send_image(str(src))["transfer_id"] == header["transfer_id"]
+
+    server.wait(results=1)
+    assert server.stop()
+
+    results = server.results
+    assert offsets == [2 * CHUNK]
+    assert len(results) == 1 and sha256_file(results[0].saved_path) == sha256_file(src)
+    assert not list(out.glob(".part_*")) and not list(out.glob(".tmp_*"))
+
+@pytest.mark.timeout(10)
+def test_stalled_receiver_times_out_and_is_retried(tmp_path: Path):
+    src = tmp_path / "small.png"
+    Image.new("RGB", (8, 8)).save(src)
+    # з'єднання приймається (backlog), але відповіді на заголовок нема
+    with socket.create_server((TEST_HOST, 0)) as srv:
+        sender = Sender(TEST_HOST, srv.getsockname()[1], resume=True, retries=1, resume_timeout=0.2)
+        attempts = []
+        def spy(sock, p, h, **kw):
+            attempts.append(sock.gettimeout())
+            return Sender._send_remainder(sock, p, h, **kw)
+        sender._send_remainder = spy
+        with pytest.raises(socket.timeout):
+            sender.send_image(str(src))
+    assert attempts == [0.2, 0.2]
+
+def test_abandoned_partials_are_swept(tmp_path: Path):
+    old, fresh, active = "a" * 32, "b" * 32, "c" * 32
+    for transfer_id in (old, fresh, active):
+        for suffix in ("", ".json", ".tmp"):
+            (tmp_path / f".part_{transfer_id}{suffix}").write_bytes(b"x")
+    stale = time.time() - 2 * 3600
+    for path in tmp_path.glob(f".part_[{old[0]}{active[0]}]*"):
+        os.utime(path, (stale, stale))
+
+    assert sweep_stale(tmp_path, 3600, keep={active}) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f".part_{i}{s}" for i in (fresh, active) for s in ("", ".json", ".tmp"))
+
+    # receiver прибирає на старті; None вимикає
+    ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path), resume_stale_sec=None)
+    assert len(list(tmp_path.iterdir())) == 6
+    ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path), resume_stale_sec=3600)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f".part_{fresh}{s}" for s in ("", ".json", ".tmp"))
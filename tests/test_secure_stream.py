@@ -0,0 +1,95 @@
+import os
+import socket
+import struct
+import time
+from pathlib import Path
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from imgtx.crypto import sha256_file
+from imgtx.exceptions import ProtocolError
+from imgtx.secure_crypto import WHOLE_MAX_CIPHER_LEN, AeadStream, stream_chunks
+from imgtx.secure_protocol import MODE_WHOLE, recv_header
+from imgtx.secure_receiver import SecureReceiverServer, DecryptFailed
+from imgtx.secure_sender import SecureSender
+
+TEST_HOST = "127.0.0.1"
+
+def test_stream_detects_reorder_and_truncation():
+    key, prefix, aad = os.urandom(32), os.urandom(7), b"aad"
+    data = os.urandom(10_000)
+    enc = AeadStream(key, prefix, aad)
+    cts = [enc.encrypt_chunk(data[off:off + n], last) for off, n, last in stream_chunks(len(data), 4096)]
+    assert len(cts) == 3
+
+    dec = AeadStream(key, prefix, aad)
+    assert b"".join(dec.decrypt_chunk(ct, i == 2) for i, ct in enumerate(cts)) == data
+
+    # переставлені шматки
+    with pytest.raises(InvalidTag):
+        AeadStream(key, prefix, aad).decrypt_chunk(cts[1], False)
+    # обрізаний потік: другий шматок видається за останній
+    dec = AeadStream(key, prefix, aad)
+    dec.decrypt_chunk(cts[0], False)
+    with pytest.raises(InvalidTag):
+        dec.decrypt_chunk(cts[1], True)
+
+@pytest.mark.timeout(15)
+def test_secure_streaming_session(tmp_path: Path, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    server = serve(SecureReceiverServer(TEST_HOST, 0, str(tmp_path / "received"), password="pw"))
+
+    sender = SecureSender(server.host, server.port, password="pw", chunk_size=16 * 1024)
+    with sender.open_session() as session:
+        session.send_image(str(sample))
+        sender.password = "wrong"
+        session.rekey()
+        # невдалий tag не ламає сесію: receiver дочитує шифротекст і відповідає decrypt_failed
+        with pytest.raises(DecryptFailed):
+            session.send_image(str(sample))
+        sender.password = "pw"
+        session.rekey()
+        session.send_image(str(sample))
+
+    server.wait(results=2)
+    assert server.stop()
+
+    assert len(server.results) == 2 and len(server.errors) == 1
+    assert all(sha256_file(p) == sha256_file(sample) for p in server.results)
+    assert not list((tmp_path / "received").glob(".tmp_*"))
+
+@pytest.mark.timeout(15)
+@pytest.mark.parametrize("depth", [0, 2])
+def test_secure_send_image_pipeline(tmp_path: Path, depth: int, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    server = serve(SecureReceiverServer(TEST_HOST, 0, str(tmp_path / "received"), password="pw"))
+
+    # маленький шматок: багато шматків проходять через черги конвеєра
+    sender = SecureSender(server.host, server.port, password="pw", chunk_size=1024, pipeline_depth=depth)
+    header = sender.send_image(str(sample))
+
+    server.wait(results=1)
+    assert server.stop()
+
+    results = server.results
+    assert len(results) == 1 and sha256_file(sample) == sha256_file(results[0])
+    # відкритий заголовок не розкриває хеш відкритого тексту
+    assert "sha256" not in header
+
+@pytest.mark.timeout(5)
+def test_untrusted_lengths_are_rejected_before_allocating(tmp_path: Path):
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(struct.pack(">I", 2 ** 32 - 1))
+        with pytest.raises(ProtocolError):
+            recv_header(b)
+
+    srv = SecureReceiverServer(TEST_HOST, 0, str(tmp_path), password="pw")
+    header = {"mode": MODE_WHOLE, "session_id": "s1", "ts": int(time.time()), "salt": "00" * 16,
+              "nonce": "00" * 12, "aad": {}, "filename": "x.jpg", "cipher_len": WHOLE_MAX_CIPHER_LEN + 1}
+    a, b = socket.socketpair()
+    with a, b:
+        with pytest.raises(ProtocolError):
+            srv._receive_file(b, header)
+    assert not list(tmp_path.iterdir())
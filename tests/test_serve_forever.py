@@ -0,0 +1,29 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+@pytest.mark.timeout(20)
+def test_serve_forever_handles_many_clients(tmp_path: Path, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"), max_workers=4))
+
+    # кілька відправників одночасно, сервер не перев'язує порт між зображеннями
+    senders = [threading.Thread(target=Sender(host=server.host, port=server.port).send_image, args=(str(sample),))
+               for _ in range(6)]
+    for s in senders:
+        s.start()
+    for s in senders:
+        s.join(timeout=10)
+
+    server.wait(results=6, timeout=10)
+    assert server.stop()
+    assert not server.errors
+    assert len(server.results) == 6
+    assert all(Path(r.saved_path).exists() for r in server.results)
+    assert not list((tmp_path / "received").glob(".tmp_*"))
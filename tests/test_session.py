@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from imgtx.exceptions import IntegrityError
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+
+TEST_HOST = "127.0.0.1"
+
+@pytest.mark.timeout(15)
+def test_session_sends_many_images_over_one_connection(tmp_path: Path, monkeypatch, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received")))
+
+    sender = Sender(host=server.host, port=server.port)
+    with sender.open_session() as session:
+        h1 = session.send_image(str(sample))
+
+        # зіпсований sha256 у хедері: receiver відповідає integrity_error, але сесія продовжується
+        real_build = Sender.build_header.__func__
+        with monkeypatch.context() as m:
+            m.setattr(Sender, "build_header",
+                      classmethod(lambda cls, *a: {**real_build(cls, *a), "sha256": "0" * 64}))
+            with pytest.raises(IntegrityError):
+                session.send_image(str(sample))
+
+        h2 = session.send_image(str(sample))
+
+    server.wait(results=2)
+    assert server.stop()
+
+    assert [r.sha256 for r in server.results] == [h1["sha256"], h2["sha256"]]
+    assert len(server.errors) == 1 and isinstance(server.errors[0], IntegrityError)
@@ -0,0 +1,41 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+# бюджет на "import imgtx.cli" (кумулятивно за -X importtime); з запасом на повільні CI-машини
+CLI_IMPORT_BUDGET_MS = 150
+HEAVY = {"PIL", "cryptography", "tkinter", "sqlite3", "asyncio"}
+
+def import_times(module: str) -> dict:
+    """{модуль: кумулятивний час імпорту, мкс} з `python -X importtime -c "import module"`."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, ["src", os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def heavy_modules(times: dict) -> set:
+    return {name.split(".")[0] for name in times} & HEAVY
+
+def test_cli_import_stays_within_budget():
+    times = import_times("imgtx.cli")
+    assert heavy_modules(times) == set()
+    assert times["imgtx.cli"] / 1000 < CLI_IMPORT_BUDGET_MS
+
+@pytest.mark.parametrize("module", ["imgtx.receiver", "imgtx.sender", "imgtx.verification"])
+def test_plain_modules_load_neither_pillow_nor_cryptography(module):
+    assert heavy_modules(import_times(module)) == set()
+
+@pytest.mark.skipif(importlib.util.find_spec("tkinter") is None, reason="tkinter not installed")
+def test_gui_defers_transfer_modules():
+    times = import_times("imgtx.gui")
+    assert heavy_modules(times) == {"tkinter"}
+    assert "imgtx.receiver" not in times and "imgtx.sender" not in times
@@ -0,0 +1,127 @@
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from imgtx.config import STRIPE_MAX_RANGES, STRIPE_MIN_RANGE_SIZE
+from imgtx.exceptions import IntegrityError, ProtocolError
+from imgtx.protocol import encode_message, recv_reply, send_file
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+from imgtx.stripe import StripeRegistry
+
+TEST_HOST = "127.0.0.1"
+
+def make_bmp(path: Path, side: int = 256) -> Path:
+    img = Image.new("RGB", (side, side))
+    img.putdata([((x * 7) % 256, (y * 3) % 256, (x ^ y) % 256) for y in range(side) for x in range(side)])
+    img.save(path, "BMP")
+    return path
+
+@pytest.mark.timeout(30)
+def test_striped_upload_lands_once_all_ranges_arrive(tmp_path: Path, serve):
+    bmp = make_bmp(tmp_path / "big.bmp")
+    out = tmp_path / "received"
+    srv = ReceiverServer(host=TEST_HOST, port=0, output_dir=str(out))
+    server = serve(srv)
+
+    sender = Sender(server.host, server.port, stripes=3, stripe_range_size=64 * 1024)
+    header = sender.send_image(str(bmp))
+
+    # обидва заголовки з тим самим sha256, але інший вміст — receiver відхиляє після останнього діапазону
+    bad = Sender(server.host, server.port, stripes=2, stripe_range_size=64 * 1024)
+    real_build = Sender.build_header
+    def tampered(*a):
+        h = real_build(*a)
+        h["sha256"] = "0" * 64
+        return h
+    bad.build_header = tampered
+    with pytest.raises(IntegrityError):
+        bad.send_image(str(bmp))
+
+    server.wait(results=1, errors=1)
+    assert server.stop()
+    results, errors = server.results, server.errors
+
+    assert header["stripes"] == 3
+    # один результат на файл, а не на діапазон
+    assert len(results) == 1 and len(errors) == 1
+    assert results[0].sha256 == header["sha256"]
+    assert Path(results[0].saved_path).read_bytes() == bmp.read_bytes()
+    assert len(srv.stripes) == 0
+    assert not list(out.glob(".stripe_*"))
+
+def test_striping_rejects_incompatible_modes():
+    with pytest.raises(ValueError):
+        Sender(stripes=2, resume=True)
+    with pytest.raises(ValueError):
+        Sender(stripes=0)
+
+def test_stripe_limits_are_checked_before_preallocating(tmp_path: Path):
+    registry = StripeRegistry(max_size=1024 ** 3)
+    header = {"size_bytes": 10 ** 13, "sha256": "0" * 64, "stripe": {"id": "a" * 32, "range_size": 1}}
+    for size, range_size in ((10 ** 13, 1), (10 ** 13, STRIPE_MIN_RANGE_SIZE), (2 * 1024 ** 3, 8 * 1024 ** 2),
+                             (STRIPE_MIN_RANGE_SIZE * (STRIPE_MAX_RANGES + 1), STRIPE_MIN_RANGE_SIZE)):
+        with pytest.raises(ProtocolError):
+            stripe = {**header["stripe"], "range_size": range_size}
+            registry.open(tmp_path, {**header, "size_bytes": size, "stripe": stripe})
+    assert len(registry) == 0 and not list(tmp_path.iterdir())
+
+def test_stripe_registry_caps_active_transfers_and_reserved_bytes(tmp_path: Path):
+    size = 4 * STRIPE_MIN_RANGE_SIZE
+    registry = StripeRegistry(max_active=2, max_reserved=3 * size)
+    def header(n: int, size_bytes: int = size) -> dict:
+        return {"size_bytes": size_bytes, "sha256": "0" * 64,
+                "stripe": {"id": f"{n:032x}", "range_size": STRIPE_MIN_RANGE_SIZE}}
+    registry.open(tmp_path, header(1))
+    # разом з першою більше за max_reserved — нічого не виділяється
+    with pytest.raises(ProtocolError, match="reserve"):
+        registry.open(tmp_path, header(2, 3 * size))
+    registry.open(tmp_path, header(2))
+    with pytest.raises(ProtocolError, match="in progress"):
+        registry.open(tmp_path, header(3))
+    # діапазони вже відкритої передачі ліміти не зачіпають
+    registry.open(tmp_path, header(1))
+    assert len(registry) == 2 and len(list(tmp_path.glob(".stripe_*"))) == 2
+    registry.close()
+
+def test_receiver_start_sweeps_stale_stripe_files(tmp_path: Path):
+    stale, fresh = tmp_path / f".stripe_{'a' * 32}", tmp_path / f".stripe_{'b' * 32}"
+    stale.write_bytes(b"x")
+    fresh.write_bytes(b"x")
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+    ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path), stripe_registry=StripeRegistry(idle_sec=60))
+    assert not stale.exists() and fresh.exists()
+
+@pytest.mark.timeout(10)
+def test_serve_once_without_a_complete_image_is_a_protocol_error(tmp_path: Path):
+    bmp = make_bmp(tmp_path / "big.bmp")
+    srv = ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "out"))
+    outcome = []
+    t = threading.Thread(target=lambda: outcome.append(_catch(srv.serve_once)), daemon=True)
+    t.start()
+    deadline = time.time() + 5
+    while srv.server_address is None and time.time() < deadline:
+        time.sleep(0.01)
+
+    header = Sender.build_header(bmp)
+    n = STRIPE_MIN_RANGE_SIZE
+    header["stripe"] = {"id": "b" * 32, "range_size": n, "offset": 0, "length": n}
+    with socket.create_connection(srv.server_address) as s:
+        s.sendall(encode_message(header, 1))
+        send_file(s, str(bmp), count=n)
+        assert recv_reply(s)["status"] == "stripe"
+    t.join(5)
+    assert isinstance(outcome[0], ProtocolError)
+    srv.stripes.close()
+
+def _catch(fn):
+    try:
+        return fn()
+    except Exception as e:
+        return e
@@ -0,0 +1,54 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from imgtx.exceptions import ProtocolError
+from imgtx.image_utils import pixel_fingerprint, reduced_fingerprint
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+from imgtx.verification import negotiate_level, VERIFY_STRUCTURE, VERIFY_REDUCED, VERIFY_FULL, VERIFY_SHA_ONLY
+
+TEST_HOST = "127.0.0.1"
+
+def test_negotiate_takes_stricter_level():
+    assert negotiate_level(VERIFY_STRUCTURE, VERIFY_FULL) == VERIFY_FULL
+    assert negotiate_level(VERIFY_REDUCED, VERIFY_SHA_ONLY) == VERIFY_REDUCED
+    assert negotiate_level(VERIFY_REDUCED, None) == VERIFY_REDUCED
+    with pytest.raises(ProtocolError):
+        negotiate_level(VERIFY_FULL, "paranoid")
+
+def test_reduced_fingerprint_uses_draft_for_large_jpeg(tmp_path: Path):
+    p = tmp_path / "big.jpg"
+    Image.effect_noise((2048, 1536), 64).convert("RGB").save(p, "JPEG")
+    fp = reduced_fingerprint(p)
+    assert fp == reduced_fingerprint(p)
+    assert fp != pixel_fingerprint(p)
+    assert len(fp) == 64
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L", "P"])
+def test_strip_fingerprint_matches_whole_image_digest(tmp_path: Path, mode: str):
+    p = tmp_path / "strips.png"
+    Image.effect_noise((97, 61), 64).convert("RGB").convert(mode).save(p)
+    with Image.open(p) as img:
+        expected = hashlib.sha256(img.convert("RGB").tobytes()).hexdigest()
+    # 1000 байтів -> смуги по 3 рядки, остання неповна
+    assert pixel_fingerprint(p, strip_bytes=1000) == pixel_fingerprint(p) == expected
+
+@pytest.mark.timeout(15)
+def test_receiver_applies_stricter_of_policy_and_request(tmp_path: Path, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"),
+                                  verify_level=VERIFY_STRUCTURE))
+
+    Sender(server.host, server.port, verify=VERIFY_SHA_ONLY).send_image(str(sample))
+    header = Sender(server.host, server.port, verify=VERIFY_REDUCED).send_image(str(sample))
+
+    server.wait(results=2)
+    assert server.stop()
+
+    by_level = {r.verify: r for r in server.results}
+    assert set(by_level) == {VERIFY_STRUCTURE, VERIFY_REDUCED}
+    assert by_level[VERIFY_STRUCTURE].pixel_fp == ""
+    assert by_level[VERIFY_REDUCED].pixel_fp == header["pixel_fp"] == reduced_fingerprint(sample)
@@ -0,0 +1,45 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from imgtx.crypto import sha256_file
+from imgtx.exceptions import VerificationTimeout
+from imgtx.receiver import ReceiverServer
+from imgtx.sender import Sender
+from imgtx.verify_pool import VerifyPool
+
+TEST_HOST = "127.0.0.1"
+
+@pytest.mark.timeout(60)
+def test_receiver_verifies_in_process_pool(tmp_path: Path, serve):
+    sample = Path("tests/assets/sample_ok.jpg")
+    with VerifyPool(processes=2, timeout=30) as pool:
+        server = serve(ReceiverServer(host=TEST_HOST, port=0, output_dir=str(tmp_path / "received"), verify_pool=pool))
+
+        for _ in range(3):
+            Sender(host=server.host, port=server.port).send_image(str(sample))
+
+        server.wait(results=3, timeout=30)
+        assert server.stop()
+
+    assert not server.errors and len(server.results) == 3
+    assert all(r.sha256 == sha256_file(sample) and Path(r.saved_path).exists() for r in server.results)
+
+@pytest.mark.timeout(60)
+def test_verify_pool_timeout_recycles_pool(tmp_path: Path):
+    sample = Path("tests/assets/sample_ok.jpg")
+    header = {"filename": sample.name, "sha256": sha256_file(sample)}
+    tmp = tmp_path / ".tmp_sample.jpg"
+
+    with VerifyPool(processes=1, timeout=0.001) as pool:
+        shutil.copy(sample, tmp)
+        # за мілісекунду не встигає навіть стартувати процес
+        with pytest.raises(VerificationTimeout):
+            pool.verify(tmp_path, header, tmp)
+
+        pool.timeout = 30
+        shutil.copy(sample, tmp)
+        result = pool.verify(tmp_path, header, tmp)
+
+    assert result.sha256 == header["sha256"] and Path(result.saved_path).exists()